@@ -21,7 +21,7 @@ class BikeAdmin(admin.ModelAdmin):
 
 @admin.register(Showroom)
 class ShowroomAdmin(admin.ModelAdmin):
-    list_display = ['name', 'city', 'state', 'phone', 'is_active']
+    list_display = ['name', 'city', 'state', 'phone', 'test_ride_capacity', 'is_active']
     list_filter = ['city', 'state', 'is_active']
     search_fields = ['name', 'city', 'state']
 
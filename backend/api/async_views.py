@@ -0,0 +1,162 @@
+"""Async variants of the hottest read endpoints, for deployments under ASGI.
+
+They return the same payloads as their DRF counterparts in api/views.py
+but evaluate querysets with the async ORM, so a worker keeps serving other
+requests while one waits on the database. Django 4.2's async ORM runs each
+query in the thread-sensitive executor, so one request's queries still run
+one after another. DRF 3.14 has no async views, so these are plain Django
+views. Validation, queryset construction and keyset (``cursor``)
+pagination are reused from the sync code.
+
+Served under /api/async/ (see api/urls.py); point an ASGI server such as
+uvicorn at two_wheeler_marketplace.asgi:application.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import autocomplete, comparison, counters
+from .cache import aget_or_set_locked, aversioned_key
+from .models import Bike, Review, Showroom, UpcomingLaunch
+from .pagination import KeysetPagination
+from .serializers import BikeListSerializer, BikeSerializer, UpcomingLaunchSerializer
+from .views import DASHBOARD_STATS_MODELS, filtered_bikes
+
+
+def require_GET(view):
+    # django.views.decorators.http.require_GET only supports async views from Django 5.0.
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def keyset_page(request, queryset):
+    """BikeListView's keyset (``cursor``) page of ``queryset``, paginated by its own paginator."""
+    paginator = KeysetPagination()
+    bikes = paginator.paginate_queryset(queryset, Request(request))
+    data = BikeListSerializer(bikes, many=True, context={'request': request}).data
+    return paginator.get_paginated_response(data).data
+
+
+@require_GET
+async def bike_list(request):
+    try:
+        queryset = await sync_to_async(filtered_bikes)(request)
+        if KeysetPagination.cursor_query_param in request.GET:
+            return json_response(await sync_to_async(keyset_page)(request, queryset))
+    except APIException as exc:
+        # Shaped as DRF's exception handler shapes it: lists and dicts as they are, anything else as detail.
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return json_response(detail, status=exc.status_code)
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return json_response({'detail': 'Invalid page.'}, status=404)
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    offset = (page - 1) * page_size
+
+    count = await queryset.acount()
+    bikes = await alist(queryset[offset:offset + page_size])
+    if page > 1 and not bikes:
+        return json_response({'detail': 'Invalid page.'}, status=404)
+
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    return json_response({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if offset + page_size < count else None,
+        'previous': previous,
+        'results': BikeListSerializer(bikes, many=True, context={'request': request}).data,
+    })
+
+
+@require_GET
+async def bike_detail(request, pk):
+    try:
+        bike = await Bike.objects.select_related('brand').aget(pk=pk)
+    except ObjectDoesNotExist:
+        return json_response({'detail': 'Not found.'}, status=404)
+    return json_response(BikeSerializer(bike, context={'request': request}).data)
+
+
+@require_GET
+async def search_suggestions(request):
+    query = request.GET.get('q', '')
+    if len(query) < 2:
+        return json_response([])
+    # In-memory lookup; only an index refresh touches the database.
+    return json_response(await sync_to_async(autocomplete.suggest)(query, limit=10))
+
+
+async def dashboard_totals():
+    if settings.DASHBOARD_STATS['USE_COUNTERS']:
+        counts = await sync_to_async(counters.get_counts)(['bikes', 'active_showrooms', 'reviews'])
+        return counts['bikes'], counts['active_showrooms'], counts['reviews']
+    return (
+        await Bike.objects.acount(),
+        await Showroom.objects.filter(is_active=True).acount(),
+        await Review.objects.acount(),
+    )
+
+
+async def build_dashboard_stats():
+    total_bikes, total_showrooms, total_reviews = await dashboard_totals()
+    featured_bikes = await alist(Bike.objects.select_related('brand').filter(is_featured=True)[:6])
+    trending_bikes = await alist(Bike.objects.select_related('brand').filter(is_trending=True)[:6])
+    upcoming_launches = await alist(UpcomingLaunch.objects.select_related('brand').filter(is_featured=True)[:6])
+    return {
+        'total_bikes': total_bikes,
+        'total_showrooms': total_showrooms,
+        'total_reviews': total_reviews,
+        'featured_bikes': BikeListSerializer(featured_bikes, many=True).data,
+        'trending_bikes': BikeListSerializer(trending_bikes, many=True).data,
+        'upcoming_launches': UpcomingLaunchSerializer(upcoming_launches, many=True).data
+    }
+
+
+@require_GET
+async def dashboard_stats(request):
+    key = await aversioned_key('dashboard_stats', DASHBOARD_STATS_MODELS)
+    stats = await aget_or_set_locked(key, build_dashboard_stats, settings.DASHBOARD_STATS['TIMEOUT'])
+    return json_response(stats)
+
+
+@require_GET
+async def compare_bikes(request):
+    try:
+        bike_ids = sorted({int(bike_id) for bike_id in request.GET.getlist('bike_ids')})
+    except ValueError:
+        return json_response({'error': 'bike_ids must be integers'}, status=400)
+    if len(bike_ids) < 2 or len(bike_ids) > comparison.MAX_BIKES:
+        return json_response({'error': f'Please select 2-{comparison.MAX_BIKES} bikes to compare'}, status=400)
+
+    stamps = await comparison.amember_stamps(bike_ids)
+    if len(stamps) != len(bike_ids):
+        return json_response({'error': 'One or more bikes not found'}, status=404)
+
+    matrix = await aget_or_set_locked(
+        await comparison.acache_key(stamps), lambda: comparison.acompare(bike_ids), comparison.CACHE_TIMEOUT
+    )
+    return json_response(matrix)
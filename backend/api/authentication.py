@@ -0,0 +1,159 @@
+"""JWT authentication that resolves users from a cache instead of the database.
+
+simplejwt's ``JWTAuthentication`` loads the token's user by id on every
+request. ``CachedJWTAuthentication`` looks up only what authentication needs
+(the user's id, ``is_active`` and the digest of its password hash compared by
+the revoke check) in a short-lived per-process dict first, then in the
+shared cache, and only then in the database. Views get a ``User`` with just
+those fields loaded: any other field (``is_staff``, ``username``...) is read
+from the database on first access, so it is never stale, and no password
+hash is ever cached.
+
+Shared entries are keyed by the user id and that user's auth version, which
+is bumped after every committed save or delete of the user (see
+api/signals.py): a password change or deactivation makes the old entry
+unreachable, and a request that read the user before the change cannot
+store it under the new version. The shared tier is only used with a shared
+cache backend (``api.cache.is_shared``); with a per-process one, the other
+workers would never see the bump. The process that saved the user drops its
+local entry at once; other processes keep theirs for at most
+``LOCAL_TIMEOUT`` seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import is_shared
+
+VERSION_KEY = 'version:auth_user:{}'
+USER_KEY = 'auth_user:{}:{}'
+
+
+class LocalUsers:
+    """Auth entries by user id for ``LOCAL_TIMEOUT`` seconds, at most ``LOCAL_MAX_ENTRIES`` of them."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return value
+
+    def set(self, user_id, value, timeout):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + timeout, value)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_users = LocalUsers(settings.AUTH_USER_CACHE['LOCAL_MAX_ENTRIES'])
+
+
+def user_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Unknown (never set or evicted): start from a practically unique value, as in api/cache.py.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def forget_user(user_id):
+    """Drop a user's cached entries. Call again after commit, when the change is visible to other readers."""
+    local_users.discard(user_id)
+    bump_user_version(user_id)
+
+
+def auth_entry(user):
+    """What is cached of a user: ``(pk, is_active, password digest)``."""
+    return user.pk, user.is_active, get_md5_hash_password(user.password)
+
+
+def get_user(user_id):
+    """``(user, password digest)`` for this id, or ``(None, None)`` if there is no such user.
+
+    A user read from the database comes back whole; one built from a cached
+    entry has only its pk and is_active loaded.
+    """
+    config = settings.AUTH_USER_CACHE
+    entry = local_users.get(user_id)
+    if entry is None:
+        key = USER_KEY.format(user_id, user_version(user_id)) if is_shared() else None
+        if key is not None:
+            entry = cache.get(key)
+        if entry is None:
+            user_model = get_user_model()
+            try:
+                user = user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except user_model.DoesNotExist:
+                return None, None
+            entry = auth_entry(user)
+            if key is not None:
+                cache.set(key, entry, config['TIMEOUT'])
+            local_users.set(user_id, entry, config['LOCAL_TIMEOUT'])
+            return user, entry[2]
+        local_users.set(user_id, entry, config['LOCAL_TIMEOUT'])
+    pk, is_active, digest = entry
+    user_model = get_user_model()
+    # A fresh instance per request, its other fields deferred: read from the database on first access.
+    user = user_model.from_db(DEFAULT_DB_ALIAS, [user_model._meta.pk.attname, 'is_active'], [pk, is_active])
+    return user, digest
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user, digest = get_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != digest:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,188 @@
+"""In-process autocomplete index for ``search_suggestions``.
+
+Each worker keeps a sorted array of ``(key, kind, bike_id)`` entries, where
+keys are normalized "brand model" strings and aliases, plus the suggestion
+payload per bike. Prefix lookups are a binary search followed by a short
+forward scan, with no database access.
+
+Freshness is coordinated through the shared cache: Bike/Brand changes bump
+``VERSION_KEY`` and record what changed under ``change:<version>``. A worker
+whose local version is behind applies the recorded changes by reloading just
+those bikes, and rebuilds from scratch when the log is incomplete.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Bike
+from .replicas import primary_reads
+
+VERSION_KEY = 'autocomplete:version'
+CHANGE_KEY = 'autocomplete:change:{}'
+CHANGE_TTL = 60 * 60
+MAX_INCREMENTAL_CHANGES = 500
+MAX_SCANNED = 500
+
+# Entry kinds, best first: the full "brand model" name, the model alone, then aliases.
+FULL_NAME, MODEL_NAME, ALIAS = 0, 1, 2
+
+_NON_WORD_RE = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def normalize(text):
+    return _NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+def brand_aliases(brand):
+    """Common ways of typing a brand: initials ("re") and without spaces ("royalenfield")."""
+    words = brand.split()
+    aliases = set()
+    if len(words) > 1:
+        aliases.add(''.join(word[0] for word in words))
+        aliases.add(''.join(words))
+    return aliases
+
+
+def bike_keys(brand_name, model_name):
+    """Return the ``(key, kind)`` pairs a bike can be found under."""
+    brand = normalize(brand_name)
+    model = normalize(model_name)
+    if brand and model.startswith(brand + ' '):
+        model = model[len(brand) + 1:]
+    keys = {f'{brand} {model}': FULL_NAME, model: MODEL_NAME}
+    words = model.split()
+    for i in range(1, len(words)):
+        keys.setdefault(' '.join(words[i:]), ALIAS)
+    for alias in brand_aliases(brand):
+        keys.setdefault(f'{alias} {model}', ALIAS)
+    return [(key, kind) for key, kind in keys.items() if key]
+
+
+class SuggestionIndex:
+    def __init__(self, entries, payloads, version):
+        self.entries = entries
+        self.payloads = payloads
+        self.version = version
+
+    @classmethod
+    def build(cls, rows, version):
+        entries = []
+        payloads = {}
+        for row in rows:
+            payloads[row['id']] = payload(row)
+            entries.extend((key, kind, row['id']) for key, kind in bike_keys(row['brand__name'], row['model_name']))
+        entries.sort()
+        return cls(entries, payloads, version)
+
+    def updated(self, bike_ids, rows, version):
+        """Return a new index with ``bike_ids`` replaced by ``rows`` (missing ids are removed)."""
+        bike_ids = set(bike_ids)
+        payloads = {bike_id: data for bike_id, data in self.payloads.items() if bike_id not in bike_ids}
+        added = []
+        for row in rows:
+            payloads[row['id']] = payload(row)
+            added.extend((key, kind, row['id']) for key, kind in bike_keys(row['brand__name'], row['model_name']))
+        entries = [entry for entry in self.entries if entry[2] not in bike_ids]
+        # Two sorted runs; timsort merges them in linear time.
+        entries.extend(sorted(added))
+        entries.sort()
+        return SuggestionIndex(entries, payloads, version)
+
+    def search(self, query, limit=10):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        best = {}
+        position = bisect_left(self.entries, (prefix,))
+        for key, kind, bike_id in self.entries[position:position + MAX_SCANNED]:
+            if not key.startswith(prefix):
+                break
+            rank = (kind, len(key))
+            if bike_id not in best or rank < best[bike_id]:
+                best[bike_id] = rank
+        top = heapq.nsmallest(limit, best.items(), key=lambda item: (item[1], item[0]))
+        return [self.payloads[bike_id] for bike_id, _ in top]
+
+
+def payload(row):
+    image = row['main_image']
+    return {
+        'id': row['id'],
+        'name': f"{row['brand__name']} {row['model_name']}",
+        'price': str(row['price']),
+        'image': Bike._meta.get_field('main_image').storage.url(image) if image else None,
+    }
+
+
+def bike_rows(queryset=None):
+    queryset = Bike.objects.all() if queryset is None else queryset
+    return queryset.order_by().values('id', 'brand__name', 'model_name', 'price', 'main_image')
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A fresh, practically unique starting point so stale workers never match it. Kept until evicted,
+        # as in api/cache.py: with the default timeout every worker would rebuild its index every 5 minutes.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_index():
+    """Return this worker's index, refreshing it first if the shared version moved on."""
+    global _index
+    version = shared_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        index = _index
+        if index is not None and index.version == version:
+            return index
+        changes = None
+        if index is not None and version is not None and 0 < version - index.version <= MAX_INCREMENTAL_CHANGES:
+            keys = [CHANGE_KEY.format(v) for v in range(index.version + 1, version + 1)]
+            logged = cache.get_many(keys)
+            if len(logged) == len(keys):
+                changes = logged.values()
+        # Every request of this worker searches the result until the next change: read the primary.
+        with primary_reads():
+            if changes is None:
+                index = SuggestionIndex.build(bike_rows().iterator(chunk_size=2000), version)
+            else:
+                bike_ids = {pk for kind, pk in changes if kind == 'bike'}
+                brand_ids = {pk for kind, pk in changes if kind == 'brand'}
+                if brand_ids:
+                    bike_ids |= set(Bike.objects.filter(brand_id__in=brand_ids).values_list('id', flat=True))
+                index = index.updated(bike_ids, bike_rows(Bike.objects.filter(id__in=bike_ids)), version)
+        _index = index
+        return index
+
+
+def suggest(query, limit=10):
+    return get_index().search(query, limit)
+
+
+def record_change(kind, pk):
+    """Bump the shared version and log that the ``kind`` ('bike' or 'brand') row ``pk`` changed."""
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        # No version yet: every worker rebuilds anyway, nothing to log.
+        shared_version()
+        return
+    cache.set(CHANGE_KEY.format(version), (kind, pk), CHANGE_TTL)
+
+
+def reset():
+    """Make every worker rebuild its index, e.g. after a bulk write that bypassed the signals."""
+    cache.delete(VERSION_KEY)
@@ -0,0 +1,68 @@
+"""Helpers shared by the benchmark management commands."""
+import importlib
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def isolated_database(name=None):
+    """Run the block against freshly migrated test databases that are dropped afterwards.
+
+    ``name`` puts the default test database in that file, for SQLite runs that need
+    several connections to see each other's writes; SQLite's is in memory otherwise.
+    """
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def run_in_django(target, *args):
+    """Entry point of a spawned process: set Django up, then call ``target`` ("module.function").
+
+    A spawned process starts from a fresh interpreter, which cannot import a
+    module that defines or imports models before the app registry is ready.
+    """
+    django.setup()
+    module, _, name = target.rpartition('.')
+    return getattr(importlib.import_module(module), name)(*args)
+
+
+def time_calls(func, args_list):
+    """Call ``func(*args)`` for every entry of ``args_list`` and return the timings in ms."""
+    timings = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        'n': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p50_ms': round(ordered[len(ordered) // 2], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def format_summary(label, summary):
+    return (
+        f"{label:<28} n={summary['n']:<6} mean={summary['mean_ms']:>9.3f} ms  "
+        f"p50={summary['p50_ms']:>9.3f} ms  p95={summary['p95_ms']:>9.3f} ms  max={summary['max_ms']:>9.3f} ms"
+    )
@@ -0,0 +1,195 @@
+"""Per-endpoint query and wall-time budgets.
+
+Every route in ``api/urls.py`` has an entry in ``ENDPOINT_BUDGETS``. The
+``check_query_budgets`` management command seeds a dataset twice (a small and
+a full page of rows), requests each endpoint against both and fails when an
+endpoint exceeds its budget or when its query count grows with the number of
+rows on the page, which is how N+1 patterns show up.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import authentication, response_cache
+from .models import Bike, Favorite, Notification, Review, TestRide, UsedBikeListing
+from .seed import seed_dataset, seed_user
+
+DEFAULT_MAX_MS = 250
+
+# url name -> budget. ``queries`` is the maximum number of SQL queries for one
+# request (JWT authentication included), ``max_ms`` the wall-time budget.
+# ``kwargs`` maps URL kwargs to a callable returning the value for the seeded user.
+# ``staff`` endpoints are requested as a staff user instead of the seeded user.
+ENDPOINT_BUDGETS = {
+    'user-register': {
+        'method': 'post', 'auth': True, 'queries': 3,
+        'data': lambda user: {
+            'username': f'budget-{time.time_ns()}', 'email': 'budget@example.com',
+            'password': 'budget-pass-123', 'password_confirm': 'budget-pass-123',
+        },
+    },
+    'user-login': {
+        'method': 'post', 'auth': True, 'queries': 2,
+        'data': lambda user: {'username': user.username, 'password': 'seed-password-123'},
+    },
+    'user-profile': {'auth': True, 'queries': 1},
+    'brand-list': {'queries': 2},
+    'brand-detail': {'queries': 1, 'kwargs': {'pk': lambda user: Bike.objects.values_list('brand', flat=True).first()}},
+    'bike-list': {'queries': 2},
+    'bike-facets': {'queries': 4, 'params': lambda user: {'fuel_type': 'petrol'}},
+    'bike-export': {'queries': 1, 'params': lambda user: {'fuel_type': 'petrol'}},
+    'bike-ownership-cost': {
+        'queries': 3,
+        'params': lambda user: {'monthly_km': '1200', 'fuel_price_per_liter': '105', 'electricity_price_per_kwh': '8'},
+    },
+    'bike-detail': {'queries': 1, 'kwargs': {'pk': lambda user: Bike.objects.values_list('pk', flat=True).first()}},
+    'similar-bikes': {'queries': 1, 'kwargs': {'bike_id': lambda user: Bike.objects.values_list('pk', flat=True).first()}},
+    'showroom-list': {'queries': 3},
+    'showroom-detail': {'queries': 2, 'kwargs': {'pk': lambda user: TestRide.objects.values_list('showroom', flat=True).first()}},
+    'test-ride-availability': {
+        'queries': 2,
+        'kwargs': {'pk': lambda user: TestRide.objects.values_list('showroom', flat=True).first()},
+        'params': lambda user: {'bike': TestRide.objects.values_list('bike', flat=True).first()},
+    },
+    'test-ride-list': {'auth': True, 'queries': 3},
+    'test-ride-export': {'auth': True, 'staff': True, 'queries': 2, 'params': lambda user: {'format': 'ndjson'}},
+    'test-ride-detail': {'auth': True, 'queries': 2, 'kwargs': {'pk': lambda user: user.test_rides.values_list('pk', flat=True).first()}},
+    'review-list': {'queries': 2},
+    'bike-reviews': {'queries': 2, 'kwargs': {'bike_id': lambda user: Review.objects.exclude(user=user).values_list('bike', flat=True).first()}},
+    'review-detail': {'auth': True, 'queries': 2, 'kwargs': {'pk': lambda user: user.reviews.values_list('pk', flat=True).first()}},
+    'favorite-list': {'auth': True, 'queries': 3},
+    'favorite-detail': {
+        'method': 'delete', 'auth': True, 'queries': 3,
+        'kwargs': {'pk': lambda user: Favorite.objects.filter(user=user).values_list('pk', flat=True).last()},
+    },
+    'notification-list': {'auth': True, 'queries': 3},
+    'notification-unread-count': {'auth': True, 'queries': 5},
+    'notification-mark-read': {'auth': True, 'method': 'post', 'queries': 6, 'data': lambda user: {'all': True}},
+    'notification-detail': {'auth': True, 'queries': 2, 'kwargs': {'pk': lambda user: Notification.objects.filter(user=user).values_list('pk', flat=True).first()}},
+    'upcoming-launch-list': {'queries': 2},
+    'used-bike-list': {'queries': 2},
+    'used-bike-export': {'auth': True, 'staff': True, 'queries': 2},
+    'used-bike-detail': {'auth': True, 'queries': 2, 'kwargs': {'pk': lambda user: UsedBikeListing.objects.filter(user=user).values_list('pk', flat=True).first()}},
+    'emi-calculator': {
+        'method': 'post', 'auth': True, 'queries': 1,
+        'data': lambda user: {'principal_amount': '100000', 'down_payment': '20000', 'interest_rate': '9.5', 'tenure_months': 24},
+    },
+    'emi-batch-calculator': {
+        'method': 'post', 'auth': True, 'queries': 1,
+        'data': lambda user: {
+            'principal_amounts': ['100000', '150000'], 'down_payments': ['10000', '20000'],
+            'interest_rates': ['8.5', '9.5', '11'], 'tenures_months': [12, 24, 36],
+        },
+    },
+    'fuel-cost-calculator': {
+        'method': 'post', 'auth': True, 'queries': 1,
+        'data': lambda user: {'monthly_km': '1200', 'fuel_price_per_liter': '105', 'bike_mileage': '45'},
+    },
+    'compare-bikes': {'queries': 2, 'params': lambda user: {'bike_ids': list(Bike.objects.values_list('pk', flat=True)[:3])}},
+    'search-suggestions': {'queries': 1, 'params': lambda user: {'q': 'Honda'}},
+    'dashboard-stats': {'queries': 6},
+    'response-cache-metrics': {'queries': 0},
+    'async-bike-list': {'queries': 2},
+    'async-bike-detail': {'queries': 1, 'kwargs': {'pk': lambda user: Bike.objects.values_list('pk', flat=True).first()}},
+    'async-search-suggestions': {'queries': 1, 'params': lambda user: {'q': 'Honda'}},
+    'async-dashboard-stats': {'queries': 6},
+    'async-compare-bikes': {'queries': 2, 'params': lambda user: {'bike_ids': list(Bike.objects.values_list('pk', flat=True)[:3])}},
+}
+
+
+def api_url_names():
+    """Names of every named route under ``api/``."""
+    from . import urls
+    return [pattern.name for pattern in urls.urlpatterns if getattr(pattern, 'name', None)]
+
+
+def missing_budgets():
+    return [name for name in api_url_names() if name not in ENDPOINT_BUDGETS]
+
+
+def measure_endpoint(name, budget, user, client=None):
+    """Request one endpoint and return its measurement."""
+    client = client or APIClient()
+    if budget.get('auth'):
+        requester = seed_user('staff@example.com', is_staff=True) if budget.get('staff') else user
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(requester).access_token}')
+    else:
+        client.credentials()
+    kwargs = {key: resolve(user) for key, resolve in budget.get('kwargs', {}).items()}
+    url = reverse(name, kwargs=kwargs or None)
+    method = budget.get('method', 'get')
+    if method == 'get':
+        params = budget['params'](user) if 'params' in budget else {}
+        request = lambda: client.get(url, params)
+    else:
+        data = budget['data'](user) if 'data' in budget else {}
+        request = lambda: getattr(client, method)(url, data, format='json')
+
+    cache.clear()
+    response_cache.local_cache.clear()
+    authentication.local_users.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = request()
+        # Streamed responses run their queries while the body is consumed.
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    return {
+        'endpoint': name,
+        'method': method.upper(),
+        'status': response.status_code,
+        'queries': len(queries),
+        'max_queries': budget['queries'],
+        'ms': round(elapsed_ms, 2),
+        'max_ms': budget.get('max_ms', DEFAULT_MAX_MS),
+        'bytes': len(content),
+    }
+
+
+def measure_all(rows, budgets=None):
+    """Seed ``rows`` rows per list inside a rolled-back transaction and measure every endpoint."""
+    budgets = budgets or ENDPOINT_BUDGETS
+    results = {}
+    with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+        with transaction.atomic():
+            user = seed_dataset(rows)
+            for name, budget in budgets.items():
+                results[name] = measure_endpoint(name, budget, user)
+            transaction.set_rollback(True)
+    return results
+
+
+def check_budgets(small_rows=3, full_rows=25, check_time=True):
+    """Measure every endpoint at two dataset sizes and return ``(results, failures)``."""
+    failures = [f'{name}: no budget recorded' for name in missing_budgets()]
+    small = measure_all(small_rows)
+    full = measure_all(full_rows)
+    for name, result in full.items():
+        if result['status'] >= 400:
+            failures.append(f"{name}: returned HTTP {result['status']}")
+        if result['queries'] > result['max_queries']:
+            failures.append(f"{name}: {result['queries']} queries, budget is {result['max_queries']}")
+        if result['queries'] != small[name]['queries']:
+            failures.append(
+                f"{name}: query count grows with page size "
+                f"({small[name]['queries']} at {small_rows} rows, {result['queries']} at {full_rows} rows)"
+            )
+        if check_time and result['ms'] > result['max_ms']:
+            failures.append(f"{name}: {result['ms']} ms, budget is {result['max_ms']} ms")
+    return list(full.values()), failures
+
+
+def format_table(results):
+    headers = ['endpoint', 'method', 'status', 'queries', 'max_queries', 'ms', 'max_ms', 'bytes']
+    rows = [[str(result[header]) for header in headers] for result in results]
+    widths = [max(len(header), *(len(row[i]) for row in rows)) for i, header in enumerate(headers)]
+    lines = ['  '.join(header.ljust(width) for header, width in zip(headers, widths))]
+    lines.append('  '.join('-' * width for width in widths))
+    lines.extend('  '.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+    return '\n'.join(lines)
@@ -0,0 +1,162 @@
+"""Versioned cache keys and stampede-protected cache fills.
+
+Each model has a version number in the shared cache, bumped after every
+committed save/delete (see api/signals.py). Cache keys embed the versions of
+the models their value depends on, so a write makes the old entries
+unreachable instead of having to find and delete them. The time of the last
+bump is kept next to each version for Last-Modified headers.
+
+Versions only reach other worker processes through a shared cache backend
+(REDIS_URL). With the default LocMemCache a bump is seen by the process that
+made it, and the others serve their entries until these expire; see
+``is_shared`` and the check in api/checks.py.
+"""
+import asyncio
+import threading
+import time
+import weakref
+import zlib
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import replicas
+
+VERSION_KEY = 'version:{}'
+MODIFIED_KEY = 'modified:{}'
+LOCK_KEY = 'lock:{}'
+_MISSING = object()
+# Backends whose entries no other process sees.
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+_process_locks = [threading.Lock() for _ in range(64)]
+# asyncio locks belong to one event loop, so the async stripes are kept per loop.
+_loop_locks = weakref.WeakKeyDictionary()
+
+
+def is_shared():
+    """Whether every worker process sees the default cache's entries (and so each other's version bumps)."""
+    return not isinstance(caches['default'], PROCESS_LOCAL_BACKENDS)
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def get_versions(models):
+    """Return the current versions of ``models`` in one cache round trip."""
+    keys = [VERSION_KEY.format(model_label(model)) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Unknown (never set or evicted): start from a practically unique value
+            # so entries cached under an earlier version are never reused.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_last_modified(models):
+    """Return the time (epoch seconds) of the latest committed change to any of ``models``."""
+    keys = [MODIFIED_KEY.format(model_label(model)) for model in models]
+    stamps = cache.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            # Unknown: assume it just changed, so clients revalidate rather than keep stale data.
+            cache.add(key, int(time.time()), None)
+            stamps[key] = cache.get(key)
+    return max(stamps.values())
+
+
+async def aget_versions(models):
+    """Async ``get_versions``."""
+    keys = [VERSION_KEY.format(model_label(model)) for model in models]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    key = VERSION_KEY.format(model_label(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+    cache.set(MODIFIED_KEY.format(model_label(model)), int(time.time()), None)
+
+
+def versioned_key(prefix, models, *parts):
+    versions = '.'.join(str(version) for version in get_versions(models))
+    return ':'.join([prefix, versions, *(str(part) for part in parts)])
+
+
+async def aversioned_key(prefix, models, *parts):
+    versions = '.'.join(str(version) for version in await aget_versions(models))
+    return ':'.join([prefix, versions, *(str(part) for part in parts)])
+
+
+def get_or_set_locked(key, compute, timeout, lock_timeout=10, poll_interval=0.05):
+    """Return the cached value for ``key``, computing it at most once on a miss.
+
+    Threads of this process are serialized on a striped lock; other processes
+    wait for the one holding the shared-cache lock to store the value. If that
+    takes longer than ``lock_timeout`` seconds, the waiter computes it itself.
+    ``compute`` reads from the primary (see api/replicas.py).
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    with _process_locks[zlib.crc32(key.encode()) % len(_process_locks)]:
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        lock_key = LOCK_KEY.format(key)
+        acquired = cache.add(lock_key, 1, lock_timeout)
+        if not acquired:
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(poll_interval)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+        try:
+            with replicas.primary_reads():
+                value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+        return value
+
+
+async def aget_or_set_locked(key, compute, timeout, lock_timeout=10, poll_interval=0.05):
+    """Async ``get_or_set_locked``; ``compute`` is a coroutine function."""
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    locks = _loop_locks.setdefault(asyncio.get_running_loop(), {})
+    stripe = zlib.crc32(key.encode()) % len(_process_locks)
+    async with locks.setdefault(stripe, asyncio.Lock()):
+        value = await cache.aget(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        lock_key = LOCK_KEY.format(key)
+        acquired = await cache.aadd(lock_key, 1, lock_timeout)
+        if not acquired:
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(poll_interval)
+                value = await cache.aget(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+        try:
+            with replicas.primary_reads():
+                value = await compute()
+            await cache.aset(key, value, timeout)
+        finally:
+            if acquired:
+                await cache.adelete(lock_key)
+        return value
@@ -0,0 +1,236 @@
+"""Streaming bulk import of dealer catalog files (CSV or JSON Lines).
+
+Rows are read lazily and handled in chunks. Each chunk is validated with
+BikeImportSerializer, brands are resolved by name through an in-memory map,
+and bikes are matched on their natural key (brand, model_name, year) with
+one query, then written with bulk_create/bulk_update in one transaction.
+Only the current chunk is held in memory, whatever the size of the file.
+
+Bulk writes skip model signals, so each chunk also does what they would
+have: reindex its bikes for search and their specifications (api/specs.py),
+adjust the bike counter, and on commit
+bump the Bike cache version and queue price-drop notifications for the bikes
+it made cheaper. Worker autocomplete indexes are rebuilt once at the end.
+Image variants and similar bikes are left to their commands.
+"""
+import csv
+import json
+import os
+from collections import namedtuple
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from . import autocomplete, counters, price_alerts, search, specs
+from .cache import bump_version
+from .models import Bike, Brand
+from .serializers import BikeImportSerializer
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+# Columns holding JSON values; CSV cells carry them as JSON text.
+JSON_FIELDS = ('specifications', 'features', 'images')
+# Extra columns added to rows written to the error file.
+LINE_COLUMN, ERRORS_COLUMN = '_line', '_errors'
+# Bike columns an import row can set; the brand is matched separately.
+BIKE_FIELDS = [field for field in BikeImportSerializer.Meta.fields if field != 'brand']
+
+# ``data`` is what gets validated; ``raw`` is echoed to the error file.
+Row = namedtuple('Row', ['line', 'raw', 'data', 'errors'])
+
+
+def detect_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f'Cannot tell the format of {path}; pass it explicitly (csv or jsonl)')
+    return fmt
+
+
+def read_csv(f):
+    reader = csv.DictReader(f)
+    for raw in reader:
+        raw.pop(None, None)  # cells beyond the header
+        # Blank cells mean "not given": defaults on create, left alone on update.
+        data = {key.strip(): value.strip() for key, value in raw.items() if value and value.strip()}
+        errors = {}
+        for field in JSON_FIELDS:
+            if field in data:
+                try:
+                    data[field] = json.loads(data[field])
+                except ValueError:
+                    errors[field] = ['Invalid JSON']
+        yield Row(reader.line_num, raw, data, errors or None)
+
+
+def read_jsonl(f):
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError as exc:
+            yield Row(line, text.rstrip('\n'), None, {'non_field_errors': [f'Invalid JSON: {exc}']})
+            continue
+        if not isinstance(data, dict):
+            yield Row(line, data, None, {'non_field_errors': ['Expected an object']})
+            continue
+        yield Row(line, data, data, None)
+
+
+def read_rows(f, fmt):
+    return read_csv(f) if fmt == 'csv' else read_jsonl(f)
+
+
+class ErrorWriter:
+    """Write rejected rows in the input format, with ``_line`` and ``_errors`` added.
+
+    The output can be fixed up and imported again as is: the extra columns are ignored.
+    """
+
+    def __init__(self, f, fmt):
+        self.f = f
+        self.fmt = fmt
+        self.writer = None
+
+    def write(self, row, errors):
+        if self.fmt == 'csv':
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.f, [*row.raw, LINE_COLUMN, ERRORS_COLUMN], extrasaction='ignore')
+                self.writer.writeheader()
+            self.writer.writerow({**row.raw, LINE_COLUMN: row.line, ERRORS_COLUMN: json.dumps(errors)})
+        else:
+            record = dict(row.raw) if isinstance(row.raw, dict) else {'_raw': row.raw}
+            record[LINE_COLUMN] = row.line
+            record[ERRORS_COLUMN] = errors
+            self.f.write(json.dumps(record, default=str) + '\n')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class CatalogImporter:
+    """Upsert bikes from an iterable of ``Row``.
+
+    ``run`` yields the running totals after every chunk. A natural key seen
+    again later in the file updates the bike the earlier row wrote; within
+    one chunk the last row wins and the others count as ``superseded``.
+    """
+
+    def __init__(self, chunk_size=500, dry_run=False, create_brands=False, on_error=None):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.create_brands = create_brands
+        self.on_error = on_error
+        self.brands = {name.casefold(): pk for pk, name in Brand.objects.values_list('pk', 'name')}
+        self.new_brands = 0
+        # One instance for every row: building a ModelSerializer's fields costs more than validating.
+        self.serializer = BikeImportSerializer()
+        self.stats = {'processed': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'superseded': 0, 'failed': 0}
+
+    def run(self, rows):
+        for chunk in chunked(rows, self.chunk_size):
+            self.import_chunk(chunk)
+            yield self.stats
+        if not self.dry_run and (self.stats['created'] or self.stats['updated']):
+            autocomplete.reset()
+
+    def fail(self, row, errors):
+        self.stats['failed'] += 1
+        if self.on_error is not None:
+            self.on_error(row, errors)
+
+    def resolve_brand(self, name):
+        key = name.casefold()
+        if key not in self.brands and self.create_brands:
+            self.new_brands += 1
+            if self.dry_run:
+                # Never matches a stored bike, so its rows count as creates.
+                self.brands[key] = -self.new_brands
+            else:
+                self.brands[key] = Brand.objects.get_or_create(name=name)[0].pk
+        return self.brands.get(key)
+
+    def validate(self, chunk):
+        """Return ``{natural key: validated fields}`` for the valid rows of ``chunk``."""
+        valid = {}
+        for row in chunk:
+            self.stats['processed'] += 1
+            if row.errors:
+                self.fail(row, row.errors)
+                continue
+            try:
+                data = dict(self.serializer.run_validation(row.data))
+            except ValidationError as exc:
+                self.fail(row, as_serializer_error(exc))
+                continue
+            brand = data.pop('brand')
+            brand_id = self.resolve_brand(brand)
+            if brand_id is None:
+                self.fail(row, {'brand': [f'Unknown brand "{brand}"']})
+                continue
+            key = (brand_id, data['model_name'], data['year'])
+            if key in valid:
+                self.stats['superseded'] += 1
+            valid[key] = data
+        return valid
+
+    def existing(self, keys):
+        """Map natural keys to the stored bikes' values in one query; the oldest bike wins on duplicates."""
+        rows = Bike.objects.filter(
+            brand_id__in={key[0] for key in keys},
+            model_name__in={key[1] for key in keys},
+            year__in={key[2] for key in keys},
+        ).order_by('-pk').values('pk', 'brand_id', *BIKE_FIELDS)
+        stored = {}
+        for row in rows:
+            key = (row['brand_id'], row['model_name'], row['year'])
+            if key in keys:
+                stored[key] = row
+        return stored
+
+    def import_chunk(self, chunk):
+        valid = self.validate(chunk)
+        if not valid:
+            return
+        existing = self.existing(valid.keys())
+        now = timezone.now()
+        creates = []
+        # bulk_update writes the same columns for every bike, so group rows by the columns they change.
+        updates = {}
+        price_drops = []
+        respecced = []
+        for key, data in valid.items():
+            stored = existing.get(key)
+            if stored is None:
+                creates.append(Bike(brand_id=key[0], **data))
+                continue
+            changed = {field: value for field, value in data.items() if stored[field] != value}
+            if not changed:
+                self.stats['unchanged'] += 1
+                continue
+            bike = Bike(pk=stored['pk'], brand_id=key[0], updated_at=now, **changed)
+            if 'price' in changed:
+                price_drops.append((bike.pk, stored['price'], changed['price']))
+            if 'specifications' in changed or 'features' in changed:
+                respecced.append(bike.pk)
+            updates.setdefault(tuple(sorted(changed)), []).append(bike)
+        updated = [bike.pk for bikes in updates.values() for bike in bikes]
+
+        if not self.dry_run:
+            with transaction.atomic():
+                Bike.objects.bulk_create(creates)
+                for fields, bikes in updates.items():
+                    Bike.objects.bulk_update(bikes, [*fields, 'updated_at'])
+                search.index_bikes([bike.pk for bike in creates] + updated)
+                specs.index_bikes([bike.pk for bike in creates] + respecced)
+                counters.adjust('bikes', len(creates))
+                transaction.on_commit(lambda: bump_version(Bike))
+                for drop in price_drops:
+                    transaction.on_commit(lambda drop=drop: price_alerts.schedule(*drop))
+        self.stats['created'] += len(creates)
+        self.stats['updated'] += len(updated)
@@ -0,0 +1,47 @@
+import os
+
+from django.core.checks import Tags, Warning, register
+
+from . import cache, replicas
+
+
+def local_cache_warning(reason):
+    return Warning(
+        f'The default cache is local to each process ({reason}).',
+        hint=(
+            'Set REDIS_URL. Cache versions, read-replica pins and cached users are shared through the '
+            'cache; with a per-process cache, workers keep serving data another worker changed.'
+        ),
+        id='api.W001',
+    )
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    # WEB_CONCURRENCY is the worker count read by gunicorn and uvicorn.
+    workers = int(os.environ.get('WEB_CONCURRENCY') or 1)
+    if workers > 1 and not cache.is_shared():
+        return [local_cache_warning(f'WEB_CONCURRENCY={workers}')]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_deploy(app_configs, **kwargs):
+    if os.environ.get('WEB_CONCURRENCY'):
+        # Already covered by check_shared_cache.
+        return []
+    if not cache.is_shared():
+        return [local_cache_warning('deployments usually run several workers')]
+    return []
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_cache(app_configs, **kwargs):
+    if replicas.replica_aliases() and not cache.is_shared():
+        return [Warning(
+            'Read replicas are configured but the default cache is local to each process, so every read '
+            'goes to the primary.',
+            hint='Set REDIS_URL: read-your-writes pins have to be seen by every worker.',
+            id='api.W002',
+        )]
+    return []
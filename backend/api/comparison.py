@@ -0,0 +1,186 @@
+"""Server-side bike comparison matrix for ``compare_bikes``.
+
+The matrix has one row per attribute that differs between the compared
+bikes: the main Bike columns, every ``specifications`` key and every
+feature that not all of them have. Spec strings such as "8.31 PS @ 7000 rpm"
+or "116 km/h" are reduced to their leading figure, converted to one unit per
+row, and rows with a known "better" direction mark the best bike(s).
+"""
+import hashlib
+import re
+
+from .cache import aversioned_key, versioned_key
+from .models import Bike, Brand
+
+MAX_BIKES = 10
+CACHE_TIMEOUT = 60 * 60
+
+# Unit aliases, mapped to (row unit, factor to convert into it).
+UNITS = {
+    'ps': ('PS', 1.0),
+    'bhp': ('PS', 1.01387),
+    'hp': ('PS', 1.01387),
+    'kw': ('PS', 1.35962),
+    'nm': ('Nm', 1.0),
+    'kgm': ('Nm', 9.80665),
+    'cc': ('cc', 1.0),
+    'kg': ('kg', 1.0),
+    'km/h': ('km/h', 1.0),
+    'kmph': ('km/h', 1.0),
+    'mph': ('km/h', 1.60934),
+    'kwh': ('kWh', 1.0),
+    'km': ('km', 1.0),
+    'hours': ('h', 1.0),
+    'hour': ('h', 1.0),
+    'hrs': ('h', 1.0),
+    'h': ('h', 1.0),
+    'min': ('h', 1 / 60),
+    'mins': ('h', 1 / 60),
+    'minutes': ('h', 1 / 60),
+    'l': ('l', 1.0),
+    'litres': ('l', 1.0),
+    'liters': ('l', 1.0),
+    'mm': ('mm', 1.0),
+}
+HIGHER_IS_BETTER = {'PS', 'Nm', 'km/h', 'kWh', 'km', 'l'}
+LOWER_IS_BETTER = {'kg', 'h'}
+
+# (row key, attribute, unit, better): None for "no best", 'max' or 'min' otherwise.
+BIKE_ROWS = [
+    ('price', 'price', 'INR', 'min'),
+    ('year', 'year', None, 'max'),
+    ('fuel_type', 'fuel_type', None, None),
+    ('condition', 'condition', None, None),
+    ('engine_capacity', 'engine_capacity', 'cc', 'max'),
+    ('mileage', 'mileage', 'km/l', 'max'),
+    ('average_rating', 'rating_average', None, 'max'),
+    ('total_reviews', 'rating_count', None, 'max'),
+]
+
+_QUANTITY_RE = re.compile(r'(-?\d+(?:\.\d+)?)\s*([a-z/]+)?', re.IGNORECASE)
+
+
+def normalize_spec(text):
+    """``(value, unit)`` for the leading figure of a spec string, or ``None`` if it has no known unit."""
+    match = _QUANTITY_RE.search(str(text))
+    if not match or not match.group(2):
+        return None
+    unit = UNITS.get(match.group(2).lower())
+    if unit is None:
+        return None
+    return round(float(match.group(1)) * unit[1], 2), unit[0]
+
+
+def best_indexes(values, better):
+    numbers = [value for value in values if isinstance(value, (int, float))]
+    if not better or len(numbers) < 2:
+        return None
+    target = max(numbers) if better == 'max' else min(numbers)
+    return [index for index, value in enumerate(values) if value == target]
+
+
+def spec_row(key, texts):
+    parsed = [normalize_spec(text) if text is not None else None for text in texts]
+    units = {item[1] for item in parsed if item}
+    if len(units) == 1 and all(item or text is None for item, text in zip(parsed, texts)):
+        unit = units.pop()
+        values = [item[0] if item else None for item in parsed]
+        better = 'max' if unit in HIGHER_IS_BETTER else 'min' if unit in LOWER_IS_BETTER else None
+        return {'key': key, 'unit': unit, 'values': values, 'best': best_indexes(values, better)}
+    return {'key': key, 'unit': None, 'values': list(texts), 'best': None}
+
+
+def display_name(bike):
+    # Catalog model names often already start with the brand ("Honda Activa 6G").
+    if bike.model_name.lower().startswith(bike.brand.name.lower()):
+        return bike.model_name
+    return f'{bike.brand.name} {bike.model_name}'
+
+
+def feature_set(features):
+    # ``features`` is free-form JSON: only its strings are features, as in api/specs.py.
+    return {feature for feature in features if isinstance(feature, str)} if isinstance(features, list) else set()
+
+
+def specifications_of(bike):
+    return bike.specifications if isinstance(bike.specifications, dict) else {}
+
+
+def build_matrix(bikes):
+    """The comparison payload for ``bikes``, in the order given.
+
+    The views pass them ordered by id: one cached matrix serves every order the ids were requested in.
+    """
+    rows = []
+    for key, attribute, unit, better in BIKE_ROWS:
+        values = [getattr(bike, attribute) for bike in bikes]
+        if len(set(values)) > 1:
+            values = [float(value) if key in ('price', 'mileage') else value for value in values]
+            rows.append({'key': key, 'unit': unit, 'values': values, 'best': best_indexes(values, better)})
+
+    spec_keys = sorted({key for bike in bikes for key in specifications_of(bike)})
+    for key in spec_keys:
+        texts = [specifications_of(bike).get(key) for bike in bikes]
+        if len(set(map(str, texts))) > 1:
+            rows.append(spec_row(f'specifications.{key}', texts))
+
+    feature_sets = [feature_set(bike.features) for bike in bikes]
+    for feature in sorted(set().union(*feature_sets) - set.intersection(*feature_sets)):
+        rows.append({
+            'key': f'features.{feature}',
+            'unit': None,
+            'values': [feature in features for features in feature_sets],
+            'best': None,
+        })
+
+    return {
+        'bikes': [
+            {
+                'id': bike.id,
+                'name': display_name(bike),
+                'main_image': bike.main_image.url if bike.main_image else None,
+            }
+            for bike in bikes
+        ],
+        'rows': rows,
+    }
+
+
+def key_parts(stamps):
+    stamps = sorted(stamps)
+    return ','.join(str(stamp[0]) for stamp in stamps), hashlib.md5(repr(stamps).encode()).hexdigest()
+
+
+def cache_key(stamps):
+    """Key for the sorted id tuple, changing whenever a member bike is saved or re-rated, or a brand changes."""
+    # Brands carry the display names.
+    return versioned_key('compare', [Brand], *key_parts(stamps))
+
+
+async def acache_key(stamps):
+    return await aversioned_key('compare', [Brand], *key_parts(stamps))
+
+
+def stamps_queryset(bike_ids):
+    # Rating summaries are written with update(), which leaves updated_at alone.
+    return Bike.objects.filter(id__in=bike_ids).values_list('id', 'updated_at', 'rating_count', 'rating_sum')
+
+
+def bikes_queryset(bike_ids):
+    return Bike.objects.select_related('brand').filter(id__in=bike_ids).order_by('id')
+
+
+def member_stamps(bike_ids):
+    return list(stamps_queryset(bike_ids))
+
+
+def compare(bike_ids):
+    return build_matrix(list(bikes_queryset(bike_ids)))
+
+
+async def amember_stamps(bike_ids):
+    return [stamp async for stamp in stamps_queryset(bike_ids)]
+
+
+async def acompare(bike_ids):
+    return build_matrix([bike async for bike in bikes_queryset(bike_ids)])
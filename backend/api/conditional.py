@@ -0,0 +1,54 @@
+"""Conditional GET support (ETag / Last-Modified / 304) for catalog views.
+
+Validators come from the per-model version counters and change timestamps
+kept in the shared cache (see api/cache.py), so checking them costs no
+database queries and nothing is serialized before a 304 is returned.
+
+With a per-process cache backend a worker that never saw a write would keep
+answering 304 for the changed data, so validators are only sent and checked
+when the cache is shared; the views still answer, just unconditionally.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_last_modified, get_versions, is_shared
+
+
+class ConditionalGetMixin:
+    # Every model whose rows appear in the response.
+    validator_models = ()
+
+    def get_validators(self, request):
+        """Return ``(etag, last_modified)``, computed once per request."""
+        if getattr(self, '_validators', None) is None:
+            self._validators = self.compute_validators(request)
+        return self._validators
+
+    def compute_validators(self, request):
+        versions = get_versions(self.validator_models)
+        # Absolute media/pagination URLs depend on the host, the body on the renderer.
+        parts = [
+            type(self).__name__,
+            f'{request.scheme}://{request.get_host()}',
+            request.accepted_renderer.format,
+            request.path,
+            '&'.join(sorted(f'{key}={value}' for key, values in request.query_params.lists() for value in values)),
+            *map(str, versions),
+        ]
+        etag = 'W/"{}"'.format(hashlib.md5('|'.join(parts).encode()).hexdigest())
+        return etag, get_last_modified(self.validator_models)
+
+    def get(self, request, *args, **kwargs):
+        if not is_shared():
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,102 @@
+"""Maintained counts served instead of COUNT(*) queries.
+
+Counters are adjusted from model signals (see api/signals.py). A counter row
+that does not exist yet is initialized from its source query on first read,
+and ``rebuild_counters`` resets every counter after bulk changes.
+
+Each user's unread notification count is a counter too (``unread_key``),
+also cached for ``UNREAD_CACHE_TIMEOUT`` seconds; every adjustment drops the
+cached value on commit. A negative counter is recounted on read; missing
+ones are created as ``UNCOUNTED``, so an adjustment is never lost to a row
+that does not exist yet. Writers adjust in the same transaction as their
+notification change (adding notifications: counter first), and a recount
+is only stored if the counter still holds the value read before counting:
+an adjustment made meanwhile leaves it for the next read to recount.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Bike, Notification, Review, Showroom, StatCounter
+
+SOURCES = {
+    'bikes': lambda: Bike.objects.count(),
+    'active_showrooms': lambda: Showroom.objects.filter(is_active=True).count(),
+    'reviews': lambda: Review.objects.count(),
+}
+
+
+def adjust(key, delta):
+    if delta:
+        StatCounter.objects.filter(key=key).update(value=F('value') + delta)
+
+
+def get_counts(keys):
+    """Return ``{key: value}`` for ``keys`` in one query once the counters exist."""
+    values = dict(StatCounter.objects.filter(key__in=keys).values_list('key', 'value'))
+    for key in keys:
+        if key not in values:
+            counter, _ = StatCounter.objects.get_or_create(key=key, defaults={'value': SOURCES[key]()})
+            values[key] = counter.value
+    return values
+
+
+def rebuild_counters():
+    for key, source in SOURCES.items():
+        StatCounter.objects.update_or_create(key=key, defaults={'value': source()})
+    # Unread counters are recounted lazily, on each user's next read.
+    StatCounter.objects.filter(key__startswith=UNREAD_PREFIX).delete()
+    return len(SOURCES)
+
+
+UNREAD_PREFIX = 'unread_notifications:'
+# Value of an unread counter nobody has counted yet; adjustments keep it negative.
+UNCOUNTED = -(2 ** 62)
+UNREAD_CACHE_KEY = 'counter:{}'
+UNREAD_CACHE_TIMEOUT = 60 * 5
+
+
+def unread_key(user_id):
+    return f'{UNREAD_PREFIX}{user_id}'
+
+
+def forget_unread(user_ids):
+    keys = [UNREAD_CACHE_KEY.format(unread_key(user_id)) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def unread_notifications(user_id):
+    # ``is_read=False`` compiles to ``NOT is_read``, which SQLite cannot match against the
+    # (user, is_read, created_at) index; an IN list is an equality it can.
+    return Notification.objects.filter(user_id=user_id, is_read__in=[False])
+
+
+def get_unread_count(user_id):
+    key = unread_key(user_id)
+    value = cache.get(UNREAD_CACHE_KEY.format(key))
+    if value is not None:
+        return value
+    value = StatCounter.objects.filter(key=key).values_list('value', flat=True).first()
+    if value is None:
+        StatCounter.objects.bulk_create([StatCounter(key=key, value=UNCOUNTED)], ignore_conflicts=True)
+        value = UNCOUNTED
+    if value < 0:
+        seen, value = value, unread_notifications(user_id).count()
+        if not StatCounter.objects.filter(key=key, value=seen).update(value=value):
+            return value
+    cache.set(UNREAD_CACHE_KEY.format(key), value, UNREAD_CACHE_TIMEOUT)
+    return value
+
+
+def adjust_unread(user_ids, delta):
+    """Add ``delta`` to the unread counters of ``user_ids``, in the transaction that changes the notifications."""
+    keys = [unread_key(user_id) for user_id in user_ids]
+    if not delta or not keys:
+        return
+    counters = StatCounter.objects.filter(key__in=keys)
+    # A single existing row takes one UPDATE. Otherwise missing rows are created first: after a
+    # partial UPDATE, the rows it missed could not be told from ones created by others meanwhile.
+    if len(keys) > 1 or not counters.update(value=F('value') + delta):
+        StatCounter.objects.bulk_create([StatCounter(key=key, value=UNCOUNTED) for key in keys], ignore_conflicts=True)
+        counters.update(value=F('value') + delta)
+    forget_unread(user_ids)
@@ -0,0 +1,81 @@
+"""Streaming CSV and NDJSON exports of list endpoints.
+
+An export view is a list view with ``ExportMixin`` in front of it. It keeps
+that view's queryset, permissions and filter backends, so every filter the
+list accepts narrows the export too. Pagination and serializers are replaced
+by a ``values_list`` iterator written straight into a StreamingHttpResponse,
+so memory stays flat however many rows match.
+
+The format is negotiated like any DRF renderer: ``?format=csv`` (the
+default) or ``?format=ndjson``, or the matching Accept header.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+# Rows fetched from the database cursor, and written to the response, at a time.
+CHUNK_SIZE = 2000
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Exports stream their own rows; only error responses are rendered here.
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class NDJSONRenderer(CSVRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def csv_stream(columns, rows, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    while True:
+        writer.writerows(islice(rows, chunk_size))
+        if not buffer.tell():
+            return
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def ndjson_stream(columns, rows, chunk_size=CHUNK_SIZE):
+    encode = DjangoJSONEncoder().encode
+    while chunk := list(islice(rows, chunk_size)):
+        yield ''.join(encode(dict(zip(columns, row))) + '\n' for row in chunk)
+
+
+STREAMS = {'csv': csv_stream, 'ndjson': ndjson_stream}
+
+
+class ExportMixin:
+    """Stream the filtered queryset of the list view this is mixed into.
+
+    ``export_fields`` maps output columns to ``values_list`` lookups.
+    """
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    http_method_names = ['get', 'head', 'options']
+    export_name = None
+    export_fields = {}
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*self.export_fields.values()).iterator(chunk_size=CHUNK_SIZE)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            STREAMS[renderer.format](list(self.export_fields), rows),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{renderer.format}"'
+        return response
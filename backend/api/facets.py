@@ -0,0 +1,154 @@
+"""Facet counts for the bike listing's filter sidebar.
+
+A facet is counted over the bikes matching every BikeListView filter except
+its own, so the sidebar shows what choosing another value would give.
+Facets whose own filter is not set share a filter set and are counted
+together: the categorical ones in one GROUP BY over their columns (its rows
+are bounded by the distinct combinations, not the number of bikes), the
+price and engine-capacity buckets in one aggregate of conditional counts.
+A facet whose filter is set gets its own query.
+
+Results are cached per normalized filter set under the Bike and Brand
+versions, so a committed catalog change makes every entry unreachable.
+"""
+import hashlib
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.db.models import Count, Q
+
+from . import specs
+from .models import Bike, Brand
+
+# BikeListView's query params that narrow the bikes, with the ``spec.`` ones (see api/specs.py);
+# the others (page, ordering, ...) don't change the counts.
+FILTER_PARAMS = [
+    'brand', 'fuel_type', 'condition', 'year', 'is_featured', 'is_trending',
+    'search', 'min_price', 'max_price', 'min_cc', 'max_cc',
+]
+
+# Facet -> the query params that filter on it, which its own counts ignore.
+CATEGORICAL_FACETS = {
+    'brand': ['brand'],
+    'fuel_type': ['fuel_type'],
+    'condition': ['condition'],
+    'year': ['year'],
+}
+# Facet -> (column, params, bucket boundaries). Buckets run from one boundary up to,
+# not including, the next; the first and last are open-ended.
+BUCKETED_FACETS = {
+    'price': ('price', ['min_price', 'max_price'], [50000, 100000, 150000, 200000, 300000]),
+    'engine_capacity': ('engine_capacity', ['min_cc', 'max_cc'], [110, 150, 250, 400]),
+}
+FACETS = [*CATEGORICAL_FACETS, *BUCKETED_FACETS]
+
+CHOICE_LABELS = {
+    'fuel_type': dict(Bike.FUEL_CHOICES),
+    'condition': dict(Bike.CONDITION_CHOICES),
+}
+
+
+def facet_params(facet):
+    if facet in CATEGORICAL_FACETS:
+        return CATEGORICAL_FACETS[facet]
+    return BUCKETED_FACETS[facet][1]
+
+
+def normalize(query_params):
+    """The filter params of a query string as sorted ``(param, value)`` pairs, blanks and other params dropped."""
+    return tuple(sorted(
+        (param, value.strip())
+        for param, values in query_params.lists()
+        if param in FILTER_PARAMS or param.startswith(specs.PARAM_PREFIX)
+        for value in values
+        if value.strip()
+    ))
+
+
+def cache_digest(params):
+    return hashlib.md5(urlencode(params).encode()).hexdigest()
+
+
+def buckets(boundaries):
+    lows = [None, *boundaries]
+    highs = [*boundaries, None]
+    return list(zip(lows, highs))
+
+
+def bucket_filter(column, low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(**{f'{column}__gte': low})
+    if high is not None:
+        condition &= Q(**{f'{column}__lt': high})
+    return condition
+
+
+def count_values(bikes, facets):
+    """``{facet: Counter(value -> bikes)}`` for categorical ``facets`` from one GROUP BY."""
+    counts = {facet: Counter() for facet in facets}
+    for row in bikes.values(*facets).annotate(count=Count('id')).order_by():
+        for facet in facets:
+            counts[facet][row[facet]] += row['count']
+    return counts
+
+
+def count_buckets(bikes, facets):
+    """``{facet: [bikes per bucket]}`` for bucketed ``facets`` from one aggregate."""
+    aggregates = {}
+    for facet in facets:
+        column, _, boundaries = BUCKETED_FACETS[facet]
+        for index, (low, high) in enumerate(buckets(boundaries)):
+            aggregates[f'{facet}_{index}'] = Count('id', filter=bucket_filter(column, low, high))
+    totals = bikes.aggregate(**aggregates)
+    return {
+        facet: [totals[f'{facet}_{index}'] for index in range(len(BUCKETED_FACETS[facet][2]) + 1)]
+        for facet in facets
+    }
+
+
+def facet_counts(filtered, params):
+    """Count every facet for the normalized filter ``params``.
+
+    ``filtered(params)`` returns the bikes BikeListView would list for those params.
+    """
+    # Facets whose own params are not in ``params`` all end up with the same filter set.
+    groups = {}
+    for facet in FACETS:
+        owned = facet_params(facet)
+        rest = tuple(item for item in params if item[0] not in owned)
+        groups.setdefault(rest, []).append(facet)
+
+    counts = {}
+    for rest, facets in groups.items():
+        bikes = filtered(rest).order_by()
+        categorical = [facet for facet in facets if facet in CATEGORICAL_FACETS]
+        bucketed = [facet for facet in facets if facet in BUCKETED_FACETS]
+        if categorical:
+            counts.update(count_values(bikes, categorical))
+        if bucketed:
+            counts.update(count_buckets(bikes, bucketed))
+
+    brand_names = dict(Brand.objects.filter(pk__in=list(counts['brand'])).values_list('pk', 'name'))
+    result = {
+        'brand': sorted(
+            (
+                {'value': brand_id, 'label': brand_names[brand_id], 'count': count}
+                for brand_id, count in counts['brand'].items() if brand_id in brand_names
+            ),
+            key=lambda item: item['label'],
+        ),
+        'year': [
+            {'value': year, 'count': count} for year, count in sorted(counts['year'].items(), reverse=True)
+        ],
+    }
+    for facet, labels in CHOICE_LABELS.items():
+        result[facet] = [
+            {'value': value, 'label': label, 'count': counts[facet][value]} for value, label in labels.items()
+        ]
+    for facet, (_, _, boundaries) in BUCKETED_FACETS.items():
+        result[facet] = [
+            {'min': low, 'max': high, 'count': count}
+            for (low, high), count in zip(buckets(boundaries), counts[facet])
+        ]
+    return {facet: result[facet] for facet in FACETS}
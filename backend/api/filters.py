@@ -0,0 +1,37 @@
+import django_filters
+from rest_framework import filters
+
+from . import search, specs
+from .models import Notification
+
+
+class BikeSearchFilter(filters.SearchFilter):
+    """SearchFilter answered from the bike full-text index when the database has one."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        filtered = search.filter_bikes(queryset, query)
+        if filtered is None:
+            return super().filter_queryset(request, queryset, view)
+        return filtered
+
+
+class BikeSpecFilter(filters.BaseFilterBackend):
+    """``spec.<key>`` and ``spec.<key>__<lookup>`` params, answered from the bike spec index."""
+
+    def filter_queryset(self, request, queryset, view):
+        return specs.filter_bikes(queryset, request.query_params)
+
+
+class NotificationFilter(django_filters.FilterSet):
+    is_read = django_filters.BooleanFilter(method='filter_is_read')
+
+    class Meta:
+        model = Notification
+        fields = ['is_read']
+
+    def filter_is_read(self, queryset, name, value):
+        # An IN list rather than ``NOT is_read``, so SQLite can use the unread index (see unread_notifications).
+        return queryset.filter(is_read__in=[value])
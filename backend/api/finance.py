@@ -0,0 +1,131 @@
+"""Vectorized EMI quotes and amortization schedules.
+
+Amounts are handled as integer paise once the EMI is known. The EMI and each
+month's interest are rounded to the paisa (half to even, like ``round()`` in
+the single-quote calculator) and the last instalment absorbs the rounding
+residue, so a schedule always ends at a zero balance and the grid's
+``total_amount`` is exactly the sum of the schedule's payments.
+"""
+import json
+
+import numpy as np
+
+SCHEDULE_CHUNK_ROWS = 120
+
+
+def monthly_emi(loan, annual_rate, tenure):
+    """EMI for arrays of loan amounts, annual rates in percent and tenures in months."""
+    loan = np.asarray(loan, dtype=np.float64)
+    rate = np.asarray(annual_rate, dtype=np.float64) / 100 / 12
+    tenure = np.asarray(tenure, dtype=np.float64)
+    growth = np.power(1 + rate, tenure)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi = np.where(rate == 0, loan / tenure, loan * rate * growth / (growth - 1))
+    return emi
+
+
+def to_paise(amounts):
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def quote_grid(principals, down_payments, rates, tenures):
+    """Every combination of the inputs as a dict of flat arrays (amounts in paise).
+
+    Combinations whose down payment is not below the principal are left out.
+    """
+    principal, down, rate, tenure = (
+        axis.ravel() for axis in np.meshgrid(
+            to_paise(principals), to_paise(down_payments),
+            np.asarray(rates, dtype=np.float64), np.asarray(tenures, dtype=np.int64),
+            indexing='ij',
+        )
+    )
+    valid = down < principal
+    principal, down, rate, tenure = principal[valid], down[valid], rate[valid], tenure[valid]
+    loan = principal - down
+    emi = np.rint(monthly_emi(loan, rate, tenure)).astype(np.int64)
+    total = total_paid(loan, rate, tenure, emi)
+    return {
+        'principal_amount': principal,
+        'down_payment': down,
+        'loan_amount': loan,
+        'interest_rate': rate,
+        'tenure_months': tenure,
+        'emi': emi,
+        'total_amount': total,
+        'total_interest': total - loan,
+    }
+
+
+def total_paid(loan, annual_rate, tenure, emi):
+    """Sum of the payments of every schedule, stepping all quotes a month at a time."""
+    rate = annual_rate / 100 / 12
+    balance = loan.copy()
+    paid = np.zeros_like(loan)
+    for month in range(1, int(tenure.max(initial=0)) + 1):
+        active = tenure >= month
+        interest = np.rint(balance * rate).astype(np.int64)
+        payment = np.where(tenure == month, balance + interest, emi)
+        balance = np.where(active, balance - (payment - interest), balance)
+        paid += np.where(active, payment, 0)
+    return paid
+
+
+MONEY_FIELDS = ['principal_amount', 'down_payment', 'loan_amount', 'emi', 'total_amount', 'total_interest']
+
+
+def quotes(grid):
+    """Yield the quotes of ``grid`` as JSON-ready dicts."""
+    columns = {
+        field: (values / 100 if field in MONEY_FIELDS else values).tolist()
+        for field, values in grid.items()
+    }
+    for row in zip(*columns.values()):
+        yield dict(zip(columns, row))
+
+
+def schedule(loan, annual_rate, tenure, emi):
+    """Yield the month-by-month amortization of one quote (amounts in paise in, rupees out)."""
+    rate = annual_rate / 100 / 12
+    balance = int(loan)
+    for month in range(1, int(tenure) + 1):
+        interest = int(round(balance * rate))
+        payment = int(emi)
+        if month == tenure:
+            payment = balance + interest
+        principal = payment - interest
+        balance -= principal
+        yield {
+            'month': month,
+            'payment': payment / 100,
+            'principal': principal / 100,
+            'interest': interest / 100,
+            'balance': balance / 100,
+        }
+
+
+def stream_quotes_json(grid, include_schedules=False):
+    """Yield the ``{"count": ..., "quotes": [...]}`` document in chunks.
+
+    Schedules are generated while writing, one quote at a time, so memory use
+    does not grow with the number of months.
+    """
+    yield '{"count": %d, "quotes": [' % len(grid['emi'])
+    for index, quote in enumerate(quotes(grid)):
+        body = json.dumps(quote)
+        if not include_schedules:
+            yield (',' if index else '') + body
+            continue
+        yield (',' if index else '') + body[:-1] + ', "schedule": ['
+        rows = schedule(grid['loan_amount'][index], grid['interest_rate'][index],
+                        grid['tenure_months'][index], grid['emi'][index])
+        buffer = []
+        separator = ''
+        for row in rows:
+            buffer.append(json.dumps(row))
+            if len(buffer) >= SCHEDULE_CHUNK_ROWS:
+                yield separator + ','.join(buffer)
+                buffer = []
+                separator = ','
+        yield (separator if buffer else '') + ','.join(buffer) + ']}'
+    yield ']}'
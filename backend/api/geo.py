@@ -0,0 +1,230 @@
+"""Nearest-showroom lookups from an in-process grid index.
+
+Active showrooms with coordinates are bucketed into ``CELL_DEGREES`` square
+cells. A radius query only looks at the cells overlapping its bounding box; a
+k-nearest query scans rings of cells outwards from the query cell and stops
+once the k-th best distance is closer than anything outside the scanned
+rings. Distances are haversine, computed with NumPy per batch of candidates.
+
+The index is rebuilt when the Showroom cache version changes (every
+committed save/delete bumps it, see api/signals.py).
+"""
+import math
+import threading
+
+import numpy as np
+
+from .cache import get_versions
+from .models import Showroom
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+CELL_DEGREES = 0.1
+MAX_RADIUS_RESULTS = 500
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Distances in km from one point to arrays of points, all in radians."""
+    dlat = lats - lat
+    dlng = lngs - lng
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def cell_of(lat, lng):
+    return int(math.floor(lat / CELL_DEGREES)), int(math.floor(lng / CELL_DEGREES))
+
+
+class ShowroomIndex:
+    def __init__(self, ids, lats, lngs, version=None):
+        self.version = version
+        ids = np.asarray(ids, dtype=np.int64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        cell_i = np.floor(lats / CELL_DEGREES).astype(np.int64)
+        cell_j = np.floor(lngs / CELL_DEGREES).astype(np.int64)
+        order = np.lexsort((cell_j, cell_i))
+        self.ids = ids[order]
+        self.lats = np.radians(lats[order])
+        self.lngs = np.radians(lngs[order])
+        self.cells = {}
+        if len(order):
+            cell_i, cell_j = cell_i[order], cell_j[order]
+            boundaries = np.flatnonzero((np.diff(cell_i) != 0) | (np.diff(cell_j) != 0)) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(order)]))
+            for start, end in zip(starts, ends):
+                self.cells[(int(cell_i[start]), int(cell_j[start]))] = (start, end)
+            # (lowest i, highest i, lowest j, highest j) of the occupied cells.
+            self.cell_range = (int(cell_i.min()), int(cell_i.max()), int(cell_j.min()), int(cell_j.max()))
+        else:
+            self.cell_range = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, version=None):
+        rows = list(
+            Showroom.objects.filter(is_active=True, latitude__isnull=False, longitude__isnull=False)
+            .order_by().values_list('id', 'latitude', 'longitude')
+        )
+        return cls(
+            [row[0] for row in rows],
+            [float(row[1]) for row in rows],
+            [float(row[2]) for row in rows],
+            version,
+        )
+
+    def mask(self, ids):
+        """Which positions of the index hold one of ``ids``, for the ``allowed`` argument of the lookups."""
+        return np.isin(self.ids, np.fromiter(ids, dtype=np.int64))
+
+    def _gather(self, cells, allowed=None):
+        slices = [self.cells[cell] for cell in cells if cell in self.cells]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        positions = np.concatenate([np.arange(start, end) for start, end in slices])
+        return positions if allowed is None else positions[allowed[positions]]
+
+    def _everything(self, allowed=None):
+        return np.arange(len(self.ids)) if allowed is None else np.flatnonzero(allowed)
+
+    def _distances(self, positions, lat, lng):
+        return haversine_km(math.radians(lat), math.radians(lng), self.lats[positions], self.lngs[positions])
+
+    def within(self, lat, lng, radius_km, limit=MAX_RADIUS_RESULTS, allowed=None):
+        """``(id, distance_km)`` pairs within ``radius_km``, nearest first, at most ``limit``.
+
+        ``allowed`` (see ``mask``) restricts this and ``nearest`` to some of the showrooms.
+        """
+        if not len(self.ids):
+            return []
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6))
+        lo_i, lo_j = cell_of(lat - dlat, lng - dlng)
+        hi_i, hi_j = cell_of(lat + dlat, lng + dlng)
+        # Only the part of the bounding box that holds showrooms.
+        range_lo_i, range_hi_i, range_lo_j, range_hi_j = self.cell_range
+        lo_i, hi_i = max(lo_i, range_lo_i), min(hi_i, range_hi_i)
+        lo_j, hi_j = max(lo_j, range_lo_j), min(hi_j, range_hi_j)
+        if lo_i > hi_i or lo_j > hi_j:
+            return []
+        if (hi_i - lo_i + 1) * (hi_j - lo_j + 1) > len(self.cells):
+            positions = self._everything(allowed)
+        else:
+            positions = self._gather([(i, j) for i in range(lo_i, hi_i + 1) for j in range(lo_j, hi_j + 1)], allowed)
+        distances = self._distances(positions, lat, lng)
+        keep = distances <= radius_km
+        return self._nearest_first(positions[keep], distances[keep], limit)
+
+    def nearest(self, lat, lng, k, allowed=None):
+        """The ``k`` nearest ``(id, distance_km)`` pairs, nearest first."""
+        total = len(self.ids) if allowed is None else int(allowed.sum())
+        if not total or k <= 0:
+            return []
+        ci, cj = cell_of(lat, lng)
+        lo_i, hi_i, lo_j, hi_j = self.cell_range
+        # Rings short of the occupied cells are empty; the last one reaches the farthest of them.
+        first = max(lo_i - ci, ci - hi_i, lo_j - cj, cj - hi_j, 0)
+        last = max(ci - lo_i, hi_i - ci, cj - lo_j, hi_j - cj, 0)
+        positions = []
+        distances = []
+        found = 0
+        for ring in range(first, last + 1):
+            ring_cells = self._ring_cells(ci, cj, ring)
+            if len(ring_cells) > len(self.cells):
+                # Fewer lookups to measure every showroom than to visit this ring.
+                everything = self._everything(allowed)
+                return self._nearest_first(everything, self._distances(everything, lat, lng), k)
+            ring_positions = self._gather(ring_cells, allowed)
+            if len(ring_positions):
+                positions.append(ring_positions)
+                distances.append(self._distances(ring_positions, lat, lng))
+                found += len(ring_positions)
+            if found == total:
+                break
+            if found >= k:
+                # Anything outside the scanned square is at least this far away.
+                covered = self._covered_km(lat, lng, ci, cj, ring)
+                kth = np.partition(np.concatenate(distances), k - 1)[k - 1]
+                if kth <= covered:
+                    break
+        if not positions:
+            return []
+        return self._nearest_first(np.concatenate(positions), np.concatenate(distances), k)
+
+    def _ring_cells(self, ci, cj, ring):
+        """The occupied-range cells on the perimeter of the square ``ring`` cells out from ``(ci, cj)``."""
+        if ring == 0:
+            return [(ci, cj)]
+        lo_i, hi_i, lo_j, hi_j = self.cell_range
+        cells = []
+        columns = range(max(cj - ring, lo_j), min(cj + ring, hi_j) + 1)
+        for i in (ci - ring, ci + ring):
+            if lo_i <= i <= hi_i:
+                cells += [(i, j) for j in columns]
+        rows = range(max(ci - ring + 1, lo_i), min(ci + ring - 1, hi_i) + 1)
+        for j in (cj - ring, cj + ring):
+            if lo_j <= j <= hi_j:
+                cells += [(i, j) for i in rows]
+        return cells
+
+    @staticmethod
+    def _covered_km(lat, lng, ci, cj, ring):
+        lat_lo = (ci - ring) * CELL_DEGREES
+        lat_hi = (ci + ring + 1) * CELL_DEGREES
+        lng_lo = (cj - ring) * CELL_DEGREES
+        lng_hi = (cj + ring + 1) * CELL_DEGREES
+        lat_edge = min(lat - lat_lo, lat_hi - lat) * KM_PER_DEGREE
+        widest = min(max(abs(lat_lo), abs(lat_hi)), 90.0)
+        lng_edge = min(lng - lng_lo, lng_hi - lng) * KM_PER_DEGREE * math.cos(math.radians(widest))
+        return min(lat_edge, lng_edge)
+
+    def _nearest_first(self, positions, distances, limit):
+        if limit is not None and len(distances) > limit:
+            top = np.argpartition(distances, limit - 1)[:limit]
+            positions, distances = positions[top], distances[top]
+        order = np.argsort(distances, kind='stable')
+        return [(int(self.ids[p]), float(d)) for p, d in zip(positions[order], distances[order])]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """Return this worker's showroom index, rebuilding it if showrooms changed."""
+    global _index
+    version = get_versions([Showroom])[0]
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = ShowroomIndex.build(version)
+        return _index
+
+
+def nearest_showrooms(queryset, lat, lng, radius_km=None, k=None):
+    """Showrooms of ``queryset`` ordered by distance, each with a ``distance_km`` attribute.
+
+    ``queryset`` applies the remaining filters (brands, city, ...): its ids
+    are read once and intersected with the index, and only the showrooms
+    found are fetched. Radius queries without ``k`` return at most
+    ``MAX_RADIUS_RESULTS``.
+    """
+    index = get_index()
+    allowed = index.mask(queryset.values_list('pk', flat=True))
+    if radius_km is not None:
+        candidates = index.within(lat, lng, radius_km, limit=k or MAX_RADIUS_RESULTS, allowed=allowed)
+    else:
+        candidates = index.nearest(lat, lng, k, allowed=allowed)
+    by_id = {showroom.pk: showroom for showroom in queryset.filter(pk__in=[pk for pk, _ in candidates])}
+    results = []
+    for pk, distance in candidates:
+        if pk in by_id:
+            showroom = by_id[pk]
+            showroom.distance_km = round(distance, 3)
+            results.append(showroom)
+    return results
@@ -0,0 +1,176 @@
+"""Resized image variants, generated outside the request cycle.
+
+Each image field listed in ``IMAGE_FIELDS`` has a JSON sibling holding the
+storage names of its variants: ``thumb`` and ``card`` in the original family
+(JPEG, or PNG when the image has transparency) plus a WebP copy of each.
+
+Saving a new image schedules generation on commit and deletes the variants
+of the image it replaced. A small thread pool in the web process reads the
+upload and stores the results; the resizing runs in a process pool, so it
+neither blocks the request nor holds the GIL of the serving process.
+``render_variants`` works on bytes only, so the workers need neither Django
+nor access to the storage backend.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+from .cache import bump_version
+
+logger = logging.getLogger(__name__)
+
+# (width, height, crop): thumbnails are square crops for grids, cards keep their aspect ratio.
+SIZES = {
+    'thumb': (200, 200, True),
+    'card': (640, 480, False),
+}
+IMAGE_FIELDS = {
+    'api.brand': [('logo', 'logo_variants')],
+    'api.bike': [('main_image', 'main_image_variants')],
+    'api.showroom': [('image', 'image_variants')],
+    'api.usedbikelisting': [('main_image', 'main_image_variants')],
+}
+
+
+def render_variants(data):
+    """Return ``{variant: (extension, bytes)}`` for the image in ``data``. Runs in a worker process."""
+    with Image.open(io.BytesIO(data)) as source:
+        source = ImageOps.exif_transpose(source)
+        has_alpha = source.mode in ('RGBA', 'LA', 'PA') or 'transparency' in source.info
+        source = source.convert('RGBA' if has_alpha else 'RGB')
+        variants = {}
+        for name, (width, height, crop) in SIZES.items():
+            if crop:
+                image = ImageOps.fit(source, (width, height), Image.LANCZOS)
+            else:
+                image = source.copy()
+                image.thumbnail((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            if has_alpha:
+                image.save(buffer, 'PNG', optimize=True)
+                variants[name] = ('png', buffer.getvalue())
+            else:
+                image.save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+                variants[name] = ('jpg', buffer.getvalue())
+            buffer = io.BytesIO()
+            image.save(buffer, 'WEBP', quality=80, method=4)
+            variants[f'{name}_webp'] = ('webp', buffer.getvalue())
+    return variants
+
+
+def variant_name(source_name, size, extension):
+    stem, _ = os.path.splitext(source_name)
+    return f'variants/{stem}.{size}.{extension}'
+
+
+def is_remote(name):
+    # Some catalog rows (e.g. the sample data) point at external URLs rather than uploads.
+    return name.startswith(('http://', 'https://'))
+
+
+def read_source(image_name):
+    with default_storage.open(image_name, 'rb') as f:
+        return f.read()
+
+
+def store_variants(source_name, rendered):
+    """Save rendered variants next to each other under ``variants/`` and return their storage names."""
+    names = {}
+    for variant, (extension, content) in rendered.items():
+        size = variant[:-len('_webp')] if variant.endswith('_webp') else variant
+        name = variant_name(source_name, size, extension)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        names[variant] = default_storage.save(name, ContentFile(content))
+    return names
+
+
+def save_variants(model, pk, image_field, variants_field, source_name, names):
+    """Record ``names`` unless the image was replaced meanwhile. Returns whether the row was updated."""
+    updated = model.objects.filter(pk=pk, **{image_field: source_name}).update(**{variants_field: names})
+    if updated:
+        bump_version(model)
+    return bool(updated)
+
+
+def delete_variants(names):
+    """Delete stored variants that no row refers to any more (their image was replaced or cleared)."""
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.exception('Could not delete image variant %s', name)
+
+
+_process_pool = None
+_dispatcher = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            # Spawned, not forked: the web process is multi-threaded by the time this runs.
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_VARIANTS['WORKERS'], mp_context=multiprocessing.get_context('spawn')
+            )
+        return _process_pool
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _pool_lock:
+        if _dispatcher is None:
+            _dispatcher = ThreadPoolExecutor(max_workers=settings.IMAGE_VARIANTS['WORKERS'])
+        return _dispatcher
+
+
+def generate(label, pk, image_field, variants_field, source_name):
+    """Render and store the variants of one image. Runs on a dispatcher thread."""
+    model = apps.get_model(label)
+    try:
+        rendered = get_process_pool().submit(render_variants, read_source(source_name)).result()
+        names = store_variants(source_name, rendered)
+        if not save_variants(model, pk, image_field, variants_field, source_name, names):
+            delete_variants(names.values())
+    except Exception:
+        logger.exception('Could not generate variants of %s for %s %s', source_name, label, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule(instance, image_field, variants_field):
+    """Queue variant generation for ``instance``'s current image."""
+    if not settings.IMAGE_VARIANTS['ENABLED']:
+        return
+    source_name = getattr(instance, image_field).name
+    if is_remote(source_name):
+        return
+    get_dispatcher().submit(
+        generate, instance._meta.label_lower, instance.pk, image_field, variants_field, source_name
+    )
+
+
+def variant_urls(names, request=None):
+    """The ``srcset``-style map a serializer exposes for a variants field, or ``None`` before generation."""
+    if not names:
+        return None
+    urls = {variant: default_storage.url(name) for variant, name in names.items()}
+    if request is not None:
+        urls = {variant: request.build_absolute_uri(url) for variant, url in urls.items()}
+    urls['srcset'] = ', '.join(f"{urls[name]} {SIZES[name][0]}w" for name in SIZES if name in urls)
+    urls['webp_srcset'] = ', '.join(
+        f"{urls[name + '_webp']} {SIZES[name][0]}w" for name in SIZES if name + '_webp' in urls
+    )
+    return urls
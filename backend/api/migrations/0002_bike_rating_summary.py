@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:24
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    Bike = apps.get_model('api', 'Bike')
+    Review = apps.get_model('api', 'Review')
+    aggregates = {'count': Count('id'), 'total': Sum('rating')}
+    for star in range(1, 6):
+        aggregates[f'star_{star}'] = Count('id', filter=Q(rating=star))
+    for row in Review.objects.order_by().values('bike').annotate(**aggregates):
+        Bike.objects.filter(pk=row['bike']).update(
+            rating_count=row['count'],
+            rating_sum=row['total'],
+            rating_average=row['total'] / row['count'],
+            rating_histogram={str(star): row[f'star_{star}'] for star in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bike',
+            name='rating_average',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bike',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bike',
+            name='rating_histogram',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bike',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
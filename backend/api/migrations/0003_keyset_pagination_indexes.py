@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_bike_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['created_at', 'id'], name='bike_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='notif_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['created_at', 'id'], name='review_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['bike', 'created_at', 'id'], name='review_bike_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usedbikelisting',
+            index=models.Index(fields=['is_approved', 'created_at', 'id'], name='used_approved_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "CREATE VIRTUAL TABLE api_bike_search USING fts5("
+                "name, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            cursor.execute(
+                "INSERT INTO api_bike_search (rowid, name, description) "
+                "SELECT b.id, br.name || ' ' || b.model_name, b.description "
+                "FROM api_bike b JOIN api_brand br ON br.id = b.brand_id"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                "CREATE TABLE api_bike_search ("
+                "bike_id bigint PRIMARY KEY REFERENCES api_bike (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "name text NOT NULL, document tsvector NOT NULL)"
+            )
+            cursor.execute("CREATE INDEX api_bike_search_document ON api_bike_search USING gin (document)")
+            cursor.execute("CREATE INDEX api_bike_search_name_trgm ON api_bike_search USING gin (name gin_trgm_ops)")
+            cursor.execute(
+                "INSERT INTO api_bike_search (bike_id, name, document) "
+                "SELECT b.id, br.name || ' ' || b.model_name, "
+                "setweight(to_tsvector('simple', br.name || ' ' || b.model_name), 'A') || "
+                "setweight(to_tsvector('simple', b.description), 'B') "
+                "FROM api_bike b JOIN api_brand br ON br.id = b.brand_id"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS api_bike_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_stat_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarBike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('bike', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='api.bike')),
+                ('similar_bike', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='api.bike')),
+            ],
+            options={
+                'ordering': ['bike', 'rank'],
+                'unique_together': {('bike', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_similar_bike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bike',
+            name='main_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='brand',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='showroom',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='usedbikelisting',
+            name='main_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['brand', 'model_name', 'year'], name='bike_brand_model_year_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_bike_natural_key_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['related_bike', 'user', 'created_at'], name='notif_bike_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_notification_bike_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:18
+
+import datetime
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_notification_unread_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestRideSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('reserved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='showroom',
+            name='test_ride_capacity',
+            field=models.PositiveSmallIntegerField(default=2, help_text='Test rides per slot'),
+        ),
+        migrations.AddField(
+            model_name='showroom',
+            name='test_ride_closes_at',
+            field=models.TimeField(default=datetime.time(19, 0)),
+        ),
+        migrations.AddField(
+            model_name='showroom',
+            name='test_ride_opens_at',
+            field=models.TimeField(default=datetime.time(10, 0)),
+        ),
+        migrations.AddField(
+            model_name='showroom',
+            name='test_ride_slot_minutes',
+            field=models.PositiveSmallIntegerField(default=60, validators=[django.core.validators.MinValueValidator(15)]),
+        ),
+        migrations.AddIndex(
+            model_name='testride',
+            index=models.Index(fields=['showroom', 'preferred_date', 'preferred_time', 'status', 'bike'], name='testride_showroom_slot_idx'),
+        ),
+        migrations.AddField(
+            model_name='testrideslot',
+            name='showroom',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_ride_slots', to='api.showroom'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='testrideslot',
+            unique_together={('showroom', 'date', 'time')},
+        ),
+    ]
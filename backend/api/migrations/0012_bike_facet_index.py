@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_test_ride_slots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bike',
+            index=models.Index(fields=['brand', 'fuel_type', 'condition', 'year', 'price', 'engine_capacity'], name='bike_facet_idx'),
+        ),
+    ]
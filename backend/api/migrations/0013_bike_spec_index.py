@@ -0,0 +1,82 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:27
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# A copy of the extraction in api/specs.py as of this migration, so later changes there do not change it.
+NUMBER_RE = re.compile(r'^\s*([-+]?\d[\d,]*(?:\.\d+)?|[-+]?\.\d+)')
+KEY_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_key(key):
+    return KEY_RE.sub('_', str(key).lower()).strip('_')[:100]
+
+
+def normalize_text(value):
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    return str(value).strip().lower()[:255]
+
+
+def parse_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER_RE.match(str(value))
+    return float(match.group(1).replace(',', '')) if match else None
+
+
+def spec_values(specifications, features):
+    values = {}
+    if isinstance(specifications, dict):
+        for key, value in specifications.items():
+            key = normalize_key(key)
+            if key and key != 'feature' and value is not None and not isinstance(value, (dict, list)):
+                values[key, normalize_text(value)] = parse_number(value)
+    if isinstance(features, list):
+        for feature in features:
+            if isinstance(feature, str) and feature.strip():
+                values['feature', normalize_text(feature)] = None
+    return [(key, number, text) for (key, text), number in values.items()]
+
+
+def backfill_bike_specs(apps, schema_editor):
+    Bike = apps.get_model('api', 'Bike')
+    BikeSpec = apps.get_model('api', 'BikeSpec')
+    rows = []
+    for pk, specifications, features in Bike.objects.values_list('pk', 'specifications', 'features').iterator():
+        rows += [
+            BikeSpec(bike_id=pk, key=key, number=number, text=text)
+            for key, number, text in spec_values(specifications, features)
+        ]
+        if len(rows) >= 2000:
+            BikeSpec.objects.bulk_create(rows)
+            rows = []
+    BikeSpec.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_bike_facet_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BikeSpec',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('number', models.FloatField(blank=True, null=True)),
+                ('text', models.CharField(blank=True, max_length=255)),
+                ('bike', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spec_values', to='api.bike')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'number', 'bike'], name='bikespec_key_number_idx'), models.Index(fields=['key', 'text', 'bike'], name='bikespec_key_text_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_bike_specs, migrations.RunPython.noop),
+    ]
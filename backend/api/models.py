@@ -1,3 +1,5 @@
+import datetime
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -6,6 +8,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 class Brand(models.Model):
     name = models.CharField(max_length=100, unique=True)
     logo = models.ImageField(upload_to='brands/', null=True, blank=True)
+    # Resized copies of the image, generated off-request (see api/images.py)
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -38,29 +42,42 @@ class Bike(models.Model):
     specifications = models.JSONField(default=dict, blank=True)
     features = models.JSONField(default=list, blank=True)
     main_image = models.ImageField(upload_to='bikes/')
+    main_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     images = models.JSONField(default=list, blank=True)
     is_featured = models.BooleanField(default=False)
     is_trending = models.BooleanField(default=False)
     stock_quantity = models.PositiveIntegerField(default=1)
+    # Rating summary, maintained from Review signals (see api/ratings.py)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.FloatField(default=0, editable=False)
+    rating_histogram = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='bike_created_id_idx'),
+            # Natural key used to match catalog import rows (see api/catalog_import.py)
+            models.Index(fields=['brand', 'model_name', 'year'], name='bike_brand_model_year_idx'),
+            # Covers the facet counts (see api/facets.py), which then scan the index instead of the table
+            models.Index(
+                fields=['brand', 'fuel_type', 'condition', 'year', 'price', 'engine_capacity'],
+                name='bike_facet_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.brand.name} {self.model_name} ({self.year})"
 
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
-        return 0
+        return self.rating_average
 
     @property
     def total_reviews(self):
-        return self.reviews.count()
+        return self.rating_count
 
 
 class Showroom(models.Model):
@@ -75,7 +92,14 @@ class Showroom(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     brands = models.ManyToManyField(Brand, related_name='showrooms')
     image = models.ImageField(upload_to='showrooms/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
+    # Test rides start every test_ride_slot_minutes between opening and closing
+    # time; each slot takes up to test_ride_capacity rides (see api/slots.py).
+    test_ride_capacity = models.PositiveSmallIntegerField(default=2, help_text="Test rides per slot")
+    test_ride_slot_minutes = models.PositiveSmallIntegerField(default=60, validators=[MinValueValidator(15)])
+    test_ride_opens_at = models.TimeField(default=datetime.time(10, 0))
+    test_ride_closes_at = models.TimeField(default=datetime.time(19, 0))
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -102,11 +126,36 @@ class TestRide(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Covers the availability range query (see api/slots.py)
+            models.Index(
+                fields=['showroom', 'preferred_date', 'preferred_time', 'status', 'bike'],
+                name='testride_showroom_slot_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.bike} - {self.preferred_date}"
 
 
+class TestRideSlot(models.Model):
+    """A showroom slot that has been booked at least once.
+
+    Booking writes this row before counting the rides in the slot, which
+    serializes concurrent bookings of the same slot on every backend.
+    """
+    showroom = models.ForeignKey(Showroom, on_delete=models.CASCADE, related_name='test_ride_slots')
+    date = models.DateField()
+    time = models.TimeField()
+    reserved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['showroom', 'date', 'time']
+
+    def __str__(self):
+        return f"{self.showroom} - {self.date} {self.time}"
+
+
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
     bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='reviews')
@@ -121,6 +170,10 @@ class Review(models.Model):
     class Meta:
         unique_together = ['user', 'bike']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='review_created_id_idx'),
+            models.Index(fields=['bike', 'created_at', 'id'], name='review_bike_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.bike} - {self.rating} stars"
@@ -157,6 +210,13 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='notif_user_created_id_idx'),
+            # Unread counts and unread-first lists (see api/counters.py)
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+            # Recent notifications about a bike, per user (price-drop deduplication, see api/price_alerts.py)
+            models.Index(fields=['related_bike', 'user', 'created_at'], name='notif_bike_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -202,6 +262,7 @@ class UsedBikeListing(models.Model):
     city = models.CharField(max_length=100)
     state = models.CharField(max_length=100)
     main_image = models.ImageField(upload_to='bikes/')
+    main_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     images = models.JSONField(default=list, blank=True)
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -209,6 +270,50 @@ class UsedBikeListing(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_approved', 'created_at', 'id'], name='used_approved_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model_name} ({self.year}) - {self.user.username}"
+
+
+class StatCounter(models.Model):
+    """A maintained count, e.g. of bikes or active showrooms, read instead of COUNT(*)."""
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class SimilarBike(models.Model):
+    """Precomputed nearest neighbours of a bike, written by the compute_similar_bikes command."""
+    bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='similar_entries')
+    similar_bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='similar_to')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['bike', 'rank']
+        unique_together = ['bike', 'rank']
+
+    def __str__(self):
+        return f"{self.bike_id} -> {self.similar_bike_id} (#{self.rank})"
+
+
+class BikeSpec(models.Model):
+    """One specification or feature of a bike, extracted from its JSON fields (see api/specs.py)."""
+    bike = models.ForeignKey(Bike, on_delete=models.CASCADE, related_name='spec_values')
+    key = models.CharField(max_length=100)
+    number = models.FloatField(null=True, blank=True)
+    text = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', 'number', 'bike'], name='bikespec_key_number_idx'),
+            models.Index(fields=['key', 'text', 'bike'], name='bikespec_key_text_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bike_id}: {self.key} = {self.text}"
@@ -0,0 +1,140 @@
+"""Monthly and yearly cost of ownership over the whole bike catalog.
+
+Each worker keeps the catalog columns the ranking needs (price, mileage,
+fuel type, battery size) plus the BikeListView filter columns as NumPy
+arrays, rebuilt when the Bike cache version moves. A request filters with a
+boolean mask and computes every bike's cost in one vectorized pass; search
+and ``spec.`` filters narrow the mask to the ids their queries return.
+
+For petrol and hybrid bikes ``mileage`` is km per litre. For electric bikes
+the catalog stores km per charge, so consumption is the battery capacity
+(parsed from ``specifications['battery']``, e.g. "4kWh lithium-ion") divided
+by that range.
+"""
+import re
+import threading
+
+import numpy as np
+
+from .cache import get_versions
+from .replicas import primary_reads
+from .finance import monthly_emi
+from .models import Bike
+
+DEFAULT_BATTERY_KWH = 3.0
+SORT_FIELDS = ['monthly_cost', 'yearly_cost', 'monthly_energy_cost', 'monthly_emi', 'price', 'mileage']
+
+_BATTERY_RE = re.compile(r'(\d+(?:\.\d+)?)\s*kwh', re.IGNORECASE)
+
+
+def battery_kwh(specifications):
+    match = _BATTERY_RE.search(str((specifications or {}).get('battery', '')))
+    return float(match.group(1)) if match else DEFAULT_BATTERY_KWH
+
+
+class CatalogColumns:
+    def __init__(self, rows, batteries, version=None):
+        self.version = version
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.price = np.array([row[1] for row in rows], dtype=np.float64)
+        self.mileage = np.array([row[2] for row in rows], dtype=np.float64)
+        self.fuel_type = np.array([row[3] for row in rows], dtype=object)
+        self.brand_id = np.array([row[4] for row in rows], dtype=np.int64)
+        self.condition = np.array([row[5] for row in rows], dtype=object)
+        self.year = np.array([row[6] for row in rows], dtype=np.int64)
+        self.is_featured = np.array([row[7] for row in rows], dtype=bool)
+        self.is_trending = np.array([row[8] for row in rows], dtype=bool)
+        self.engine_capacity = np.array([row[9] for row in rows], dtype=np.float64)
+        self.electric = self.fuel_type == 'electric'
+        self.battery_kwh = np.full(len(rows), DEFAULT_BATTERY_KWH)
+        if batteries:
+            positions = np.searchsorted(self.ids, list(batteries))
+            self.battery_kwh[positions] = list(batteries.values())
+
+    @classmethod
+    def build(cls, version=None):
+        rows = list(Bike.objects.order_by('id').values_list(
+            'id', 'price', 'mileage', 'fuel_type', 'brand_id', 'condition', 'year', 'is_featured', 'is_trending',
+            'engine_capacity',
+        ))
+        batteries = {
+            pk: battery_kwh(specifications)
+            for pk, specifications in Bike.objects.filter(fuel_type='electric').values_list('id', 'specifications')
+        }
+        return cls(rows, batteries, version)
+
+    def mask(self, cleaned_data, ranges=None, ids=None):
+        """Boolean mask for BikeListView's filterset values, ``{column: (min, max)}`` ranges and an optional id set."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if cleaned_data.get('brand') is not None:
+            mask &= self.brand_id == cleaned_data['brand'].pk
+        for field in ['fuel_type', 'condition']:
+            if cleaned_data.get(field):
+                mask &= getattr(self, field) == cleaned_data[field]
+        if cleaned_data.get('year') is not None:
+            mask &= self.year == int(cleaned_data['year'])
+        for field in ['is_featured', 'is_trending']:
+            if cleaned_data.get(field) is not None:
+                mask &= getattr(self, field) == cleaned_data[field]
+        for column, (low, high) in (ranges or {}).items():
+            if low is not None:
+                mask &= getattr(self, column) >= low
+            if high is not None:
+                mask &= getattr(self, column) <= high
+        if ids is not None:
+            mask &= np.isin(self.ids, np.fromiter(ids, dtype=np.int64))
+        return mask
+
+    def costs(self, mask, monthly_km, fuel_price, electricity_price, emi_plan=None):
+        """Cost columns for the bikes selected by ``mask``, as a dict of arrays."""
+        price = self.price[mask]
+        mileage = self.mileage[mask]
+        electric = self.electric[mask]
+        unit_price = np.where(electric, self.battery_kwh[mask] * electricity_price, fuel_price)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Unknown (zero) mileage ranks last instead of first.
+            energy = np.where(mileage > 0, monthly_km / mileage * unit_price, np.nan)
+        if emi_plan:
+            loan = price * (1 - emi_plan['down_payment_percent'] / 100)
+            emi = monthly_emi(loan, emi_plan['interest_rate'], emi_plan['tenure_months'])
+            months_in_first_year = min(emi_plan['tenure_months'], 12)
+        else:
+            emi = np.zeros(len(price))
+            months_in_first_year = 0
+        return {
+            'ids': self.ids[mask],
+            'price': price,
+            'mileage': mileage,
+            'monthly_energy_cost': energy,
+            'monthly_emi': emi,
+            'monthly_cost': energy + emi,
+            'yearly_cost': energy * 12 + emi * months_in_first_year,
+        }
+
+
+def rank(costs, ordering='monthly_cost'):
+    """Positions into ``costs`` sorted by ``ordering`` (``-`` for descending), ties by id, NaN last."""
+    field = ordering.lstrip('-')
+    values = costs[field]
+    if ordering.startswith('-'):
+        values = -values
+    # Columns are in id order, so a stable sort breaks ties by id.
+    return np.argsort(values, kind='stable')
+
+
+_columns = None
+_lock = threading.Lock()
+
+
+def get_columns():
+    """Return this worker's catalog columns, rebuilding them if bikes changed."""
+    global _columns
+    version = get_versions([Bike])[0]
+    columns = _columns
+    if columns is not None and columns.version == version:
+        return columns
+    with _lock:
+        if _columns is None or _columns.version != version:
+            with primary_reads():
+                _columns = CatalogColumns.build(version)
+        return _columns
@@ -0,0 +1,158 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page number pagination with an opt-in keyset (cursor) mode.
+
+    Without a ``cursor`` query parameter this behaves exactly like the default
+    ``PageNumberPagination``. Passing ``?cursor=`` (empty for the first page)
+    switches to keyset mode: rows are paged on the active ordering plus ``id``
+    as a tie breaker, so every page is a single indexed range scan no matter
+    how deep it is, and no ``COUNT(*)`` is run. ``count=approx`` adds an
+    approximate total to keyset responses.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    approximate_count_limit = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = True
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.queryset = queryset
+        reverse, position = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.flip(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving backwards, there is always a next page (the one we came from).
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = (position is not None) if not reverse else has_more
+        self.page_rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        payload = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.request.query_params.get(self.count_query_param) == 'approx':
+            payload['count'], payload['count_is_approximate'] = self.get_approximate_count(self.queryset)
+        payload['results'] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[0], reverse=True)
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        for field in ordering:
+            if not isinstance(field, str) or field.lstrip('-') in ('?', 'pk', 'id'):
+                raise NotFound('Cursor pagination is not supported for this ordering.')
+        # ``id`` breaks ties so the ordering is total, following the direction of the first field.
+        ordering.append('-id' if ordering and ordering[0].startswith('-') else 'id')
+        return ordering
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def seek_filter(ordering, position):
+        """Rows strictly after ``position`` in ``ordering`` (lexicographic on the key tuple)."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def position_of(self, row):
+        values = []
+        for field in self.ordering:
+            value = row
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return values
+
+    def encode_cursor(self, row, reverse):
+        data = {'p': self.position_of(row)}
+        if reverse:
+            data['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False, None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            position = [str(value) for value in data['p']]
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor.')
+        if len(position) != len(self.ordering):
+            raise NotFound('Invalid cursor.')
+        return reverse, position
+
+    def get_approximate_count(self, queryset):
+        """Return ``(count, is_approximate)`` without a full ``COUNT(*)`` scan.
+
+        PostgreSQL answers from the planner's row estimate; other backends
+        count at most ``approximate_count_limit`` rows.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, params = queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows']), True
+        limit = self.approximate_count_limit
+        count = queryset.order_by()[:limit + 1].count()
+        return min(count, limit), count > limit
@@ -0,0 +1,94 @@
+"""``price_drop`` notifications for users who favorited a bike.
+
+A committed price cut (a bike save, see api/signals.py, or a catalog import)
+is handed to a background thread, so the saving request does not wait for
+the fan-out. The worker walks the bike's favorites in chunks of user ids,
+skips users who already got a price-drop notification for the bike within
+``DEDUPE_WINDOW`` and writes the rest with one ``bulk_create`` per chunk,
+followed by one UPDATE of their unread counters.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import counters
+from .models import Bike, Favorite, Notification
+
+logger = logging.getLogger(__name__)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            # One thread: fan-outs for the same bike run one after the other, so deduplication holds.
+            _dispatcher = ThreadPoolExecutor(max_workers=1)
+        return _dispatcher
+
+
+def notification_text(bike, old_price, new_price):
+    return (
+        'Price Drop Alert',
+        f'The price of {bike.brand.name} {bike.model_name} has dropped by ₹{old_price - new_price:,.0f} '
+        f'to ₹{new_price:,.0f}',
+    )
+
+
+def fan_out(bike_id, old_price, new_price, chunk_size=None, now=None):
+    """Notify everyone who favorited the bike of its new price. Returns the number of rows written."""
+    config = settings.PRICE_DROP_NOTIFICATIONS
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    now = now or timezone.now()
+    bike = Bike.objects.select_related('brand').filter(pk=bike_id).first()
+    if bike is None:
+        return 0
+    title, message = notification_text(bike, old_price, new_price)
+    recent = Notification.objects.filter(
+        type='price_drop', related_bike_id=bike_id, created_at__gte=now - timedelta(seconds=config['DEDUPE_WINDOW'])
+    )
+    user_ids = (
+        Favorite.objects.filter(bike_id=bike_id).order_by('user_id')
+        .values_list('user_id', flat=True).iterator(chunk_size=chunk_size)
+    )
+    written = 0
+    while chunk := list(islice(user_ids, chunk_size)):
+        notified = set(recent.filter(user_id__in=chunk).values_list('user_id', flat=True))
+        recipients = [user_id for user_id in chunk if user_id not in notified]
+        # Counters first, locked until the notifications commit with them (see api/counters.py).
+        with transaction.atomic():
+            counters.adjust_unread(recipients, 1)
+            Notification.objects.bulk_create([
+                Notification(user_id=user_id, type='price_drop', title=title, message=message, related_bike_id=bike_id)
+                for user_id in recipients
+            ])
+        written += len(recipients)
+    return written
+
+
+def run_fan_out(bike_id, old_price, new_price):
+    """``fan_out`` on the dispatcher thread."""
+    try:
+        fan_out(bike_id, old_price, new_price)
+    except Exception:
+        logger.exception('Could not send price drop notifications for bike %s', bike_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(bike_id, old_price, new_price):
+    """Queue a fan-out if ``new_price`` is lower. Call after the price change is committed."""
+    if not settings.PRICE_DROP_NOTIFICATIONS['ENABLED'] or old_price is None:
+        return
+    old_price, new_price = Decimal(old_price), Decimal(new_price)
+    if new_price < old_price:
+        get_dispatcher().submit(run_fan_out, bike_id, old_price, new_price)
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Bike, Review
+
+STARS = range(1, 6)
+
+
+def summary_aggregates():
+    """Aggregate expressions computing a bike's rating summary from its reviews."""
+    aggregates = {
+        'count': Count('id'),
+        'total': Sum('rating'),
+    }
+    for star in STARS:
+        aggregates[f'star_{star}'] = Count('id', filter=Q(rating=star))
+    return aggregates
+
+
+def summary_fields(row):
+    """Turn an aggregate row into the Bike rating_* field values."""
+    count = row.get('count') or 0
+    total = row.get('total') or 0
+    return {
+        'rating_count': count,
+        'rating_sum': total,
+        'rating_average': total / count if count else 0,
+        'rating_histogram': {str(star): row.get(f'star_{star}') or 0 for star in STARS},
+    }
+
+
+def refresh_rating_summary(bike_id):
+    """Recompute the stored rating summary of a single bike."""
+    bike = Bike.objects.filter(pk=bike_id)
+    with transaction.atomic():
+        # A write first: it locks the bike row (the database on SQLite, where select_for_update
+        # does nothing) until commit, so concurrent refreshes of one bike run one after the
+        # other and the last to write has counted every committed review.
+        bike.update(rating_count=F('rating_count'))
+        row = Review.objects.filter(bike_id=bike_id).aggregate(**summary_aggregates())
+        bike.update(**summary_fields(row))
+
+
+def rebuild_rating_summaries(batch_size=500):
+    """Recompute the rating summary of every bike. Returns the number of bikes updated."""
+    rows = {
+        row['bike']: row
+        for row in Review.objects.order_by().values('bike').annotate(**summary_aggregates())
+    }
+    updated = 0
+    batch = []
+    fields = list(summary_fields({}))
+    for bike in Bike.objects.only('pk').iterator(chunk_size=batch_size):
+        for field, value in summary_fields(rows.get(bike.pk, {})).items():
+            setattr(bike, field, value)
+        batch.append(bike)
+        if len(batch) >= batch_size:
+            updated += Bike.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        updated += Bike.objects.bulk_update(batch, fields)
+    return updated
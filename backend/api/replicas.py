@@ -0,0 +1,178 @@
+"""Routing reads to read replicas.
+
+Replicas are the ``replica_*`` aliases configured from the environment
+(see two_wheeler_marketplace/databases.py). ``ReplicaRoutingMiddleware``
+lets a request read from a replica when it uses a safe method on one of
+``REPLICA_VIEWS``; everything else, and any read inside a transaction on the
+primary, goes to the primary. ``ReplicaRouter`` picks one replica at random
+among those that accept connections on the request's first read and keeps
+it for the rest of the request; with none available it uses the primary.
+
+Read-your-writes: after a successful unsafe request by an authenticated
+user, that user's reads stay on the primary for ``STICKY_SECONDS``, long
+enough for the replicas to catch up. Anonymous requests do not pin. Pins
+live in the shared cache, so replicas are only used with a shared cache
+backend (``api.cache.is_shared``); with a per-process one every read goes
+to the primary.
+
+Reads that fill a cache other requests will be served from (versioned
+entries, rendered responses, the autocomplete index and ownership columns)
+run in ``primary_reads()``: a write bumps the version on commit, and a
+lagging replica would otherwise fill the new version with the old data.
+"""
+import contextlib
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from two_wheeler_marketplace.databases import REPLICA_PREFIX
+
+from . import cache as cache_versions
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'db_pin:{}'
+# Set by the middleware for requests that may read from a replica not chosen yet.
+ANY_REPLICA = 'any_replica'
+
+# URL names whose safe requests may read from a replica. Views that write
+# what they read (e.g. the unread count rebuilding its counter) stay off the list.
+REPLICA_VIEWS = {
+    'brand-list', 'brand-detail', 'bike-list', 'bike-facets', 'bike-export', 'bike-ownership-cost',
+    'bike-detail', 'similar-bikes', 'showroom-list', 'showroom-detail', 'test-ride-availability',
+    'test-ride-list', 'review-list', 'bike-reviews', 'favorite-list', 'notification-list',
+    'upcoming-launch-list', 'used-bike-list', 'compare-bikes', 'search-suggestions', 'dashboard-stats',
+}
+
+# Always read from the primary: a lagging replica must not bring back a deactivated user.
+PRIMARY_APPS = {'auth', 'contenttypes', 'sessions'}
+
+_read_alias = contextvars.ContextVar('read_alias', default=PRIMARY)
+# alias -> time.monotonic() before which the replica is not tried again
+_unavailable = {}
+_unavailable_lock = threading.Lock()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+def replicas_enabled():
+    return bool(replica_aliases()) and cache_versions.is_shared()
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """Read from the primary inside the block, whatever the request was routed to."""
+    token = _read_alias.set(PRIMARY)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def is_available(alias):
+    """Whether ``alias`` accepts connections; a failure takes it out for ``RETRY_SECONDS``."""
+    with _unavailable_lock:
+        if _unavailable.get(alias, 0) > time.monotonic():
+            return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        with _unavailable_lock:
+            _unavailable[alias] = time.monotonic() + settings.READ_REPLICAS['RETRY_SECONDS']
+        return False
+    return True
+
+
+def pick_replica():
+    """A random available replica, or the primary."""
+    aliases = replica_aliases()
+    random.shuffle(aliases)
+    for alias in aliases:
+        if is_available(alias):
+            return alias
+    return PRIMARY
+
+
+def pin_user(user_id):
+    cache.set(PIN_KEY.format(user_id), 1, settings.READ_REPLICAS['STICKY_SECONDS'])
+
+
+def is_pinned(user_id):
+    return cache.get(PIN_KEY.format(user_id)) is not None
+
+
+def token_user_id(request):
+    """The user id of the request's access token, if it carries a valid one."""
+    # Imported here: simplejwt loads the auth models, and api.cache (which imports this module) must stay
+    # importable before the app registry is ready, e.g. in the image worker processes (api/images.py).
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework_simplejwt.settings import api_settings
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _read_alias.set(PRIMARY)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replicas_enabled():
+            # DRF sets the authenticated user on the Django request as well.
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_user(user.pk)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or request.resolver_match.url_name not in REPLICA_VIEWS:
+            return None
+        if not replicas_enabled():
+            return None
+        user_id = token_user_id(request)
+        if user_id is None or not is_pinned(user_id):
+            _read_alias.set(ANY_REPLICA)
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias == PRIMARY or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        if model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+        if alias == ANY_REPLICA:
+            alias = pick_replica()
+            _read_alias.set(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data, so objects read from any of them can be related.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return not db.startswith(REPLICA_PREFIX)
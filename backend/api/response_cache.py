@@ -0,0 +1,127 @@
+"""Two-tier cache of rendered responses for the public catalog views.
+
+Anonymous GETs are served from a byte-bounded LRU in this process, then from
+the shared cache, and only then by running the view. The key is the view's
+ETag (see api/conditional.py): it already covers the path, the normalized
+query params, host, renderer and the versions of every model in the
+response, so a committed write makes old entries unreachable in both tiers.
+A miss is computed once per key across threads and workers
+(``get_or_set_locked``). Counters are exposed by ``response_cache_metrics``.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .cache import get_or_set_locked
+
+KEY = 'response:{}'
+
+
+class LRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.stats = {'local_hit': 0, 'shared_hit': 0, 'miss': 0, 'evict': 0}
+
+    @staticmethod
+    def entry_size(value):
+        return len(value[2])
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = self.entry_size(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= self.entry_size(previous)
+            self.entries[key] = value
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= self.entry_size(evicted)
+                self.stats['evict'] += 1
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+local_cache = LRUCache(settings.RESPONSE_CACHE['LOCAL_MAX_BYTES'])
+
+
+def get_or_compute(key, compute):
+    """Return ``(status, content_type, content)`` for ``key`` from the nearest tier, computing it on a miss."""
+    value = local_cache.get(key)
+    if value is not None:
+        local_cache.count('local_hit')
+        return value
+    computed = []
+
+    def compute_once():
+        computed.append(True)
+        return compute()
+
+    value = get_or_set_locked(key, compute_once, settings.RESPONSE_CACHE['TIMEOUT'])
+    local_cache.count('miss' if computed else 'shared_hit')
+    local_cache.set(key, value)
+    return value
+
+
+class CachedResponseMixin:
+    """Serve anonymous GETs from the response cache. Goes after ConditionalGetMixin in the bases."""
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        etag, _ = self.get_validators(request)
+        status, content_type, content = get_or_compute(
+            KEY.format(etag), lambda: self.render_response(request, *args, **kwargs)
+        )
+        return HttpResponse(content, status=status, content_type=content_type)
+
+    def render_response(self, request, *args, **kwargs):
+        response = self.finalize_response(request, super().get(request, *args, **kwargs), *args, **kwargs)
+        response.render()
+        return response.status_code, response['Content-Type'], response.content
+
+
+def metrics():
+    """Counters and current size of this worker's local tier, in Prometheus text format."""
+    with local_cache.lock:
+        stats = dict(local_cache.stats)
+        entries, size = len(local_cache.entries), local_cache.size
+    lines = [
+        '# HELP bikehub_response_cache_requests_total Cached view requests by outcome.',
+        '# TYPE bikehub_response_cache_requests_total counter',
+        *(
+            f'bikehub_response_cache_requests_total{{result="{result}"}} {stats[result]}'
+            for result in ['local_hit', 'shared_hit', 'miss']
+        ),
+        '# HELP bikehub_response_cache_evictions_total Entries evicted from the local tier.',
+        '# TYPE bikehub_response_cache_evictions_total counter',
+        f"bikehub_response_cache_evictions_total {stats['evict']}",
+        '# HELP bikehub_response_cache_local_entries Entries in the local tier.',
+        '# TYPE bikehub_response_cache_local_entries gauge',
+        f'bikehub_response_cache_local_entries {entries}',
+        '# HELP bikehub_response_cache_local_bytes Bytes held by the local tier.',
+        '# TYPE bikehub_response_cache_local_bytes gauge',
+        f'bikehub_response_cache_local_bytes {size}',
+    ]
+    return '\n'.join(lines) + '\n'
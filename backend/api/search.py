@@ -0,0 +1,202 @@
+"""Full-text search index over bikes.
+
+On SQLite the index is the FTS5 table ``api_bike_search`` (rowid = bike id);
+on PostgreSQL it is a table of the same name holding a weighted tsvector and
+the plain name for trigram matching. Both are created by migration 0004 and
+kept in sync from Bike/Brand signals. Other backends fall back to icontains.
+
+The ``name`` column is "<brand> <model>" and ranks above ``description``.
+"""
+import re
+
+from django.db import DatabaseError, connections, router
+from django.db.models.expressions import RawSQL
+
+from .models import Bike
+
+TABLE = 'api_bike_search'
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_available = {}
+
+# Suggestions are ranked by relevance when at most this many bikes match.
+RANKED_CANDIDATES = 500
+
+
+def search_backend(using):
+    """Return ``'fts5'``, ``'postgresql'`` or ``None`` for the given database alias."""
+    if using in _available:
+        return _available[using]
+    connection = connections[using]
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        _available[using] = None
+        return None
+    try:
+        if TABLE not in connection.introspection.table_names():
+            # Not migrated yet (or no FTS5 support); look again next time.
+            return None
+    except DatabaseError:
+        return None
+    _available[using] = 'fts5' if connection.vendor == 'sqlite' else 'postgresql'
+    return _available[using]
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def fts5_match(tokens, column=None):
+    """Build an FTS5 MATCH expression requiring every token as a prefix."""
+    terms = ' '.join(f'"{token}"*' for token in tokens)
+    return f'{column} : ({terms})' if column else terms
+
+
+def tsquery(tokens, weights=''):
+    """Build a tsquery requiring every token as a prefix, optionally only in the given weights."""
+    return ' & '.join(f'{token}:*{weights}' for token in tokens)
+
+
+def _db_for_read():
+    return router.db_for_read(Bike)
+
+
+def _db_for_write():
+    return router.db_for_write(Bike)
+
+
+def matching_ids_sql(tokens, using, name_only=False):
+    """Return ``(sql, params)`` selecting ids of bikes matching every token, or ``None``."""
+    backend = search_backend(using)
+    if backend == 'fts5':
+        return (
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+            [fts5_match(tokens, 'name' if name_only else None)],
+        )
+    if backend == 'postgresql':
+        return (
+            f"SELECT bike_id FROM {TABLE} WHERE document @@ to_tsquery('simple', %s)",
+            [tsquery(tokens, 'A' if name_only else '')],
+        )
+    return None
+
+
+def filter_bikes(queryset, query):
+    """Restrict ``queryset`` to bikes matching ``query`` through the index.
+
+    Returns ``None`` when the database has no search index so callers can
+    fall back to their ``icontains`` lookups.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+    sql = matching_ids_sql(tokens, queryset.db)
+    if sql is None:
+        return None
+    return queryset.filter(id__in=RawSQL(*sql))
+
+
+def suggest_bike_ids(query, limit=10):
+    """Ids of bikes whose brand/model name matches ``query`` by prefix, best match first.
+
+    Returns ``None`` when the database has no search index.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    using = _db_for_read()
+    backend = search_backend(using)
+    if backend == 'fts5':
+        match = fts5_match(tokens, 'name')
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT 1 FROM {TABLE} WHERE {TABLE} MATCH %s LIMIT %s)',
+                [match, RANKED_CANDIDATES + 1],
+            )
+            ranked = cursor.fetchone()[0] <= RANKED_CANDIDATES
+        # bm25 is computed for every match, so very broad prefixes return the newest bikes instead.
+        order = f'bm25({TABLE}, 10.0, 1.0)' if ranked else 'rowid DESC'
+        sql = f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY {order} LIMIT %s'
+        params = [match, limit]
+    elif backend == 'postgresql':
+        sql = (
+            f"SELECT bike_id FROM {TABLE} "
+            f"WHERE document @@ to_tsquery('simple', %s) OR name %% %s "
+            f"ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC, similarity(name, %s) DESC "
+            f"LIMIT %s"
+        )
+        params = [tsquery(tokens, 'A'), query, tsquery(tokens), query, limit]
+    else:
+        return None
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _index_where(backend, cursor, where, params):
+    """Insert index rows for the bikes selected by ``where`` (an SQL condition on ``b``)."""
+    if backend == 'fts5':
+        sql = (
+            f"INSERT INTO {TABLE} (rowid, name, description) "
+            f"SELECT b.id, br.name || ' ' || b.model_name, b.description "
+        )
+    else:
+        sql = (
+            f"INSERT INTO {TABLE} (bike_id, name, document) "
+            f"SELECT b.id, br.name || ' ' || b.model_name, "
+            f"setweight(to_tsvector('simple', br.name || ' ' || b.model_name), 'A') || "
+            f"setweight(to_tsvector('simple', b.description), 'B') "
+        )
+    sql += f"FROM api_bike b JOIN api_brand br ON br.id = b.brand_id WHERE {where}"
+    cursor.execute(sql, params)
+    return cursor.rowcount
+
+
+def index_bikes(bike_ids):
+    """(Re)index the given bikes, dropping any that no longer exist."""
+    bike_ids = list(bike_ids)
+    using = _db_for_write()
+    backend = search_backend(using)
+    if backend is None or not bike_ids:
+        return
+    column = 'rowid' if backend == 'fts5' else 'bike_id'
+    placeholders = ', '.join(['%s'] * len(bike_ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {column} IN ({placeholders})', bike_ids)
+        _index_where(backend, cursor, f'b.id IN ({placeholders})', bike_ids)
+
+
+def index_brand(brand_id):
+    """Reindex every bike of a brand, e.g. after the brand was renamed."""
+    using = _db_for_write()
+    backend = search_backend(using)
+    if backend is None:
+        return
+    column = 'rowid' if backend == 'fts5' else 'bike_id'
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE {column} IN (SELECT id FROM api_bike WHERE brand_id = %s)',
+            [brand_id],
+        )
+        _index_where(backend, cursor, 'b.brand_id = %s', [brand_id])
+
+
+def remove_bikes(bike_ids):
+    bike_ids = list(bike_ids)
+    using = _db_for_write()
+    backend = search_backend(using)
+    if backend is None or not bike_ids:
+        return
+    column = 'rowid' if backend == 'fts5' else 'bike_id'
+    placeholders = ', '.join(['%s'] * len(bike_ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE {column} IN ({placeholders})', bike_ids)
+
+
+def rebuild_search_index():
+    """Rebuild the whole index from the bike and brand tables. Returns the number of bikes indexed."""
+    using = _db_for_write()
+    backend = search_backend(using)
+    if backend is None:
+        return 0
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        return _index_where(backend, cursor, '1 = 1', [])
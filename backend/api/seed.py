@@ -0,0 +1,176 @@
+"""Synthetic catalog data for query budgets and benchmarks.
+
+Everything is written with bulk_create so large datasets seed quickly. The
+rating summaries, search index and similar bikes are rebuilt at the end
+because bulk_create skips signals.
+"""
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from .models import (
+    Brand, Bike, Showroom, TestRide, Review, Favorite,
+    Notification, UpcomingLaunch, UsedBikeListing
+)
+from .ratings import rebuild_rating_summaries
+from .search import rebuild_search_index
+from .similarity import compute_similar_bikes
+
+BRAND_NAMES = ['Honda', 'Yamaha', 'Bajaj', 'TVS', 'Hero', 'Royal Enfield', 'Suzuki', 'KTM', 'Ather', 'Ola']
+MODEL_NAMES = ['Activa', 'Shine', 'Pulsar', 'Jupiter', 'Splendor', 'Classic', 'Access', 'Duke', 'Apache', 'FZ']
+CITIES = [
+    ('Mumbai', 'Maharashtra', 19.0760, 72.8777),
+    ('Delhi', 'Delhi', 28.7041, 77.1025),
+    ('Bangalore', 'Karnataka', 12.9716, 77.5946),
+    ('Chennai', 'Tamil Nadu', 13.0827, 80.2707),
+    ('Pune', 'Maharashtra', 18.5204, 73.8567),
+]
+SEED_PASSWORD = 'seed-password-123'
+
+
+def seed_user(username='seed@example.com', is_staff=False):
+    user, created = User.objects.get_or_create(
+        username=username, defaults={'email': username, 'is_staff': is_staff}
+    )
+    if created:
+        user.set_password(SEED_PASSWORD)
+        user.save(update_fields=['password'])
+    return user
+
+
+def seed_brands(count=len(BRAND_NAMES)):
+    existing = set(Brand.objects.values_list('name', flat=True))
+    names = [BRAND_NAMES[i] if i < len(BRAND_NAMES) else f'Brand {i}' for i in range(count)]
+    Brand.objects.bulk_create([
+        Brand(name=name, description=f'{name} two-wheelers') for name in names if name not in existing
+    ])
+    return list(Brand.objects.filter(name__in=names).order_by('id'))
+
+
+def seed_bikes(count, brands=None, rng=None, batch_size=2000):
+    """Create ``count`` bikes spread over ``brands``."""
+    rng = rng or random.Random(42)
+    brands = brands or seed_brands()
+    fuel_types = [choice for choice, _ in Bike.FUEL_CHOICES]
+    conditions = [choice for choice, _ in Bike.CONDITION_CHOICES]
+    start = Bike.objects.count()
+    batch = []
+    for i in range(start, start + count):
+        brand = brands[i % len(brands)]
+        fuel_type = rng.choice(fuel_types)
+        engine_capacity = 0 if fuel_type == 'electric' else rng.choice([100, 110, 125, 150, 160, 200, 350, 390])
+        batch.append(Bike(
+            brand=brand,
+            model_name=f'{rng.choice(MODEL_NAMES)} {i}',
+            year=rng.randint(2015, 2025),
+            price=Decimal(rng.randrange(45000, 300000, 500)),
+            fuel_type=fuel_type,
+            engine_capacity=engine_capacity,
+            mileage=Decimal(rng.randint(25, 90)),
+            condition=rng.choice(conditions),
+            description=f'{brand.name} commuter number {i}',
+            specifications={
+                'top_speed': f'{rng.randint(80, 160)} km/h',
+                'weight': f'{rng.randint(95, 200)} kg',
+                'abs': rng.choice(['Yes', 'No']),
+            },
+            features=['LED Headlamp', 'Digital Console'][:rng.randint(0, 2)],
+            main_image=f'bikes/seed-{i}.jpg',
+            is_featured=i % 5 == 0,
+            is_trending=i % 7 == 0,
+        ))
+        if len(batch) >= batch_size:
+            Bike.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Bike.objects.bulk_create(batch)
+
+
+def seed_showrooms(count, brands=None, rng=None, batch_size=2000):
+    rng = rng or random.Random(42)
+    brands = brands or seed_brands()
+    start = Showroom.objects.count()
+    batch = []
+    for i in range(start, start + count):
+        city, state, lat, lng = CITIES[i % len(CITIES)]
+        batch.append(Showroom(
+            name=f'Showroom {i}',
+            address=f'{i} Main Road',
+            city=city,
+            state=state,
+            pincode='400001',
+            phone='9999999999',
+            email=f'showroom{i}@example.com',
+            latitude=Decimal(f'{lat + rng.uniform(-0.5, 0.5):.6f}'),
+            longitude=Decimal(f'{lng + rng.uniform(-0.5, 0.5):.6f}'),
+        ))
+        if len(batch) >= batch_size:
+            _link_showroom_brands(Showroom.objects.bulk_create(batch), brands)
+            batch = []
+    if batch:
+        _link_showroom_brands(Showroom.objects.bulk_create(batch), brands)
+
+
+def _link_showroom_brands(showrooms, brands):
+    through = Showroom.brands.through
+    through.objects.bulk_create([
+        through(showroom_id=showroom.pk, brand_id=brands[(index + offset) % len(brands)].pk)
+        for index, showroom in enumerate(showrooms)
+        for offset in range(2)
+    ])
+
+
+def seed_dataset(rows, user=None):
+    """Seed a small, complete dataset where every list endpoint has ``rows`` results.
+
+    ``user`` owns the test rides, reviews, favorites, notifications and used
+    listings so its authenticated endpoints see ``rows`` items as well.
+    """
+    rng = random.Random(rows)
+    user = user or seed_user()
+    brands = seed_brands()
+    seed_bikes(rows + 1, brands, rng)
+    seed_showrooms(rows, brands, rng)
+    bikes = list(Bike.objects.order_by('-id')[:rows + 1])
+    showroom = Showroom.objects.order_by('-id').first()
+    reviewers = User.objects.bulk_create([
+        User(username=f'reviewer-{rows}-{i}') for i in range(rows)
+    ])
+    today = date.today()
+    Review.objects.bulk_create(
+        [Review(user=user, bike=bike, rating=rng.randint(1, 5), title='Seeded', comment='Seeded review')
+         for bike in bikes[1:]]
+        + [Review(user=reviewer, bike=bikes[0], rating=rng.randint(1, 5), title='Seeded', comment='Seeded review')
+           for reviewer in reviewers]
+    )
+    Favorite.objects.bulk_create([Favorite(user=user, bike=bike) for bike in bikes[1:]])
+    TestRide.objects.bulk_create([
+        TestRide(user=user, bike=bike, showroom=showroom,
+                 preferred_date=today + timedelta(days=i % 14), preferred_time=time(10 + i % 8))
+        for i, bike in enumerate(bikes[1:])
+    ])
+    Notification.objects.bulk_create([
+        Notification(user=user, type='new_bike', title=f'New {bike.model_name}',
+                     message='Now available', related_bike=bike)
+        for bike in bikes[1:]
+    ])
+    UpcomingLaunch.objects.bulk_create([
+        UpcomingLaunch(brand=brands[i % len(brands)], model_name=f'Upcoming {rows}-{i}',
+                       expected_launch_date=today + timedelta(days=30 + i), description='Seeded launch',
+                       image=f'upcoming/seed-{i}.jpg', is_featured=True)
+        for i in range(rows)
+    ])
+    UsedBikeListing.objects.bulk_create([
+        UsedBikeListing(user=user, brand=brands[i % len(brands)].name, model_name=bike.model_name,
+                        year=bike.year, price=bike.price, mileage=rng.randint(1000, 50000),
+                        condition='good', description='Seeded listing', contact_phone='9999999999',
+                        contact_email=user.email, city='Mumbai', state='Maharashtra',
+                        main_image=f'bikes/used-{i}.jpg', is_approved=True)
+        for i, bike in enumerate(bikes[1:])
+    ])
+    rebuild_rating_summaries()
+    rebuild_search_index()
+    compute_similar_bikes()
+    return user
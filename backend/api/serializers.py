@@ -1,10 +1,23 @@
+from datetime import timedelta
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.contrib.auth import authenticate
 from .models import (
     Brand, Bike, Showroom, TestRide, Review, Favorite, 
     Notification, UpcomingLaunch, UsedBikeListing
 )
+from .images import variant_urls
+from . import slots
+from .ownership import SORT_FIELDS as OWNERSHIP_SORT_FIELDS
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of an image's generated variants plus ``srcset`` strings; null until they exist."""
+
+    def to_representation(self, value):
+        return variant_urls(value, self.context.get('request'))
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -34,6 +47,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
 
 class BrandSerializer(serializers.ModelSerializer):
+    logo_variants = ImageVariantsField()
+
     class Meta:
         model = Brand
         fields = '__all__'
@@ -41,31 +56,80 @@ class BrandSerializer(serializers.ModelSerializer):
 
 class BikeSerializer(serializers.ModelSerializer):
     brand_name = serializers.CharField(source='brand.name', read_only=True)
-    average_rating = serializers.ReadOnlyField()
-    total_reviews = serializers.ReadOnlyField()
+    main_image_variants = ImageVariantsField()
+    average_rating = serializers.FloatField(source='rating_average', read_only=True)
+    total_reviews = serializers.IntegerField(source='rating_count', read_only=True)
 
     class Meta:
         model = Bike
-        fields = '__all__'
+        exclude = ['rating_count', 'rating_sum', 'rating_average']
 
 
 class BikeListSerializer(serializers.ModelSerializer):
     brand_name = serializers.CharField(source='brand.name', read_only=True)
-    average_rating = serializers.ReadOnlyField()
-    total_reviews = serializers.ReadOnlyField()
+    main_image_variants = ImageVariantsField()
+    average_rating = serializers.FloatField(source='rating_average', read_only=True)
+    total_reviews = serializers.IntegerField(source='rating_count', read_only=True)
 
     class Meta:
         model = Bike
         fields = [
             'id', 'brand', 'brand_name', 'model_name', 'year', 'price', 
             'fuel_type', 'engine_capacity', 'mileage', 'condition',
-            'main_image', 'is_featured', 'is_trending', 'average_rating', 
+            'main_image', 'main_image_variants', 'is_featured', 'is_trending', 'average_rating', 
             'total_reviews', 'created_at'
         ]
 
 
+class BikeOwnershipCostSerializer(BikeListSerializer):
+    monthly_energy_cost = serializers.FloatField(read_only=True, allow_null=True)
+    monthly_emi = serializers.FloatField(read_only=True)
+    monthly_cost = serializers.FloatField(read_only=True, allow_null=True)
+    yearly_cost = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta(BikeListSerializer.Meta):
+        fields = BikeListSerializer.Meta.fields + [
+            'monthly_energy_cost', 'monthly_emi', 'monthly_cost', 'yearly_cost'
+        ]
+
+
+class BikeImportSerializer(serializers.ModelSerializer):
+    """One row of a catalog import file (see api/catalog_import.py). The brand is given by name."""
+    brand = serializers.CharField(max_length=100)
+    main_image = serializers.CharField(max_length=100)
+
+    class Meta:
+        model = Bike
+        fields = [
+            'brand', 'model_name', 'year', 'price', 'fuel_type', 'engine_capacity', 'mileage',
+            'condition', 'description', 'specifications', 'features', 'main_image', 'images',
+            'is_featured', 'is_trending', 'stock_quantity'
+        ]
+
+    def validate_brand(self, value):
+        return value.strip()
+
+    def validate_specifications(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Must be an object")
+        return value
+
+    def validate_features(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Must be a list")
+        return value
+
+    def validate_images(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Must be a list")
+        return value
+
+
 class ShowroomSerializer(serializers.ModelSerializer):
     brands = BrandSerializer(many=True, read_only=True)
+    image_variants = ImageVariantsField()
+    # Only set on results of a ``near=`` query (see ShowroomListView).
+    distance_km = serializers.FloatField(read_only=True, required=False)
     brand_ids = serializers.ListField(
         child=serializers.IntegerField(), 
         write_only=True, 
@@ -104,6 +168,32 @@ class TestRideSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['user', 'created_at', 'updated_at']
 
+    def validate(self, attrs):
+        slot_fields = ['showroom', 'preferred_date', 'preferred_time']
+        if self.instance is None:
+            slots.validate_slot(*(attrs[field] for field in slot_fields))
+            return attrs
+        # Only a changed slot is checked, so staff can still update (e.g. complete) a ride whose slot has passed.
+        slot = [attrs.get(field, getattr(self.instance, field)) for field in slot_fields]
+        if slot != [getattr(self.instance, field) for field in slot_fields]:
+            slots.validate_slot(*slot)
+        return attrs
+
+
+class TestRideAvailabilitySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    bike = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        start = attrs.setdefault('start', timezone.localdate())
+        end = attrs.setdefault('end', start + timedelta(days=6))
+        if end < start:
+            raise serializers.ValidationError("end must not be before start")
+        if (end - start).days >= slots.MAX_AVAILABILITY_DAYS:
+            raise serializers.ValidationError(f"At most {slots.MAX_AVAILABILITY_DAYS} days at a time")
+        return attrs
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
@@ -134,6 +224,16 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at']
 
 
+class MarkNotificationsReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs['all'] == ('ids' in attrs):
+            raise serializers.ValidationError("Pass either ids or all")
+        return attrs
+
+
 class UpcomingLaunchSerializer(serializers.ModelSerializer):
     brand_name = serializers.CharField(source='brand.name', read_only=True)
 
@@ -144,6 +244,7 @@ class UpcomingLaunchSerializer(serializers.ModelSerializer):
 
 class UsedBikeListingSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
+    main_image_variants = ImageVariantsField()
 
     class Meta:
         model = UsedBikeListing
@@ -163,7 +264,51 @@ class EMICalculatorSerializer(serializers.Serializer):
         return attrs
 
 
+class BatchEMICalculatorSerializer(serializers.Serializer):
+    MAX_QUOTES = 5000
+
+    principal_amounts = serializers.ListField(
+        child=serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0), min_length=1, max_length=50
+    )
+    down_payments = serializers.ListField(
+        child=serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0), min_length=1, max_length=50
+    )
+    interest_rates = serializers.ListField(
+        child=serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0), min_length=1, max_length=50
+    )
+    tenures_months = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=360), min_length=1, max_length=50
+    )
+    include_schedules = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        size = 1
+        for field in ['principal_amounts', 'down_payments', 'interest_rates', 'tenures_months']:
+            size *= len(attrs[field])
+        if size > self.MAX_QUOTES:
+            raise serializers.ValidationError(f"At most {self.MAX_QUOTES} combinations per request")
+        return attrs
+
+
 class FuelCostCalculatorSerializer(serializers.Serializer):
     monthly_km = serializers.DecimalField(max_digits=8, decimal_places=2)
     fuel_price_per_liter = serializers.DecimalField(max_digits=6, decimal_places=2)
     bike_mileage = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+
+class OwnershipCostSerializer(serializers.Serializer):
+    monthly_km = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0)
+    fuel_price_per_liter = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+    electricity_price_per_kwh = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+    # Optional EMI plan, applied to each bike's price
+    down_payment_percent = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100, default=0)
+    interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, required=False)
+    tenure_months = serializers.IntegerField(min_value=1, max_value=360, required=False)
+    ordering = serializers.ChoiceField(
+        choices=[prefix + field for field in OWNERSHIP_SORT_FIELDS for prefix in ('', '-')], default='monthly_cost'
+    )
+
+    def validate(self, attrs):
+        if ('interest_rate' in attrs) != ('tenure_months' in attrs):
+            raise serializers.ValidationError("interest_rate and tenure_months must be given together")
+        return attrs
@@ -0,0 +1,218 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import authentication, autocomplete, counters, images, price_alerts, search, specs, sqlite
+from .cache import bump_version
+from .models import Bike, Brand, Notification, Review, Showroom, UpcomingLaunch, UsedBikeListing
+from .ratings import refresh_rating_summary
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_bike(sender, instance, raw, **kwargs):
+    # A review can be moved to another bike; keep the old one so its summary is refreshed too.
+    instance._previous_bike_id = None
+    if instance.pk and not raw:
+        instance._previous_bike_id = (
+            Review.objects.filter(pk=instance.pk).values_list('bike_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, **kwargs):
+    refresh_rating_summary(instance.bike_id)
+    previous_bike_id = getattr(instance, '_previous_bike_id', None)
+    if previous_bike_id and previous_bike_id != instance.bike_id:
+        refresh_rating_summary(previous_bike_id)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, **kwargs):
+    refresh_rating_summary(instance.bike_id)
+
+
+@receiver(post_save, sender=Bike)
+def update_search_index_on_bike_save(sender, instance, **kwargs):
+    search.index_bikes([instance.pk])
+
+
+@receiver(post_save, sender=Bike)
+def update_spec_index_on_bike_save(sender, instance, **kwargs):
+    specs.index_bike(instance)
+
+
+@receiver(post_delete, sender=Bike)
+def update_search_index_on_bike_delete(sender, instance, **kwargs):
+    search.remove_bikes([instance.pk])
+
+
+@receiver(post_save, sender=Brand)
+def update_search_index_on_brand_save(sender, instance, created, **kwargs):
+    if not created:
+        search.index_brand(instance.pk)
+
+
+@receiver(post_save, sender=Bike)
+@receiver(post_delete, sender=Bike)
+def update_autocomplete_on_bike_change(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: autocomplete.record_change('bike', pk))
+
+
+@receiver(post_save, sender=Brand)
+def update_autocomplete_on_brand_change(sender, instance, created, **kwargs):
+    if not created:
+        pk = instance.pk
+        transaction.on_commit(lambda: autocomplete.record_change('brand', pk))
+
+
+@receiver(post_save, sender=Bike)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Showroom)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=UpcomingLaunch)
+@receiver(post_delete, sender=Bike)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Showroom)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=UpcomingLaunch)
+def bump_cache_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@receiver(m2m_changed, sender=Showroom.brands.through)
+def bump_showroom_version_on_brands_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: bump_version(Showroom))
+
+
+@receiver(post_save, sender=Bike)
+def count_bike_save(sender, created, **kwargs):
+    if created:
+        counters.adjust('bikes', 1)
+
+
+@receiver(post_delete, sender=Bike)
+def count_bike_delete(sender, **kwargs):
+    counters.adjust('bikes', -1)
+
+
+@receiver(post_save, sender=Review)
+def count_review_save(sender, created, **kwargs):
+    if created:
+        counters.adjust('reviews', 1)
+
+
+@receiver(post_delete, sender=Review)
+def count_review_delete(sender, **kwargs):
+    counters.adjust('reviews', -1)
+
+
+@receiver(pre_save, sender=Notification)
+def count_notification_read_change(sender, instance, raw, **kwargs):
+    if not instance.pk or raw:
+        return
+    # A conditional UPDATE rather than comparing the row before and after the save: of concurrent
+    # saves making the same change, only the one whose UPDATE matched adjusts the counter.
+    with transaction.atomic():
+        changed = Notification.objects.filter(pk=instance.pk, is_read=not instance.is_read).update(
+            is_read=instance.is_read
+        )
+        counters.adjust_unread([instance.user_id], -changed if instance.is_read else changed)
+
+
+@receiver(post_save, sender=Notification)
+def count_notification_save(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        counters.adjust_unread([instance.user_id], 1)
+
+
+@receiver(post_delete, sender=Notification)
+def count_notification_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        counters.adjust_unread([instance.user_id], -1)
+
+
+@receiver(pre_save, sender=Showroom)
+def remember_showroom_active(sender, instance, raw, **kwargs):
+    instance._was_active = False
+    if instance.pk and not raw:
+        instance._was_active = bool(
+            Showroom.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Showroom)
+def count_showroom_save(sender, instance, **kwargs):
+    counters.adjust('active_showrooms', int(instance.is_active) - int(getattr(instance, '_was_active', False)))
+
+
+@receiver(post_delete, sender=Showroom)
+def count_showroom_delete(sender, instance, **kwargs):
+    if instance.is_active:
+        counters.adjust('active_showrooms', -1)
+
+
+@receiver(pre_save, sender=Brand)
+@receiver(pre_save, sender=Bike)
+@receiver(pre_save, sender=Showroom)
+@receiver(pre_save, sender=UsedBikeListing)
+def remember_images(sender, instance, raw, **kwargs):
+    fields = [field for pair in images.IMAGE_FIELDS[sender._meta.label_lower] for field in pair]
+    instance._previous_images = {}
+    if instance.pk and not raw:
+        instance._previous_images = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Bike)
+@receiver(post_save, sender=Showroom)
+@receiver(post_save, sender=UsedBikeListing)
+def generate_image_variants(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_images', {})
+    for image_field, variants_field in images.IMAGE_FIELDS[sender._meta.label_lower]:
+        name = getattr(instance, image_field).name
+        if name == previous.get(image_field):
+            continue
+        if previous.get(variants_field):
+            replaced = list(previous[variants_field].values())
+            transaction.on_commit(lambda names=replaced: images.delete_variants(names))
+        if name:
+            transaction.on_commit(lambda f=image_field, v=variants_field: images.schedule(instance, f, v))
+        elif getattr(instance, variants_field):
+            setattr(instance, variants_field, {})
+            sender.objects.filter(pk=instance.pk).update(**{variants_field: {}})
+
+
+@receiver(pre_save, sender=Bike)
+def remember_bike_price(sender, instance, raw, **kwargs):
+    instance._previous_price = None
+    if instance.pk and not raw:
+        instance._previous_price = Bike.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+
+
+@receiver(post_save, sender=Bike)
+def notify_price_drop(sender, instance, created, raw, **kwargs):
+    old_price = getattr(instance, '_previous_price', None)
+    if created or raw or old_price is None:
+        return
+    pk, new_price = instance.pk, instance.price
+    transaction.on_commit(lambda: price_alerts.schedule(pk, old_price, new_price))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    pk = instance.pk
+    authentication.forget_user(pk)
+    # Again once committed: a request may have cached the old row under the version bumped above.
+    transaction.on_commit(lambda: authentication.forget_user(pk))
+
+
+@receiver(connection_created)
+def configure_database_connection(sender, connection, **kwargs):
+    sqlite.configure_connection(connection)
@@ -0,0 +1,110 @@
+"""Feature-vector similarity between bikes.
+
+Every bike becomes a row of a float32 matrix: z-scored price (log scale),
+engine capacity, mileage and year, followed by one-hot fuel type, condition
+and brand columns. Each group is scaled by a weight, so the plain Euclidean
+distance between rows is the weighted distance between bikes. Top-k for a
+block of bikes is computed at once from ``|a|^2 + |b|^2 - 2ab``.
+
+``compute_similar_bikes`` runs this over the whole catalog and stores the
+results in ``SimilarBike`` for SimilarBikesView to read.
+"""
+import numpy as np
+from django.db import transaction
+
+from .models import Bike, SimilarBike
+
+NUMERIC_WEIGHTS = {
+    'price': 2.0,
+    'engine_capacity': 1.5,
+    'mileage': 1.0,
+    'year': 0.5,
+}
+CATEGORY_WEIGHTS = {
+    'fuel_type': 1.5,
+    'condition': 0.5,
+    'brand_id': 1.0,
+}
+
+
+def load_catalog():
+    """Return ``(ids, columns)`` where ``columns`` maps field name to a NumPy array."""
+    fields = ['id', *NUMERIC_WEIGHTS, *CATEGORY_WEIGHTS]
+    rows = list(Bike.objects.order_by('id').values_list(*fields))
+    columns = {
+        field: np.array([row[i] for row in rows], dtype=object)
+        for i, field in enumerate(fields)
+    }
+    return columns.pop('id').astype(np.int64), columns
+
+
+def feature_matrix(columns):
+    blocks = []
+    for field, weight in NUMERIC_WEIGHTS.items():
+        values = columns[field].astype(np.float64)
+        if field == 'price':
+            values = np.log1p(np.maximum(values, 0))
+        std = values.std()
+        values = (values - values.mean()) / (std if std > 0 else 1.0)
+        blocks.append((values * weight)[:, None])
+    for field, weight in CATEGORY_WEIGHTS.items():
+        categories, codes = np.unique(columns[field].astype(str), return_inverse=True)
+        # Scaled so that two bikes in different categories are ``weight`` apart.
+        one_hot = np.zeros((len(codes), len(categories)))
+        one_hot[np.arange(len(codes)), codes] = weight / np.sqrt(2)
+        blocks.append(one_hot)
+    return np.hstack(blocks).astype(np.float32)
+
+
+def top_k(matrix, k, batch_size=256):
+    """Yield ``(row, neighbour_rows, distances)`` with the ``k`` nearest rows of every row, nearest first."""
+    n = len(matrix)
+    k = min(k, n - 1)
+    if k <= 0:
+        return
+    norms = np.einsum('ij,ij->i', matrix, matrix)
+    for start in range(0, n, batch_size):
+        block = matrix[start:start + batch_size]
+        # |a|^2 is constant within a row, so it is only added back for the k winners.
+        scores = block @ matrix.T
+        scores *= -2.0
+        scores += norms
+        rows = np.arange(start, start + len(block))
+        scores[np.arange(len(block)), rows] = np.inf
+        nearest = np.argpartition(scores, k, axis=1)[:, :k]
+        nearest_scores = np.take_along_axis(scores, nearest, axis=1)
+        order = np.argsort(nearest_scores, axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        squared = np.take_along_axis(nearest_scores, order, axis=1) + norms[rows, None]
+        nearest_distances = np.sqrt(np.maximum(squared, 0))
+        for i, row in enumerate(rows):
+            yield row, nearest[i], nearest_distances[i]
+
+
+def compute_similar_bikes(k=6, batch_size=256, write_batch_size=5000):
+    """Recompute and store the ``k`` most similar bikes of every bike. Returns the rows written."""
+    ids, columns = load_catalog()
+    # Computed before the write transaction, which then only writes: on SQLite it holds
+    # the database's one write lock, and other writers wait for it.
+    nearest = list(top_k(feature_matrix(columns), k, batch_size)) if len(ids) >= 2 else []
+    written = 0
+    with transaction.atomic():
+        SimilarBike.objects.all().delete()
+        pending = []
+        for row, neighbours, distances in nearest:
+            for rank, (neighbour, distance) in enumerate(zip(neighbours, distances), start=1):
+                pending.append(SimilarBike(
+                    bike_id=int(ids[row]),
+                    similar_bike_id=int(ids[neighbour]),
+                    rank=rank,
+                    # 1 for identical feature vectors, approaching 0 as they drift apart.
+                    score=float(1.0 / (1.0 + distance)),
+                ))
+            if len(pending) >= write_batch_size:
+                SimilarBike.objects.bulk_create(pending)
+                written += len(pending)
+                pending = []
+        if pending:
+            SimilarBike.objects.bulk_create(pending)
+            written += len(pending)
+    return written
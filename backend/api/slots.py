@@ -0,0 +1,130 @@
+"""Test-ride slots: availability and conflict-free booking.
+
+A showroom runs test rides in fixed slots, every ``test_ride_slot_minutes``
+from ``test_ride_opens_at`` until ``test_ride_closes_at``. A slot takes up to
+``test_ride_capacity`` rides, and at most ``BIKE_SLOT_CAPACITY`` of them on the
+same bike (the showroom's demo unit). Cancelled rides free their place.
+
+Availability is one grouped range query over the covering
+``testride_showroom_slot_idx`` index. ``reserve`` checks a slot inside the
+booking transaction after writing its ``TestRideSlot`` row: that write takes
+the row lock on PostgreSQL and the database write lock on SQLite, so
+concurrent bookings of one slot are counted one after the other.
+"""
+import datetime
+
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import APIException
+
+from .models import TestRide, TestRideSlot
+
+BIKE_SLOT_CAPACITY = 1
+MAX_AVAILABILITY_DAYS = 31
+INACTIVE_STATUSES = ['cancelled']
+
+
+class SlotUnavailable(APIException):
+    status_code = 409
+    default_detail = 'This test ride slot is fully booked.'
+    default_code = 'slot_unavailable'
+
+
+def slot_times(showroom):
+    """Start times of the showroom's slots on any day."""
+    step = datetime.timedelta(minutes=showroom.test_ride_slot_minutes)
+    day = datetime.date.min
+    current = datetime.datetime.combine(day, showroom.test_ride_opens_at)
+    closes = datetime.datetime.combine(day, showroom.test_ride_closes_at)
+    times = []
+    while current + step <= closes:
+        times.append(current.time())
+        current += step
+    return times
+
+
+def is_past(date, time, now=None):
+    now = timezone.localtime(now)
+    return (date, time) <= (now.date(), now.time())
+
+
+def validate_slot(showroom, date, time):
+    if time not in slot_times(showroom):
+        raise serializers.ValidationError(
+            {'preferred_time': f'Not a test ride slot at {showroom.name}; see its availability.'}
+        )
+    if is_past(date, time):
+        raise serializers.ValidationError({'preferred_date': 'This slot has already started.'})
+
+
+def active_rides():
+    return TestRide.objects.exclude(status__in=INACTIVE_STATUSES)
+
+
+def availability(showroom, start, end, bike_id=None):
+    """Free slots per day from ``start`` to ``end``, with the number of rides each can still take."""
+    booked = {
+        (row['preferred_date'], row['preferred_time']): row
+        for row in active_rides()
+        .filter(showroom=showroom, preferred_date__range=(start, end))
+        .values('preferred_date', 'preferred_time')
+        .annotate(total=Count('id'), on_bike=Count('id', filter=Q(bike_id=bike_id)))
+        .order_by()
+    }
+    times = slot_times(showroom)
+    now = timezone.localtime()
+    days = []
+    date = start
+    while date <= end:
+        slots = []
+        for time in times:
+            if is_past(date, time, now):
+                continue
+            row = booked.get((date, time), {'total': 0, 'on_bike': 0})
+            if bike_id is not None and row['on_bike'] >= BIKE_SLOT_CAPACITY:
+                continue
+            available = showroom.test_ride_capacity - row['total']
+            if available > 0:
+                slots.append({'time': time, 'available': available})
+        days.append({'date': date, 'slots': slots})
+        date += datetime.timedelta(days=1)
+    return days
+
+
+def reserve(showroom, bike_id, date, time, exclude_id=None):
+    """Raise SlotUnavailable unless one more ride fits the slot. Call inside ``transaction.atomic``.
+
+    The caller saves the ride in the same transaction, so the slot stays locked until it commits.
+    """
+    # A write first: SQLite takes its write lock now rather than failing to upgrade a read lock later.
+    TestRideSlot.objects.bulk_create([TestRideSlot(showroom=showroom, date=date, time=time)], ignore_conflicts=True)
+    TestRideSlot.objects.filter(showroom=showroom, date=date, time=time).update(reserved_at=timezone.now())
+    rides = active_rides().filter(showroom=showroom, preferred_date=date, preferred_time=time)
+    if exclude_id is not None:
+        rides = rides.exclude(pk=exclude_id)
+    counts = rides.aggregate(total=Count('id'), on_bike=Count('id', filter=Q(bike_id=bike_id)))
+    if counts['total'] >= showroom.test_ride_capacity:
+        raise SlotUnavailable()
+    if counts['on_bike'] >= BIKE_SLOT_CAPACITY:
+        raise SlotUnavailable('This bike is already booked for a test ride in this slot.')
+
+
+def slot_to_reserve(validated_data, instance=None):
+    """``(showroom, bike_id, date, time)`` a create or update must reserve, or ``None`` if it keeps its place.
+
+    Updates reserve when they move an active ride to another slot or bike, or reactivate a cancelled one.
+    """
+    def value(field):
+        if field in validated_data:
+            return validated_data[field]
+        return getattr(instance, field) if instance is not None else TestRide._meta.get_field(field).default
+
+    if value('status') in INACTIVE_STATUSES:
+        return None
+    fields = ['showroom', 'bike', 'preferred_date', 'preferred_time']
+    if instance is not None and instance.status not in INACTIVE_STATUSES:
+        if all(value(field) == getattr(instance, field) for field in fields):
+            return None
+    showroom, bike, date, time = (value(field) for field in fields)
+    return showroom, bike.pk, date, time
@@ -0,0 +1,141 @@
+"""Typed index of bike specifications and features.
+
+``Bike.specifications`` (a JSON object) and ``Bike.features`` (a JSON list)
+are free-form, so the database cannot index them. Every scalar
+specification becomes a ``BikeSpec`` row holding the normalized key, the
+value as lowercase text and, when it starts with a number ("160 km/h"),
+that number. Every feature becomes a row with the key ``feature``. Rows are
+rewritten from Bike signals and catalog imports; ``rebuild_spec_index``
+(the rebuild_spec_index command) backfills them in bulk.
+
+BikeListView accepts ``spec.<key>=<value>`` (case-insensitive text match)
+and ``spec.<key>__gt|gte|lt|lte=<number>`` params. Each one becomes an
+``id IN (...)`` subquery answered from the (key, text, bike) or
+(key, number, bike) index.
+"""
+import re
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Bike, BikeSpec
+
+PARAM_PREFIX = 'spec.'
+FEATURE_KEY = 'feature'
+NUMBER_LOOKUPS = ['gt', 'gte', 'lt', 'lte']
+
+_NUMBER_RE = re.compile(r'^\s*([-+]?\d[\d,]*(?:\.\d+)?|[-+]?\.\d+)')
+_KEY_RE = re.compile(r'[^a-z0-9]+')
+KEY_LENGTH = BikeSpec._meta.get_field('key').max_length
+TEXT_LENGTH = BikeSpec._meta.get_field('text').max_length
+
+
+def normalize_key(key):
+    """``"Top Speed"`` -> ``"top_speed"``."""
+    return _KEY_RE.sub('_', str(key).lower()).strip('_')[:KEY_LENGTH]
+
+
+def normalize_text(value):
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    return str(value).strip().lower()[:TEXT_LENGTH]
+
+
+def parse_number(value):
+    """The number a value starts with, if any: ``"1,200 mm"`` -> 1200.0."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.match(str(value))
+    return float(match.group(1).replace(',', '')) if match else None
+
+
+def spec_values(specifications, features):
+    """``(key, number, text)`` for every scalar specification and every feature."""
+    values = {}
+    if isinstance(specifications, dict):
+        for key, value in specifications.items():
+            key = normalize_key(key)
+            if key and key != FEATURE_KEY and value is not None and not isinstance(value, (dict, list)):
+                values[key, normalize_text(value)] = parse_number(value)
+    if isinstance(features, list):
+        for feature in features:
+            if isinstance(feature, str) and feature.strip():
+                values[FEATURE_KEY, normalize_text(feature)] = None
+    return [(key, number, text) for (key, text), number in values.items()]
+
+
+def spec_rows(bike_id, specifications, features):
+    return [
+        BikeSpec(bike_id=bike_id, key=key, number=number, text=text)
+        for key, number, text in spec_values(specifications, features)
+    ]
+
+
+def index_bike(bike):
+    """Rewrite the rows of one saved bike from its in-memory fields."""
+    with transaction.atomic():
+        BikeSpec.objects.filter(bike_id=bike.pk).delete()
+        BikeSpec.objects.bulk_create(spec_rows(bike.pk, bike.specifications, bike.features))
+
+
+def index_bikes(bike_ids):
+    """Rewrite the rows of the given bikes from the database."""
+    bike_ids = list(bike_ids)
+    if not bike_ids:
+        return
+    rows = []
+    for pk, specifications, features in Bike.objects.filter(pk__in=bike_ids).values_list(
+        'pk', 'specifications', 'features'
+    ):
+        rows += spec_rows(pk, specifications, features)
+    with transaction.atomic():
+        BikeSpec.objects.filter(bike_id__in=bike_ids).delete()
+        BikeSpec.objects.bulk_create(rows)
+
+
+def rebuild_spec_index(batch_size=2000):
+    """Rebuild every row from the bike table. Returns the number of rows written."""
+    written = 0
+    with transaction.atomic():
+        BikeSpec.objects.all().delete()
+        rows = []
+        bikes = Bike.objects.values_list('pk', 'specifications', 'features').iterator(chunk_size=batch_size)
+        for pk, specifications, features in bikes:
+            rows += spec_rows(pk, specifications, features)
+            if len(rows) >= batch_size:
+                BikeSpec.objects.bulk_create(rows)
+                written += len(rows)
+                rows = []
+        BikeSpec.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def parse_param(param, value):
+    """``BikeSpec`` lookups for one ``spec.<key>[__<lookup>]`` query param."""
+    key, _, lookup = param[len(PARAM_PREFIX):].partition('__')
+    key = normalize_key(key)
+    if not key:
+        raise ValidationError({param: ['Name a specification, e.g. spec.top_speed__gte=120.']})
+    if not lookup or lookup == 'exact':
+        return {'key': key, 'text': normalize_text(value)}
+    if lookup not in NUMBER_LOOKUPS:
+        raise ValidationError({param: [f'Unknown lookup "{lookup}"; use one of {", ".join(NUMBER_LOOKUPS)}.']})
+    number = parse_number(value)
+    if number is None:
+        raise ValidationError({param: ['A number is required.']})
+    return {'key': key, f'number__{lookup}': number}
+
+
+def filter_bikes(queryset, query_params):
+    """Narrow ``queryset`` by the ``spec.`` params of a query string."""
+    for param, values in query_params.lists():
+        if not param.startswith(PARAM_PREFIX):
+            continue
+        for value in values:
+            if value.strip():
+                specs = BikeSpec.objects.filter(**parse_param(param, value))
+                queryset = queryset.filter(pk__in=specs.values('bike_id'))
+    return queryset
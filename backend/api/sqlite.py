@@ -0,0 +1,36 @@
+"""The SQLite production profile.
+
+With ``SQLITE['PRODUCTION']`` on, every new SQLite connection runs
+``SQLITE['PRAGMAS']`` before its first query (the receiver is in
+api/signals.py). WAL lets readers carry on while one connection writes, and
+lets that writer commit without waiting for them; ``busy_timeout`` makes a
+second writer wait for the write lock rather than fail with "database is
+locked". The journal mode is stored in the database file, the others last
+as long as the connection.
+
+Writers still take turns, so requests keep their transactions short and,
+where they read before writing, write first (see api/slots.py): a WAL
+transaction that read an older snapshot can't be upgraded to a write once
+another connection committed, and fails at once whatever the timeout.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(connection):
+    """Run the profile's PRAGMAs on ``connection``; returns ``{pragma: value now in effect}``."""
+    # On the driver connection, like Django's own PRAGMAs: nothing to log or count as a query.
+    conn = connection.connection
+    applied = {}
+    for pragma, value in settings.SQLITE['PRAGMAS'].items():
+        if not pragma.isidentifier():
+            raise ValueError(f'Not a PRAGMA name: {pragma!r}')
+        conn.execute(f'PRAGMA {pragma} = {value}')
+        # No row for settings the database doesn't have, e.g. mmap_size in memory.
+        row = conn.execute(f'PRAGMA {pragma}').fetchone()
+        applied[pragma] = row[0] if row else None
+    return applied
+
+
+def configure_connection(connection):
+    if connection.vendor == 'sqlite' and settings.SQLITE['PRODUCTION']:
+        apply_pragmas(connection)
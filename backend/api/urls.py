@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # Authentication
@@ -14,15 +14,20 @@ urlpatterns = [
     
     # Bikes
     path('bikes/', views.BikeListView.as_view(), name='bike-list'),
+    path('bikes/facets/', views.bike_facets, name='bike-facets'),
+    path('bikes/export/', views.BikeExportView.as_view(), name='bike-export'),
+    path('bikes/ownership-cost/', views.BikeOwnershipCostView.as_view(), name='bike-ownership-cost'),
     path('bikes/<int:pk>/', views.BikeDetailView.as_view(), name='bike-detail'),
     path('bikes/<int:bike_id>/similar/', views.SimilarBikesView.as_view(), name='similar-bikes'),
     
     # Showrooms
     path('showrooms/', views.ShowroomListView.as_view(), name='showroom-list'),
     path('showrooms/<int:pk>/', views.ShowroomDetailView.as_view(), name='showroom-detail'),
+    path('showrooms/<int:pk>/availability/', views.test_ride_availability, name='test-ride-availability'),
     
     # Test Rides
     path('test-rides/', views.TestRideListView.as_view(), name='test-ride-list'),
+    path('test-rides/export/', views.TestRideExportView.as_view(), name='test-ride-export'),
     path('test-rides/<int:pk>/', views.TestRideDetailView.as_view(), name='test-ride-detail'),
     
     # Reviews
@@ -36,6 +41,8 @@ urlpatterns = [
     
     # Notifications
     path('notifications/', views.NotificationListView.as_view(), name='notification-list'),
+    path('notifications/unread-count/', views.unread_notification_count, name='notification-unread-count'),
+    path('notifications/mark-read/', views.mark_notifications_read, name='notification-mark-read'),
     path('notifications/<int:pk>/', views.NotificationDetailView.as_view(), name='notification-detail'),
     
     # Upcoming Launches
@@ -43,14 +50,24 @@ urlpatterns = [
     
     # Used Bike Listings
     path('used-bikes/', views.UsedBikeListingListView.as_view(), name='used-bike-list'),
+    path('used-bikes/export/', views.UsedBikeListingExportView.as_view(), name='used-bike-export'),
     path('used-bikes/<int:pk>/', views.UsedBikeListingDetailView.as_view(), name='used-bike-detail'),
     
     # Calculators
     path('calculators/emi/', views.calculate_emi, name='emi-calculator'),
+    path('calculators/emi/batch/', views.calculate_emi_batch, name='emi-batch-calculator'),
     path('calculators/fuel-cost/', views.calculate_fuel_cost, name='fuel-cost-calculator'),
     
     # Utility endpoints
     path('compare/', views.compare_bikes, name='compare-bikes'),
     path('search/suggestions/', views.search_suggestions, name='search-suggestions'),
     path('dashboard/stats/', views.dashboard_stats, name='dashboard-stats'),
+    path('metrics/response-cache/', views.response_cache_metrics, name='response-cache-metrics'),
+    
+    # Async variants of the hot read endpoints (for ASGI deployments)
+    path('async/bikes/', async_views.bike_list, name='async-bike-list'),
+    path('async/bikes/<int:pk>/', async_views.bike_detail, name='async-bike-detail'),
+    path('async/search/suggestions/', async_views.search_suggestions, name='async-search-suggestions'),
+    path('async/dashboard/stats/', async_views.dashboard_stats, name='async-dashboard-stats'),
+    path('async/compare/', async_views.compare_bikes, name='async-compare-bikes'),
 ]
@@ -1,14 +1,23 @@
 from rest_framework import generics, status, filters
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from django.db import transaction
 from django.db.models import Q, Avg, Count
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.conf import settings
+from django.http import HttpResponse, QueryDict, StreamingHttpResponse
 from rest_framework_simplejwt.tokens import RefreshToken
 from decimal import Decimal
+from urllib.parse import urlencode
+import copy
 import math
 
 from .models import (
@@ -17,12 +26,22 @@ from .models import (
 )
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, BrandSerializer, 
-    BikeSerializer, BikeListSerializer, ShowroomSerializer, 
-    TestRideSerializer, ReviewSerializer, FavoriteSerializer,
-    NotificationSerializer, UpcomingLaunchSerializer, 
-    UsedBikeListingSerializer, EMICalculatorSerializer,
-    FuelCostCalculatorSerializer
+    BikeSerializer, BikeListSerializer, BikeOwnershipCostSerializer, ShowroomSerializer, 
+    TestRideSerializer, TestRideAvailabilitySerializer, ReviewSerializer, FavoriteSerializer,
+    NotificationSerializer, MarkNotificationsReadSerializer, UpcomingLaunchSerializer, 
+    UsedBikeListingSerializer, EMICalculatorSerializer, BatchEMICalculatorSerializer,
+    FuelCostCalculatorSerializer, OwnershipCostSerializer
 )
+from . import autocomplete, comparison, counters, facets, finance, geo, ownership, response_cache, slots
+from .cache import get_or_set_locked, versioned_key
+from .conditional import ConditionalGetMixin
+from .export import ExportMixin
+from .filters import BikeSearchFilter, BikeSpecFilter, NotificationFilter
+from .pagination import KeysetPagination
+from .response_cache import CachedResponseMixin
+
+# Models whose changes invalidate the cached dashboard_stats response.
+DASHBOARD_STATS_MODELS = [Bike, Brand, Showroom, Review, UpcomingLaunch]
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -69,26 +88,34 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        if user.get_deferred_fields():
+            # Built from the auth cache with only pk and is_active loaded (see api/authentication.py).
+            return User.objects.get(pk=user.pk)
+        return user
 
 
-class BrandListView(generics.ListCreateAPIView):
+class BrandListView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    validator_models = [Brand]
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
-class BrandDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BrandDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    validator_models = [Brand]
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
-class BikeListView(generics.ListCreateAPIView):
-    queryset = Bike.objects.all()
+class BikeListView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    validator_models = [Bike, Brand, Review]
+    queryset = Bike.objects.select_related('brand')
     serializer_class = BikeListSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, BikeSpecFilter, BikeSearchFilter, filters.OrderingFilter]
     filterset_fields = ['brand', 'fuel_type', 'condition', 'year', 'is_featured', 'is_trending']
     search_fields = ['model_name', 'brand__name', 'description']
     ordering_fields = ['price', 'created_at', 'year', 'mileage']
@@ -118,8 +145,112 @@ class BikeListView(generics.ListCreateAPIView):
         return queryset
 
 
-class BikeDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Bike.objects.all()
+def filtered_bikes(request, params=None):
+    """BikeListView's queryset with its filter backends applied to ``request``'s params.
+
+    ``params``, ``(param, value)`` pairs, replace the query string when given.
+    """
+    if params is not None:
+        request = copy.copy(request)
+        request.GET = QueryDict(urlencode(params))
+    view = BikeListView()
+    view.setup(request)
+    view.request = view.initialize_request(request)
+    view.format_kwarg = None
+    return view.filter_queryset(view.get_queryset())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def bike_facets(request):
+    """Counts per brand, fuel type, condition, year, price and engine capacity for BikeListView's filters."""
+    params = facets.normalize(request.query_params)
+    key = versioned_key('bike_facets', [Bike, Brand], facets.cache_digest(params))
+    counts = get_or_set_locked(
+        key,
+        lambda: facets.facet_counts(lambda rest: filtered_bikes(request._request, rest), params),
+        settings.BIKE_FACETS['TIMEOUT'],
+    )
+    return Response(counts)
+
+
+class BikeExportView(ExportMixin, BikeListView):
+    """Every bike matching BikeListView's filters, streamed as CSV or NDJSON (see api/export.py)."""
+    export_name = 'bikes'
+    export_fields = {
+        'id': 'id', 'brand': 'brand_id', 'brand_name': 'brand__name', 'model_name': 'model_name',
+        'year': 'year', 'price': 'price', 'fuel_type': 'fuel_type', 'engine_capacity': 'engine_capacity',
+        'mileage': 'mileage', 'condition': 'condition', 'is_featured': 'is_featured',
+        'is_trending': 'is_trending', 'stock_quantity': 'stock_quantity',
+        'average_rating': 'rating_average', 'total_reviews': 'rating_count',
+        'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+
+
+class BikeOwnershipCostView(generics.ListAPIView):
+    """BikeListView's filters, ranked by monthly/yearly cost of ownership (see api/ownership.py)."""
+    queryset = Bike.objects.select_related('brand')
+    serializer_class = BikeOwnershipCostSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = PageNumberPagination
+    filterset_fields = BikeListView.filterset_fields
+    search_fields = BikeListView.search_fields
+
+    def list(self, request, *args, **kwargs):
+        params = OwnershipCostSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        filterset = DjangoFilterBackend().get_filterset(request, self.get_queryset(), self)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        ranges = {}
+        for column, prefix in [('price', 'price'), ('engine_capacity', 'cc')]:
+            try:
+                ranges[column] = tuple(
+                    float(value) if value else None
+                    for value in (request.query_params.get(f'min_{prefix}'), request.query_params.get(f'max_{prefix}'))
+                )
+            except ValueError:
+                raise ValidationError({prefix: f'min_{prefix} and max_{prefix} must be numbers.'})
+        # Filters the columns don't hold narrow the mask to the ids they match; each returns its input unused.
+        bikes = Bike.objects.all()
+        matching = BikeSearchFilter().filter_queryset(request, BikeSpecFilter().filter_queryset(request, bikes, self), self)
+        ids = None if matching is bikes else matching.values_list('id', flat=True)
+
+        columns = ownership.get_columns()
+        emi_plan = None
+        if 'tenure_months' in params:
+            emi_plan = {
+                'down_payment_percent': float(params['down_payment_percent']),
+                'interest_rate': float(params['interest_rate']),
+                'tenure_months': params['tenure_months'],
+            }
+        costs = columns.costs(
+            columns.mask(filterset.form.cleaned_data, ranges, ids),
+            float(params['monthly_km']),
+            float(params['fuel_price_per_liter']),
+            float(params['electricity_price_per_kwh']),
+            emi_plan,
+        )
+        page = self.paginate_queryset(ownership.rank(costs, params['ordering']))
+
+        bikes = self.get_queryset().in_bulk([int(costs['ids'][position]) for position in page])
+        results = []
+        for position in page:
+            bike = bikes.get(int(costs['ids'][position]))
+            if bike is None:
+                continue  # deleted since the columns were built
+            for field in ['monthly_energy_cost', 'monthly_emi', 'monthly_cost', 'yearly_cost']:
+                value = costs[field][position]
+                setattr(bike, field, None if math.isnan(value) else round(float(value), 2))
+            results.append(bike)
+        return self.get_paginated_response(self.get_serializer(results, many=True).data)
+
+
+class BikeDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    validator_models = [Bike, Brand, Review]
+    queryset = Bike.objects.select_related('brand')
     serializer_class = BikeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -127,29 +258,65 @@ class BikeDetailView(generics.RetrieveUpdateDestroyAPIView):
 class SimilarBikesView(generics.ListAPIView):
     serializer_class = BikeListSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = []
 
     def get_queryset(self):
         bike_id = self.kwargs['bike_id']
+        # Precomputed by the compute_similar_bikes command.
+        similar = list(
+            Bike.objects.select_related('brand')
+            .filter(similar_to__bike_id=bike_id)
+            .order_by('similar_to__rank')[:6]
+        )
+        if similar:
+            return similar
+        # Bikes added since the last run fall back to a simple heuristic.
         try:
             bike = Bike.objects.get(id=bike_id)
-            return Bike.objects.filter(
-                Q(brand=bike.brand) | Q(fuel_type=bike.fuel_type) | Q(price__range=[bike.price * 0.8, bike.price * 1.2])
-            ).exclude(id=bike_id)[:6]
+            return list(Bike.objects.select_related('brand').filter(
+                Q(brand_id=bike.brand_id) | Q(fuel_type=bike.fuel_type) | Q(price__range=[bike.price * Decimal('0.8'), bike.price * Decimal('1.2')])
+            ).exclude(id=bike_id)[:6])
         except Bike.DoesNotExist:
-            return Bike.objects.none()
+            return []
 
 
-class ShowroomListView(generics.ListCreateAPIView):
-    queryset = Showroom.objects.filter(is_active=True)
+class ShowroomListView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    validator_models = [Showroom, Brand]
+    queryset = Showroom.objects.filter(is_active=True).prefetch_related('brands')
     serializer_class = ShowroomSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['city', 'state', 'brands']
     search_fields = ['name', 'city', 'state']
 
-
-class ShowroomDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Showroom.objects.all()
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        near = self.request.query_params.get('near')
+        if not near:
+            return queryset
+        try:
+            lat, lng = (float(value) for value in near.split(','))
+        except ValueError:
+            raise ValidationError({'near': 'Expected "lat,lng".'})
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValidationError({'near': 'Coordinates out of range.'})
+        radius_km = self.request.query_params.get('radius_km')
+        k = self.request.query_params.get('k')
+        try:
+            radius_km = float(radius_km) if radius_km else None
+            k = min(int(k), geo.MAX_RADIUS_RESULTS) if k else None
+        except ValueError:
+            raise ValidationError({'near': 'radius_km must be a number and k an integer.'})
+        if (radius_km is not None and radius_km <= 0) or (k is not None and k <= 0):
+            raise ValidationError({'near': 'radius_km and k must be positive.'})
+        if radius_km is None and k is None:
+            k = self.paginator.page_size if self.paginator else 10
+        return geo.nearest_showrooms(queryset, lat, lng, radius_km=radius_km, k=k)
+
+
+class ShowroomDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    validator_models = [Showroom, Brand]
+    queryset = Showroom.objects.prefetch_related('brands')
     serializer_class = ShowroomSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -157,14 +324,31 @@ class ShowroomDetailView(generics.RetrieveUpdateDestroyAPIView):
 class TestRideListView(generics.ListCreateAPIView):
     serializer_class = TestRideSerializer
     permission_classes = [IsAuthenticated]
+    filterset_fields = ['status', 'bike', 'showroom', 'preferred_date']
 
     def get_queryset(self):
+        queryset = TestRide.objects.select_related('user', 'bike__brand', 'showroom')
         if self.request.user.is_staff:
-            return TestRide.objects.all()
-        return TestRide.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            slots.reserve(*slots.slot_to_reserve(serializer.validated_data))
+            serializer.save(user=self.request.user)
+
+
+class TestRideExportView(ExportMixin, TestRideListView):
+    """Every test ride matching TestRideListView's filters, for staff."""
+    permission_classes = [IsAdminUser]
+    export_name = 'test-rides'
+    export_fields = {
+        'id': 'id', 'user': 'user_id', 'username': 'user__username', 'bike': 'bike_id',
+        'brand_name': 'bike__brand__name', 'model_name': 'bike__model_name', 'showroom': 'showroom_id',
+        'showroom_name': 'showroom__name', 'preferred_date': 'preferred_date',
+        'preferred_time': 'preferred_time', 'status': 'status', 'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
 
 
 class TestRideDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -172,20 +356,47 @@ class TestRideDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        queryset = TestRide.objects.select_related('user', 'bike__brand', 'showroom')
         if self.request.user.is_staff:
-            return TestRide.objects.all()
-        return TestRide.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+    def perform_update(self, serializer):
+        slot = slots.slot_to_reserve(serializer.validated_data, serializer.instance)
+        if slot is None:
+            serializer.save()
+            return
+        with transaction.atomic():
+            slots.reserve(*slot, exclude_id=serializer.instance.pk)
+            serializer.save()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def test_ride_availability(request, pk):
+    showroom = get_object_or_404(Showroom, pk=pk, is_active=True)
+    params = TestRideAvailabilitySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    params = params.validated_data
+    return Response({
+        'showroom': showroom.pk,
+        'capacity': showroom.test_ride_capacity,
+        'slot_minutes': showroom.test_ride_slot_minutes,
+        'days': slots.availability(showroom, params['start'], params['end'], params.get('bike')),
+    })
 
 
 class ReviewListView(generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
+        queryset = Review.objects.select_related('user', 'bike')
         bike_id = self.kwargs.get('bike_id')
         if bike_id:
-            return Review.objects.filter(bike_id=bike_id)
-        return Review.objects.all()
+            return queryset.filter(bike_id=bike_id)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -196,9 +407,10 @@ class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        queryset = Review.objects.select_related('user', 'bike')
         if self.request.user.is_staff:
-            return Review.objects.all()
-        return Review.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
 
 
 class FavoriteListView(generics.ListCreateAPIView):
@@ -206,7 +418,7 @@ class FavoriteListView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        return Favorite.objects.filter(user=self.request.user).select_related('bike__brand')
 
     def perform_create(self, serializer):
         bike_id = serializer.validated_data['bike_id']
@@ -232,9 +444,11 @@ class FavoriteDetailView(generics.DestroyAPIView):
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filterset_class = NotificationFilter
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.filter(user=self.request.user).select_related('related_bike')
 
 
 class NotificationDetailView(generics.RetrieveUpdateAPIView):
@@ -242,11 +456,34 @@ class NotificationDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.filter(user=self.request.user).select_related('related_bike')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def unread_notification_count(request):
+    # Served from the user's maintained counter (see api/counters.py), not a COUNT(*).
+    return Response({'unread': counters.get_unread_count(request.user.id)})
 
 
-class UpcomingLaunchListView(generics.ListCreateAPIView):
-    queryset = UpcomingLaunch.objects.all()
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_notifications_read(request):
+    serializer = MarkNotificationsReadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    unread = counters.unread_notifications(request.user.id)
+    if not serializer.validated_data['all']:
+        unread = unread.filter(id__in=serializer.validated_data['ids'])
+    with transaction.atomic():
+        updated = unread.update(is_read=True)
+        # By what was marked, also for "all": notifications committed meanwhile stay counted.
+        counters.adjust_unread([request.user.id], -updated)
+    return Response({'updated': updated, 'unread': counters.get_unread_count(request.user.id)})
+
+
+class UpcomingLaunchListView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    validator_models = [UpcomingLaunch, Brand]
+    queryset = UpcomingLaunch.objects.select_related('brand')
     serializer_class = UpcomingLaunchSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
@@ -254,9 +491,10 @@ class UpcomingLaunchListView(generics.ListCreateAPIView):
 
 
 class UsedBikeListingListView(generics.ListCreateAPIView):
-    queryset = UsedBikeListing.objects.filter(is_approved=True)
+    queryset = UsedBikeListing.objects.filter(is_approved=True).select_related('user')
     serializer_class = UsedBikeListingSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['brand', 'year', 'condition', 'city', 'state']
     search_fields = ['model_name', 'brand', 'city', 'state']
@@ -265,14 +503,27 @@ class UsedBikeListingListView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
+class UsedBikeListingExportView(ExportMixin, UsedBikeListingListView):
+    """Every listing matching UsedBikeListingListView's filters, for staff: rows include seller contacts."""
+    permission_classes = [IsAdminUser]
+    export_name = 'used-bikes'
+    export_fields = {
+        'id': 'id', 'user': 'user_id', 'brand': 'brand', 'model_name': 'model_name', 'year': 'year',
+        'price': 'price', 'mileage': 'mileage', 'condition': 'condition', 'city': 'city', 'state': 'state',
+        'contact_phone': 'contact_phone', 'contact_email': 'contact_email', 'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+
 class UsedBikeListingDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UsedBikeListingSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        queryset = UsedBikeListing.objects.select_related('user')
         if self.request.user.is_staff:
-            return UsedBikeListing.objects.all()
-        return UsedBikeListing.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
 
 
 @api_view(['POST'])
@@ -302,6 +553,24 @@ def calculate_emi(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def calculate_emi_batch(request):
+    serializer = BatchEMICalculatorSerializer(data=request.data)
+    if serializer.is_valid():
+        data = serializer.validated_data
+        grid = finance.quote_grid(
+            data['principal_amounts'], data['down_payments'], data['interest_rates'], data['tenures_months']
+        )
+        if data['include_schedules']:
+            # Schedules can run to hundreds of thousands of rows; write them as they are computed.
+            return StreamingHttpResponse(
+                finance.stream_quotes_json(grid, include_schedules=True), content_type='application/json'
+            )
+        return Response({'count': len(grid['emi']), 'quotes': list(finance.quotes(grid))})
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def calculate_fuel_cost(request):
@@ -327,16 +596,23 @@ def calculate_fuel_cost(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def compare_bikes(request):
-    bike_ids = request.query_params.getlist('bike_ids')
-    if len(bike_ids) < 2 or len(bike_ids) > 3:
-        return Response({'error': 'Please select 2-3 bikes to compare'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    bikes = Bike.objects.filter(id__in=bike_ids)
-    if len(bikes) != len(bike_ids):
+    try:
+        bike_ids = sorted({int(bike_id) for bike_id in request.query_params.getlist('bike_ids')})
+    except ValueError:
+        return Response({'error': 'bike_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(bike_ids) < 2 or len(bike_ids) > comparison.MAX_BIKES:
+        return Response(
+            {'error': f'Please select 2-{comparison.MAX_BIKES} bikes to compare'}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    stamps = comparison.member_stamps(bike_ids)
+    if len(stamps) != len(bike_ids):
         return Response({'error': 'One or more bikes not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    serializer = BikeSerializer(bikes, many=True)
-    return Response(serializer.data)
+
+    matrix = get_or_set_locked(
+        comparison.cache_key(stamps), lambda: comparison.compare(bike_ids), comparison.CACHE_TIMEOUT
+    )
+    return Response(matrix)
 
 
 @api_view(['GET'])
@@ -346,37 +622,42 @@ def search_suggestions(request):
     if len(query) < 2:
         return Response([])
     
-    bikes = Bike.objects.filter(
-        Q(model_name__icontains=query) | Q(brand__name__icontains=query)
-    )[:10]
-    
-    suggestions = []
-    for bike in bikes:
-        suggestions.append({
-            'id': bike.id,
-            'name': f"{bike.brand.name} {bike.model_name}",
-            'price': str(bike.price),
-            'image': bike.main_image.url if bike.main_image else None
-        })
-    
-    return Response(suggestions)
+    return Response(autocomplete.suggest(query, limit=10))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def dashboard_stats(request):
-    total_bikes = Bike.objects.count()
-    total_showrooms = Showroom.objects.filter(is_active=True).count()
-    total_reviews = Review.objects.count()
-    featured_bikes = Bike.objects.filter(is_featured=True)[:6]
-    trending_bikes = Bike.objects.filter(is_trending=True)[:6]
-    upcoming_launches = UpcomingLaunch.objects.filter(is_featured=True)[:6]
+    key = versioned_key('dashboard_stats', DASHBOARD_STATS_MODELS)
+    stats = get_or_set_locked(key, build_dashboard_stats, settings.DASHBOARD_STATS['TIMEOUT'])
+    return Response(stats)
+
+
+def build_dashboard_stats():
+    if settings.DASHBOARD_STATS['USE_COUNTERS']:
+        counts = counters.get_counts(['bikes', 'active_showrooms', 'reviews'])
+        total_bikes = counts['bikes']
+        total_showrooms = counts['active_showrooms']
+        total_reviews = counts['reviews']
+    else:
+        total_bikes = Bike.objects.count()
+        total_showrooms = Showroom.objects.filter(is_active=True).count()
+        total_reviews = Review.objects.count()
+    featured_bikes = Bike.objects.select_related('brand').filter(is_featured=True)[:6]
+    trending_bikes = Bike.objects.select_related('brand').filter(is_trending=True)[:6]
+    upcoming_launches = UpcomingLaunch.objects.select_related('brand').filter(is_featured=True)[:6]
     
-    return Response({
+    return {
         'total_bikes': total_bikes,
         'total_showrooms': total_showrooms,
         'total_reviews': total_reviews,
         'featured_bikes': BikeListSerializer(featured_bikes, many=True).data,
         'trending_bikes': BikeListSerializer(trending_bikes, many=True).data,
         'upcoming_launches': UpcomingLaunchSerializer(upcoming_launches, many=True).data
-    })
+    }
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def response_cache_metrics(request):
+    return HttpResponse(response_cache.metrics(), content_type='text/plain; version=0.0.4')
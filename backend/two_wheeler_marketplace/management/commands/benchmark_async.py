@@ -0,0 +1,71 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+
+from api.benchmarks import isolated_database
+from api.models import Bike
+from api.search import rebuild_search_index
+from api.seed import BRAND_NAMES, seed_bikes, seed_showrooms
+
+
+class Command(BaseCommand):
+    help = 'Compare requests/sec of the WSGI (DRF) and ASGI (async) read endpoints at equal concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--workers', type=int, default=8, help='Threads for WSGI, concurrent tasks for ASGI')
+
+    def handle(self, *args, **options):
+        rng = random.Random(5)
+        with isolated_database():
+            self.stdout.write(f"Seeding {options['bikes']} bikes...")
+            seed_bikes(options['bikes'])
+            seed_showrooms(50)
+            rebuild_search_index()
+            ids = list(Bike.objects.values_list('pk', flat=True))
+
+            paths = {
+                'bike list': lambda: ('bikes/', {'page': rng.randint(1, 20), 'fuel_type': rng.choice(['petrol', 'electric'])}),
+                'bike detail': lambda: (f'bikes/{rng.choice(ids)}/', {}),
+                'search suggestions': lambda: ('search/suggestions/', {'q': rng.choice(BRAND_NAMES)[:3]}),
+                'dashboard stats': lambda: ('dashboard/stats/', {}),
+                'compare': lambda: ('compare/', {'bike_ids': rng.sample(ids, 4)}),
+            }
+            for label, make in paths.items():
+                workload = [make() for _ in range(options['requests'])]
+                wsgi = self.run_wsgi(workload, options['workers'])
+                asgi = asyncio.run(self.run_asgi(workload, options['workers']))
+                self.stdout.write(
+                    f'{label:<20} wsgi={wsgi:>8.1f} req/s  asgi={asgi:>8.1f} req/s  ({asgi / wsgi:.2f}x)'
+                )
+
+    def run_wsgi(self, workload, workers):
+        def worker(chunk):
+            client = Client()
+            for path, params in chunk:
+                response = client.get(f'/api/{path}', params)
+                if response.status_code != 200:
+                    raise CommandError(f'WSGI {path}: HTTP {response.status_code}')
+
+        chunks = [workload[i::workers] for i in range(workers)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(worker, chunks))
+        return len(workload) / (time.perf_counter() - started)
+
+    async def run_asgi(self, workload, workers):
+        async def worker(chunk):
+            client = AsyncClient()
+            for path, params in chunk:
+                response = await client.get(f'/api/async/{path}', params)
+                if response.status_code != 200:
+                    raise CommandError(f'ASGI {path}: HTTP {response.status_code}')
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(workload[i::workers]) for i in range(workers)))
+        return len(workload) / (time.perf_counter() - started)
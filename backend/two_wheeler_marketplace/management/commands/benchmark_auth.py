@@ -0,0 +1,56 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.authentication import CachedJWTAuthentication
+from api.benchmarks import format_summary, isolated_database, summarize
+from api.seed import seed_dataset
+
+ENDPOINTS = ['favorite-list', 'notification-list', 'notification-unread-count', 'test-ride-list']
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and latency per authenticated request with and without the cached JWT user lookup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--rows', type=int, default=20)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        results = []
+        with isolated_database():
+            user = seed_dataset(options['rows'])
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+            urls = {name: reverse(name) for name in ENDPOINTS}
+            # Warm everything else (counters, caches), so the runs differ only in the user lookup.
+            for url in urls.values():
+                client.get(url)
+
+            for label, get_user in [
+                ('database', JWTAuthentication.get_user),
+                ('cached', CachedJWTAuthentication.get_user),
+            ]:
+                with mock.patch.object(CachedJWTAuthentication, 'get_user', get_user):
+                    for name, url in urls.items():
+                        timings, queries = [], 0
+                        for _ in range(count):
+                            with CaptureQueriesContext(connection) as captured:
+                                started = time.perf_counter()
+                                response = client.get(url)
+                                timings.append((time.perf_counter() - started) * 1000)
+                            if response.status_code != 200:
+                                raise AssertionError(f'{name} returned {response.status_code}')
+                            queries += len(captured)
+                        results.append((f'{label} / {name}', queries / count, summarize(timings)))
+
+        for label, queries, summary in results:
+            self.stdout.write(f'{format_summary(label, summary)}  queries={queries:.2f}')
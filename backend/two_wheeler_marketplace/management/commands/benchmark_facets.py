@@ -0,0 +1,67 @@
+import random
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from api import facets
+from api.benchmarks import format_summary, isolated_database, summarize, time_calls
+from api.models import Bike
+from api.seed import seed_bikes
+from api.views import bike_facets, filtered_bikes
+
+
+class Command(BaseCommand):
+    help = 'Benchmark facet counts: the facets endpoint (cold and cached) vs one filtered count per facet value'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(11)
+        factory = RequestFactory()
+
+        with isolated_database():
+            self.stdout.write(f"Seeding {options['bikes']} bikes...")
+            seed_bikes(options['bikes'])
+            brands = list(Bike.objects.values_list('brand', flat=True).distinct())
+            filter_sets = [
+                rng.choice([
+                    {},
+                    {'fuel_type': rng.choice(['petrol', 'electric'])},
+                    {'brand': rng.choice(brands), 'min_price': 80000},
+                    {'condition': 'new', 'year': rng.randint(2015, 2025), 'max_cc': 200},
+                ])
+                for _ in range(options['queries'])
+            ]
+            requests = [(factory.get('/api/bikes/facets/', params),) for params in filter_sets]
+
+            def cold(request):
+                cache.clear()
+                bike_facets(request)
+
+            def per_value(request):
+                # What the sidebar did before: one filtered count per value it shows.
+                counts = bike_facets(request).data
+                for facet in facets.FACETS:
+                    owned = facets.facet_params(facet)
+                    for item in counts[facet]:
+                        params = {key: value for key, value in request.GET.items() if key not in owned}
+                        if 'value' in item:
+                            params[owned[0]] = item['value']
+                        else:
+                            params.update({
+                                param: bound for param, bound in zip(owned, (item['min'], item['max']))
+                                if bound is not None
+                            })
+                        filtered_bikes(factory.get('/api/bikes/', params)).count()
+
+            results = [('facets endpoint, cold', summarize(time_calls(cold, requests)))]
+            time_calls(bike_facets, requests)
+            results += [
+                ('facets endpoint, cached', summarize(time_calls(bike_facets, requests))),
+                ('one count per facet value', summarize(time_calls(per_value, requests))),
+            ]
+        for label, summary in results:
+            self.stdout.write(format_summary(label, summary))
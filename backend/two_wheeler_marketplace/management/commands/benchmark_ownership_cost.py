@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from api import ownership
+from api.benchmarks import format_summary, isolated_database, summarize, time_calls
+from api.seed import seed_bikes
+
+BASE_PARAMS = {'monthly_km': '1200', 'fuel_price_per_liter': '105', 'electricity_price_per_kwh': '8'}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the ownership-cost ranking endpoint on a seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=100000)
+        parser.add_argument('--requests', type=int, default=100)
+
+    def handle(self, *args, **options):
+        workloads = {
+            'whole catalog': {},
+            'with EMI plan': {'interest_rate': '9.5', 'tenure_months': '36', 'down_payment_percent': '20'},
+            'filtered': {'fuel_type': 'electric', 'min_price': '60000', 'max_price': '150000'},
+            'descending, page 50': {'ordering': '-yearly_cost', 'page': '50'},
+        }
+        client = APIClient()
+
+        def get(params):
+            response = client.get('/api/bikes/ownership-cost/', {**BASE_PARAMS, **params})
+            if response.status_code != 200:
+                raise CommandError(f'{params}: HTTP {response.status_code} {response.content[:200]!r}')
+
+        with isolated_database():
+            self.stdout.write(f"Seeding {options['bikes']} bikes...")
+            seed_bikes(options['bikes'])
+            started = time.perf_counter()
+            ownership.get_columns()
+            self.stdout.write(f'Built catalog columns in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+            results = [
+                (workload, summarize(time_calls(get, [(params,)] * options['requests'])))
+                for workload, params in workloads.items()
+            ]
+        for label, summary in results:
+            self.stdout.write(format_summary(label, summary))
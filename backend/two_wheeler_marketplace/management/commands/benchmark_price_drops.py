@@ -0,0 +1,74 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from api import price_alerts
+from api.benchmarks import isolated_database
+from api.models import Bike, Favorite, Notification
+from api.seed import seed_bikes
+
+
+class Command(BaseCommand):
+    help = 'Benchmark price-drop notification fan-out (chunked bulk_create vs one INSERT per user)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--favorites', type=int, default=50000, help='Users who favorited the bike')
+        parser.add_argument('--naive', type=int, default=5000, help='Users notified one by one for comparison')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = options['favorites']
+        with isolated_database():
+            self.stdout.write(f'Seeding {count} users favoriting one bike...')
+            seed_bikes(2)
+            bike, other = Bike.objects.select_related('brand')[:2]
+            users = User.objects.bulk_create(
+                [User(username=f'fan-{i}') for i in range(count)], batch_size=5000
+            )
+            Favorite.objects.bulk_create([Favorite(user=user, bike=bike) for user in users], batch_size=5000)
+            Favorite.objects.bulk_create(
+                [Favorite(user=user, bike=other) for user in users[:options['naive']]], batch_size=5000
+            )
+            old_price, new_price = bike.price, bike.price - Decimal(5000)
+
+            started = time.perf_counter()
+            bike.price = new_price
+            bike.save()
+            save_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            price_alerts.get_dispatcher().submit(lambda: None).result()
+            queued_s = time.perf_counter() - started
+            self.stdout.write(
+                f'bike save with price cut     {save_ms:9.1f} ms (fan-out queued; '
+                f'{Notification.objects.count()} rows written {queued_s:.2f} s later)'
+            )
+            Notification.objects.all().delete()
+
+            started = time.perf_counter()
+            written = price_alerts.fan_out(bike.pk, old_price, new_price, chunk_size=options['chunk_size'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'chunked fan-out              {written} rows in {elapsed:.2f} s ({written / elapsed:,.0f} rows/s)'
+            )
+
+            started = time.perf_counter()
+            repeated = price_alerts.fan_out(bike.pk, old_price, new_price, chunk_size=options['chunk_size'])
+            self.stdout.write(
+                f'repeat within dedupe window  {repeated} rows in {time.perf_counter() - started:.2f} s'
+            )
+
+            title, message = price_alerts.notification_text(other, old_price, new_price)
+            started = time.perf_counter()
+            naive = 0
+            for user_id in Favorite.objects.filter(bike=other).values_list('user_id', flat=True):
+                if not Notification.objects.filter(user_id=user_id, related_bike=other, type='price_drop').exists():
+                    Notification.objects.create(
+                        user_id=user_id, type='price_drop', title=title, message=message, related_bike=other
+                    )
+                    naive += 1
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'one INSERT per user          {naive} rows in {elapsed:.2f} s ({naive / elapsed:,.0f} rows/s)'
+            )
@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.benchmarks import format_summary, isolated_database, summarize, time_calls
+from api import autocomplete
+from api.models import Bike
+from api.search import rebuild_search_index, search_backend, suggest_bike_ids
+from api.seed import MODEL_NAMES, BRAND_NAMES, seed_bikes
+
+
+class Command(BaseCommand):
+    help = 'Benchmark search suggestion latency (in-memory index, full-text index, icontains) on a seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        words = [name.lower() for name in MODEL_NAMES + BRAND_NAMES]
+        workloads = {
+            'short prefix': [(rng.choice(words)[:2],) for _ in range(options['queries'])],
+            'word prefix': [(rng.choice(words)[:4],) for _ in range(options['queries'])],
+            'brand + model': [
+                (f'{rng.choice(BRAND_NAMES)} {rng.choice(MODEL_NAMES)[:3]}',) for _ in range(options['queries'])
+            ],
+            'specific model': [
+                (f'{rng.choice(MODEL_NAMES)} {rng.randrange(options["bikes"])}',) for _ in range(options['queries'])
+            ],
+            'no match': [(f'zq{rng.randrange(1000)}',) for _ in range(options['queries'])],
+        }
+
+        def icontains(query):
+            return list(
+                Bike.objects.filter(Q(model_name__icontains=query) | Q(brand__name__icontains=query))
+                .values_list('id', flat=True)[:10]
+            )
+
+        with isolated_database():
+            self.stdout.write(f"Seeding {options['bikes']} bikes...")
+            seed_bikes(options['bikes'])
+            indexed = rebuild_search_index()
+            self.stdout.write(f'Indexed {indexed} bikes (backend: {search_backend(Bike.objects.db)})')
+
+            started = time.perf_counter()
+            autocomplete.get_index()
+            self.stdout.write(f'Built in-memory autocomplete index in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+            results = []
+            for workload, queries in workloads.items():
+                results.append((f'memory / {workload}', summarize(time_calls(autocomplete.suggest, queries))))
+                results.append((f'index / {workload}', summarize(time_calls(suggest_bike_ids, queries))))
+                results.append((f'icontains / {workload}', summarize(time_calls(icontains, queries))))
+        for label, summary in results:
+            self.stdout.write(format_summary(label, summary))
@@ -0,0 +1,75 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import geo
+from api.benchmarks import format_summary, isolated_database, summarize, time_calls
+from api.seed import CITIES, seed_showrooms
+
+
+class Command(BaseCommand):
+    help = 'Benchmark nearest-showroom lookups (grid index vs naive full scan) on a seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--showrooms', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--radius-km', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(11)
+        k = options['k']
+        radius_km = options['radius_km']
+        points = []
+        for _ in range(options['queries']):
+            _, _, lat, lng = rng.choice(CITIES)
+            points.append((lat + rng.uniform(-0.6, 0.6), lng + rng.uniform(-0.6, 0.6)))
+
+        with isolated_database():
+            self.stdout.write(f"Seeding {options['showrooms']} showrooms...")
+            seed_showrooms(options['showrooms'])
+            started = time.perf_counter()
+            index = geo.get_index()
+            self.stdout.write(f'Built grid index over {len(index)} showrooms in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+        ids = index.ids.tolist()
+        lats = index.lats.tolist()
+        lngs = index.lngs.tolist()
+
+        def naive_distances(lat, lng):
+            lat, lng = math.radians(lat), math.radians(lng)
+            distances = []
+            for pk, other_lat, other_lng in zip(ids, lats, lngs):
+                a = (math.sin((other_lat - lat) / 2) ** 2
+                     + math.cos(lat) * math.cos(other_lat) * math.sin((other_lng - lng) / 2) ** 2)
+                distances.append((2 * geo.EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))), pk))
+            return distances
+
+        def naive_nearest(lat, lng):
+            return sorted(naive_distances(lat, lng))[:k]
+
+        def naive_within(lat, lng):
+            return sorted(item for item in naive_distances(lat, lng) if item[0] <= radius_km)
+
+        def vectorized_nearest(lat, lng):
+            distances = geo.haversine_km(math.radians(lat), math.radians(lng), index.lats, index.lngs)
+            return index.ids[distances.argsort(kind='stable')[:k]]
+
+        for lat, lng in points[:50]:
+            # Ties may be broken differently, so compare distances rather than ids.
+            expected = [round(distance, 6) for distance, _ in naive_nearest(lat, lng)]
+            found = [round(distance, 6) for _, distance in index.nearest(lat, lng, k)]
+            if expected != found:
+                raise CommandError(f'Index and full scan disagree near {lat:.4f},{lng:.4f}')
+
+        results = [
+            (f'index / {k}-nearest', summarize(time_calls(lambda lat, lng: index.nearest(lat, lng, k), points))),
+            ('naive / k-nearest', summarize(time_calls(naive_nearest, points))),
+            ('numpy full scan / k-nearest', summarize(time_calls(vectorized_nearest, points))),
+            (f'index / {radius_km:g} km', summarize(time_calls(lambda lat, lng: index.within(lat, lng, radius_km), points))),
+            ('naive / radius', summarize(time_calls(naive_within, points))),
+        ]
+        for label, summary in results:
+            self.stdout.write(format_summary(label, summary))
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import FloatField, Func, Q, Value
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+from django.http import QueryDict
+
+from api import specs
+from api.benchmarks import format_summary, isolated_database, summarize, time_calls
+from api.models import Bike, BikeSpec
+from api.seed import seed_bikes
+
+
+def json_number(key):
+    """The number a ``specifications`` value starts with, read with JSON-path SQL."""
+    text = KT(f'specifications__{key}')
+    if connection.vendor == 'postgresql':
+        text = Func(text, Value(r'^[0-9.]+'), function='substring')
+    # SQLite's CAST reads the leading number of "140 km/h" by itself.
+    return Cast(text, FloatField())
+
+
+class Command(BaseCommand):
+    help = 'Benchmark spec.<key> filters: the BikeSpec index vs JSON-path filtering of Bike.specifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        workloads = {
+            'abs = yes': (
+                'spec.abs=yes',
+                lambda: Bike.objects.filter(specifications__abs__iexact='yes'),
+            ),
+            'top_speed >= 150': (
+                'spec.top_speed__gte=150',
+                lambda: Bike.objects.alias(top_speed=json_number('top_speed')).filter(top_speed__gte=150),
+            ),
+            'top_speed >= 159': (
+                'spec.top_speed__gte=159',
+                lambda: Bike.objects.alias(top_speed=json_number('top_speed')).filter(top_speed__gte=159),
+            ),
+            'speed, weight and abs': (
+                'spec.top_speed__gte=120&spec.weight__lte=110&spec.abs=yes',
+                lambda: Bike.objects.alias(
+                    top_speed=json_number('top_speed'), weight=json_number('weight')
+                ).filter(Q(top_speed__gte=120) & Q(weight__lte=110) & Q(specifications__abs__iexact='yes')),
+            ),
+        }
+
+        def page(queryset):
+            return list(queryset.order_by('-created_at', '-id').values_list('id', flat=True)[:20])
+
+        with isolated_database():
+            self.stdout.write(f"Seeding {options['bikes']} bikes...")
+            seed_bikes(options['bikes'])
+            written = specs.rebuild_spec_index()
+            self.stdout.write(f'Indexed {written} specification rows ({connection.vendor})')
+
+            results = []
+            for label, (query_string, json_path) in workloads.items():
+                def indexed():
+                    return specs.filter_bikes(Bike.objects.all(), QueryDict(query_string))
+
+                matches = indexed().count()
+                if matches != json_path().count():
+                    self.stderr.write(f'{label}: the index and the JSON path disagree')
+                self.stdout.write(f'{label}: {matches} bikes')
+                calls = [()] * options['repeat']
+                results += [
+                    (f'index / {label} / count', summarize(time_calls(lambda: indexed().count(), calls))),
+                    (f'json / {label} / count', summarize(time_calls(lambda: json_path().count(), calls))),
+                    (f'index / {label} / page', summarize(time_calls(lambda: page(indexed()), calls))),
+                    (f'json / {label} / page', summarize(time_calls(lambda: page(json_path()), calls))),
+                ]
+            self.stdout.write(f'{BikeSpec.objects.count()} rows in the spec table')
+        for label, summary in results:
+            self.stdout.write(format_summary(label, summary))
@@ -0,0 +1,188 @@
+import datetime
+import logging
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import slots, sqlite
+from api.benchmarks import format_summary, isolated_database, run_in_django, summarize
+from api.models import Bike, Showroom
+from api.seed import seed_bikes, seed_showrooms, seed_user
+
+PROFILES = {
+    'default': False,
+    'production': True,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Mixed concurrent readers and writers through the real views on a SQLite file, '
+        'with and without the production profile: throughput and "database is locked" errors'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--read-first-writers', type=int, default=2,
+                            help='Writers whose requests each run in one transaction, reading before writing')
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--bikes', type=int, default=2000)
+        parser.add_argument('--profile', choices=list(PROFILES), action='append',
+                            help='Run only this profile (repeatable); both by default')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark is about SQLite; the default database is not SQLite')
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers and {options['read_first_writers']} "
+            f"read-first writers for {options['seconds']}s on {options['bikes']} bikes"
+        )
+        # Every 4xx/5xx would be logged.
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            for profile in options['profile'] or list(PROFILES):
+                with override_settings(SQLITE={**settings.SQLITE, 'PRODUCTION': PROFILES[profile]}):
+                    self.run_profile(profile, options)
+        finally:
+            request_logger.setLevel(level)
+
+    def run_profile(self, profile, options):
+        # A fresh file per profile: WAL mode, once set, stays with the file.
+        with tempfile.TemporaryDirectory() as tmp, isolated_database(os.path.join(tmp, f'{profile}.sqlite3')):
+            connection.ensure_connection()
+            pragmas = sqlite.apply_pragmas(connection) if PROFILES[profile] else {}
+            seed_bikes(options['bikes'])
+            seed_showrooms(5)
+            fixtures = {
+                'database': connection.settings_dict['NAME'],
+                'production': PROFILES[profile],
+                'bike_ids': list(Bike.objects.values_list('pk', flat=True)),
+                'showroom_ids': list(Showroom.objects.values_list('pk', flat=True)),
+            }
+            kinds = (
+                ['read'] * options['readers'] + ['write'] * options['writers']
+                + ['read-first'] * options['read_first_writers']
+            )
+            # Ids only: a spawned process unpickles its arguments before it sets Django up.
+            user_ids = [seed_user(f'rider-{i}@example.com').pk for i in range(len(kinds))]
+            connection.close()
+
+            # Processes, like the workers of a WSGI server: one process's threads would take turns on the GIL.
+            # Spawned rather than forked: fork is missing on Windows and unsafe on macOS.
+            context = multiprocessing.get_context('spawn')
+            stop = context.Event()
+            ready = context.Barrier(len(kinds) + 1)
+            queue = context.Queue()
+            workers = [
+                context.Process(
+                    target=run_in_django, args=(f'{__name__}.work', fixtures, kind, user_id, index, ready, stop, queue)
+                )
+                for index, (kind, user_id) in enumerate(zip(kinds, user_ids))
+            ]
+            for worker in workers:
+                worker.start()
+            # Start the clock once every worker has set Django up.
+            ready.wait(timeout=120)
+            started = time.perf_counter()
+            time.sleep(options['seconds'])
+            stop.set()
+            results = {kind: [] for kind in kinds}
+            for _ in workers:
+                kind, outcomes = queue.get()
+                results[kind] += outcomes
+            elapsed = time.perf_counter() - started
+            for worker in workers:
+                worker.join()
+
+        label = profile + (f" ({', '.join(f'{k}={v}' for k, v in pragmas.items())})" if pragmas else '')
+        self.stdout.write(f'\n{label}')
+        for kind, outcomes in results.items():
+            counts = Counter(outcome for outcome, _ in outcomes)
+            timings = [ms for outcome, ms in outcomes if outcome == 'ok']
+            self.stdout.write(
+                f'  {kind:<10} {counts["ok"] / elapsed:>8.1f} req/s  ok={counts["ok"]:<6} '
+                f'rejected={counts["rejected"]:<5} locked={counts["locked"]:<5} failed={counts["failed"]}'
+            )
+            if timings:
+                self.stdout.write('  ' + format_summary('latency', summarize(timings)))
+
+
+def work(fixtures, kind, user_id, index, ready, stop, queue):
+    """Make ``kind`` requests until ``stop``; puts ``(kind, [(outcome, ms), ...])`` on ``queue``."""
+    setup_test_environment()
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    connection.settings_dict['NAME'] = fixtures['database']
+    # The same writes, each request in one transaction (as with ATOMIC_REQUESTS): their lookups and
+    # validation read before they write, which fails at once, whatever the timeout, once another
+    # connection has written meanwhile (see api/sqlite.py).
+    connection.settings_dict['ATOMIC_REQUESTS'] = kind == 'read-first'
+    action = read if kind == 'read' else write
+    fixtures = {**fixtures, 'showrooms': list(Showroom.objects.filter(pk__in=fixtures['showroom_ids']))}
+    client = APIClient()
+    client.force_authenticate(get_user_model().objects.get(pk=user_id))
+    rng = random.Random(index)
+    state = {'reviewed': index * 1000}
+    local = []
+    with override_settings(SQLITE={**settings.SQLITE, 'PRODUCTION': fixtures['production']}):
+        ready.wait()
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    status = action(client, rng, state, fixtures).status_code
+                    outcome = 'ok' if status < 400 else 'rejected' if status < 500 else 'failed'
+                except OperationalError as exc:
+                    outcome = 'locked' if 'locked' in str(exc) else 'failed'
+                except Exception:
+                    outcome = 'failed'
+                local.append((outcome, (time.perf_counter() - started) * 1000))
+        finally:
+            connection.close()
+            queue.put((kind, local))
+
+
+def read(client, rng, state, fixtures):
+    bike_ids = fixtures['bike_ids']
+    choice = rng.random()
+    if choice < 0.4:
+        return client.get(reverse('bike-list'), {'page': rng.randint(1, 20), 'ordering': '-price'})
+    if choice < 0.7:
+        return client.get(reverse('bike-detail', args=[rng.choice(bike_ids)]))
+    if choice < 0.85:
+        return client.get(reverse('favorite-list'))
+    return client.get(reverse('bike-reviews', args=[rng.choice(bike_ids[:50])]))
+
+
+def write(client, rng, state, fixtures):
+    bike_ids = fixtures['bike_ids']
+    choice = rng.random()
+    if choice < 0.4:
+        return client.post(reverse('favorite-list'), {'bike_id': rng.choice(bike_ids[:200])}, format='json')
+    if choice < 0.7:
+        # One review per user and bike: walk through the bikes.
+        state['reviewed'] += 1
+        return client.post(reverse('review-list'), {
+            'bike': bike_ids[state['reviewed'] % len(bike_ids)], 'rating': rng.randint(1, 5),
+            'title': 'Benchmark review', 'comment': 'Rides well.',
+        }, format='json')
+    showroom = rng.choice(fixtures['showrooms'])
+    date = datetime.date.today() + datetime.timedelta(days=rng.randint(1, 14))
+    return client.post(reverse('test-ride-list'), {
+        'bike': rng.choice(bike_ids), 'showroom': showroom.pk, 'preferred_date': date.isoformat(),
+        'preferred_time': rng.choice(slots.slot_times(showroom)).isoformat(),
+    }, format='json')
@@ -0,0 +1,70 @@
+import io
+import os
+import tempfile
+import time
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from PIL import Image
+
+from api import images
+from api.benchmarks import isolated_database
+from api.models import Brand
+
+
+def upload(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 600), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(f'{color}.png', buffer.getvalue(), content_type='image/png')
+
+
+class Command(BaseCommand):
+    help = (
+        'Upload an image and replace it through the real web path, spawned process pool included, '
+        'and check its variants are generated and the replaced ones deleted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for each generation')
+
+    def handle(self, *args, **options):
+        self.timeout = options['timeout']
+        failures = []
+        # The dispatcher thread needs its own connection to the same database, and the storage a real directory.
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            MEDIA_ROOT=os.path.join(tmp, 'media'), IMAGE_VARIANTS={'ENABLED': True, 'WORKERS': 1},
+        ), isolated_database(os.path.join(tmp, 'images.sqlite3')):
+            brand = Brand.objects.create(name='Variant Check', logo=upload('red'))
+            first = self.wait_for_variants(brand, {})
+            if set(first) != set(images.SIZES) | {f'{size}_webp' for size in images.SIZES}:
+                failures.append(f'new image: expected every variant, got {sorted(first)}')
+            missing = [name for name in first.values() if not default_storage.exists(name)]
+            if missing:
+                failures.append(f'new image: variants not stored: {missing}')
+
+            brand.logo = upload('blue')
+            brand.save()
+            second = self.wait_for_variants(brand, first)
+            if not second or set(second.values()) & set(first.values()):
+                failures.append(f'replaced image: expected new variants, got {sorted(second.values())}')
+            left = [name for name in first.values() if default_storage.exists(name)]
+            if left:
+                failures.append(f'replaced image: old variants not deleted: {left}')
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} image variant check(s) failed')
+        self.stdout.write(self.style.SUCCESS('Variants were generated and replaced ones deleted'))
+
+    def wait_for_variants(self, brand, previous):
+        """The brand's logo variants once they differ from ``previous``, or ``{}`` after the timeout."""
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            variants = Brand.objects.filter(pk=brand.pk).values_list('logo_variants', flat=True).get()
+            if variants and variants != previous:
+                return variants
+            time.sleep(0.2)
+        return {}
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import search, specs
+from api.benchmarks import isolated_database
+from api.models import Brand
+from api.seed import seed_bikes
+from api.views import filtered_bikes
+
+COST_PARAMS = {'monthly_km': '1200', 'fuel_price_per_liter': '105', 'electricity_price_per_kwh': '8'}
+
+
+class Command(BaseCommand):
+    help = 'Check the ownership-cost ranking returns exactly the bikes BikeListView returns for the same filters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=500)
+
+    def handle(self, *args, **options):
+        failures = []
+        with isolated_database():
+            seed_bikes(options['bikes'])
+            specs.rebuild_spec_index()
+            search.rebuild_search_index()
+            brand = Brand.objects.order_by('pk').first()
+            cases = [
+                {},
+                {'min_cc': '150'},
+                {'max_cc': '125'},
+                {'min_cc': '110', 'max_cc': '200', 'fuel_type': 'petrol'},
+                {'min_price': '100000', 'max_price': '200000'},
+                {'brand': str(brand.pk), 'year': '2020'},
+                {'spec.top_speed__gte': '120'},
+                {'spec.abs': 'yes', 'min_cc': '150'},
+                {'search': brand.name},
+            ]
+            client = APIClient()
+            for params in cases:
+                expected = set(filtered_bikes(RequestFactory().get('/', params)).values_list('id', flat=True))
+                found = set()
+                response = client.get(reverse('bike-ownership-cost'), {**COST_PARAMS, **params})
+                while response.status_code == 200:
+                    found |= {bike['id'] for bike in response.json()['results']}
+                    if not response.json()['next']:
+                        break
+                    response = client.get(response.json()['next'])
+                if response.status_code != 200:
+                    failures.append(f'{params}: HTTP {response.status_code}')
+                    continue
+                self.stdout.write(f'{str(params):<56} expected={len(expected):<5} ranked={len(found)}')
+                if found != expected:
+                    failures.append(
+                        f'{params}: {len(found - expected)} bikes the list excludes, {len(expected - found)} missing'
+                    )
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} ownership filter check(s) failed')
+        self.stdout.write(self.style.SUCCESS('The ranking applies every BikeListView filter'))
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import isolated_database
+from api.budgets import check_budgets, format_table
+
+
+class Command(BaseCommand):
+    help = 'Check every API endpoint against its query count and wall-time budget on a seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small-rows', type=int, default=3)
+        parser.add_argument('--full-rows', type=int, default=25)
+        parser.add_argument('--no-time', action='store_true', help='Only enforce query budgets')
+        parser.add_argument('--json', dest='json_path', help='Also write the measurements to this file')
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            results, failures = check_budgets(
+                small_rows=options['small_rows'],
+                full_rows=options['full_rows'],
+                check_time=not options['no_time'],
+            )
+
+        self.stdout.write(format_table(results))
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} endpoint budget(s) exceeded')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} endpoints within budget'))
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import replicas, response_cache
+from api.benchmarks import isolated_database
+from api.models import Bike, Review
+from api.seed import seed_dataset, seed_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Check read-replica routing with two SQLite files standing in for the primary and a replica. '
+        'Needs a replica configured, e.g. DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3'
+    )
+    # The checks run against a shared cache of their own; api.W002 would be about the configured one.
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        aliases = replicas.replica_aliases()
+        if not aliases:
+            raise CommandError('No replica configured; set DATABASE_REPLICA_URLS')
+        self.replica = aliases[0]
+        if connections[self.replica].vendor != 'sqlite':
+            raise CommandError('The stand-in replica is filled by copying the primary, which needs SQLite')
+        self.failures = []
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Its own file rather than mirroring the primary, so it only sees what was copied to it.
+            connections[self.replica].settings_dict['TEST'].update(
+                MIRROR=None, NAME=os.path.join(tmp, 'replica.sqlite3')
+            )
+            # Replicas are only used with a cache every worker shares; a file-based one is, on one host.
+            shared_cache = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': os.path.join(tmp, 'cache'),
+            }}
+            with override_settings(CACHES=shared_cache), isolated_database(os.path.join(tmp, 'primary.sqlite3')):
+                self.run_checks()
+
+        if self.failures:
+            for failure in self.failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(self.failures)} routing check(s) failed')
+        self.stdout.write(self.style.SUCCESS('Reads were routed as expected'))
+
+    def replicate(self):
+        """Copy the primary into the replica, as replication would."""
+        connections['default'].ensure_connection()
+        connections[self.replica].ensure_connection()
+        connections['default'].connection.backup(connections[self.replica].connection)
+
+    def request(self, client, method, name, data=None, args=None):
+        """Make one request and return it with the queries it ran on the primary and the replica."""
+        # Cached responses run no queries at all; keep the read pins, drop the rest.
+        response_cache.local_cache.clear()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[self.replica]) as replica:
+            response = getattr(client, method)(reverse(name, args=args), data, format='json')
+        return response, len(primary), len(replica)
+
+    def expect(self, label, response, primary, replica, on):
+        if on == 'replica':
+            ok = replica > 0 and primary == 0
+        else:
+            ok = primary > 0 and replica == 0
+        ok = ok and response.status_code < 400
+        self.stdout.write(
+            f'{label:<48} status={response.status_code} primary={primary:<3} replica={replica:<3} '
+            f'{"ok" if ok else "expected reads on the " + on}'
+        )
+        if not ok:
+            self.failures.append(f'{label}: expected reads on the {on}')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def run_checks(self):
+        user = seed_dataset(5)
+        writer = self.client_for(user)
+        other = self.client_for(seed_user('replica-reader@example.com'))
+        anonymous = APIClient()
+        self.replicate()
+        cache.clear()
+
+        # User lookups always read the primary; have them cached, as they would be after a first request.
+        writer.get(reverse('notification-unread-count'))
+        other.get(reverse('notification-unread-count'))
+
+        self.expect('bike list', *self.request(other, 'get', 'bike-list'), on='replica')
+        self.expect('anonymous bike list (fills the response cache)', *self.request(anonymous, 'get', 'bike-list'),
+                    on='primary')
+        review = Review.objects.filter(user=user).first()
+        self.expect('view not on the replica list', *self.request(writer, 'get', 'review-detail', args=[review.pk]),
+                    on='primary')
+
+        before = writer.get(reverse('favorite-list')).data['count']
+        bike = Bike.objects.exclude(favorites__user=user).first()
+        response = writer.post(reverse('favorite-list'), {'bike_id': bike.pk}, format='json')
+        if response.status_code >= 400:
+            raise CommandError(f'Could not add a favorite: {response.status_code} {response.data}')
+        response, primary, replica = self.request(writer, 'get', 'favorite-list')
+        self.expect('writer right after its write', response, primary, replica, on='primary')
+        if response.data['count'] != before + 1:
+            self.failures.append('The writer did not read its own write')
+        self.expect('another user meanwhile', *self.request(other, 'get', 'favorite-list'), on='replica')
+
+        with override_settings(READ_REPLICAS={'STICKY_SECONDS': 1, 'RETRY_SECONDS': 30}):
+            # Toggles the favorite back, pinning the writer for a second.
+            writer.post(reverse('favorite-list'), {'bike_id': bike.pk}, format='json')
+            time.sleep(1.1)
+            response, primary, replica = self.request(writer, 'get', 'favorite-list')
+        self.expect('writer once its pin expired', response, primary, replica, on='replica')
+        if response.data['count'] != before:
+            self.failures.append('The writer read from something other than the (stale) replica')
+
+        connection = connections[self.replica]
+        connection.close()
+        name = connection.settings_dict['NAME']
+        connection.settings_dict['NAME'] = os.path.join(name + '-missing', 'replica.sqlite3')
+        cache.clear()
+        response_cache.local_cache.clear()
+        try:
+            with CaptureQueriesContext(connections['default']) as primary:
+                response = other.get(reverse('bike-list'))
+            self.expect('replica down: falls back to the primary', response, len(primary), 0, on='primary')
+        finally:
+            connection.settings_dict['NAME'] = name
+            replicas._unavailable.clear()
@@ -0,0 +1,123 @@
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from api import geo
+from api.benchmarks import isolated_database
+from api.models import Brand, Showroom
+from api.seed import seed_showrooms
+
+
+class Command(BaseCommand):
+    help = (
+        'Check nearest-showroom lookups against a full scan, including query points far from every '
+        'showroom and k larger than the index'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--showrooms', type=int, default=2000)
+        parser.add_argument('--max-ms', type=float, default=1000, help='Slowest acceptable single lookup')
+        parser.add_argument('--filtered-showrooms', type=int, default=20000,
+                            help='Seeded showrooms for the filtered lookups through the database')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(7)
+        count = options['showrooms']
+        # Spread over India, as the seeded catalog is.
+        lats = rng.uniform(8, 30, count)
+        lngs = rng.uniform(70, 90, count)
+        index = geo.ShowroomIndex(np.arange(1, count + 1), lats, lngs)
+        self.max_ms = options['max_ms']
+        self.failures = []
+
+        def full_scan(lat, lng):
+            return geo.haversine_km(math.radians(lat), math.radians(lng), np.radians(lats), np.radians(lngs))
+
+        cases = [
+            ('inside the grid', 19.07, 72.88, 10),
+            ('off the grid, far north-west', 50.0, 20.0, 5),
+            ('off the grid, at 0,0', 0.0, 0.0, 5),
+            ('off the grid, antipodes', -20.0, -100.0, 3),
+            ('next to a pole', 89.9, 179.0, 1),
+            ('k larger than the index', 19.07, 72.88, count + 50),
+        ]
+        for label, lat, lng, k in cases:
+            # Ties may be broken differently, so compare distances rather than ids.
+            expected = [round(float(distance), 6) for distance in np.sort(full_scan(lat, lng))[:k]]
+            found = self.timed(label, lambda: index.nearest(lat, lng, k))
+            if [round(distance, 6) for _, distance in found] != expected:
+                self.failures.append(f'{label}: {len(found)} results disagree with the full scan')
+
+        radius_cases = [
+            ('radius inside the grid', 19.07, 72.88, 150),
+            ('radius off the grid', 0.0, 0.0, 500),
+        ]
+        for label, lat, lng, radius_km in radius_cases:
+            distances = full_scan(lat, lng)
+            expected = [round(float(distance), 6) for distance in np.sort(distances[distances <= radius_km])]
+            found = self.timed(label, lambda: index.within(lat, lng, radius_km, limit=None))
+            if [round(distance, 6) for _, distance in found] != expected:
+                self.failures.append(f'{label}: {len(found)} results disagree with the full scan')
+
+        # Every 37th showroom only, as a filter would leave them.
+        kept = np.arange(1, count + 1, 37)
+        allowed = index.mask(kept)
+        for label, lookup, keep in [
+            ('filtered k-nearest', lambda: index.nearest(19.07, 72.88, 10, allowed=allowed), 10),
+            ('filtered radius', lambda: index.within(19.07, 72.88, 300, limit=None, allowed=allowed), None),
+        ]:
+            distances = full_scan(19.07, 72.88)[kept - 1]
+            if keep is None:
+                distances = distances[distances <= 300]
+            expected = [round(float(distance), 6) for distance in np.sort(distances)[:keep]]
+            found = self.timed(label, lookup)
+            if [round(distance, 6) for _, distance in found] != expected:
+                self.failures.append(f'{label}: {len(found)} results disagree with the full scan')
+
+        empty = geo.ShowroomIndex([], [], [])
+        if empty.nearest(19.07, 72.88, 5) or empty.within(19.07, 72.88, 50):
+            self.failures.append('empty index: expected no results')
+
+        if options['filtered_showrooms']:
+            with isolated_database():
+                self.check_filtered(options['filtered_showrooms'])
+
+        if self.failures:
+            for failure in self.failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(self.failures)} showroom index check(s) failed')
+        self.stdout.write(self.style.SUCCESS('Index lookups match the full scan'))
+
+    def check_filtered(self, count):
+        """A brand with a handful of showrooms among ``count``: only those come back, nearest first."""
+        seed_showrooms(count)
+        rare = Brand.objects.create(name='Rare Motors')
+        showrooms = list(Showroom.objects.order_by('pk')[::max(count // 7, 1)])
+        rare.showrooms.add(*showrooms)
+        queryset = Showroom.objects.filter(is_active=True, brands=rare)
+        lat, lng = 19.07, 72.88
+        expected = sorted(
+            round(float(geo.haversine_km(
+                math.radians(lat), math.radians(lng),
+                np.radians(float(showroom.latitude)), np.radians(float(showroom.longitude)),
+            )), 3)
+            for showroom in showrooms
+        )
+        for label, kwargs, keep in [
+            ('database, rare brand, k=3', {'k': 3}, 3),
+            ('database, rare brand, radius', {'radius_km': 5000}, None),
+        ]:
+            found = self.timed(label, lambda: geo.nearest_showrooms(queryset, lat, lng, **kwargs))
+            if [showroom.distance_km for showroom in found] != expected[:keep]:
+                self.failures.append(f'{label}: got {[showroom.distance_km for showroom in found]}')
+
+    def timed(self, label, lookup):
+        started = time.perf_counter()
+        result = lookup()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'{label:<32} {len(result):>6} results  {elapsed_ms:>8.1f} ms')
+        if elapsed_ms > self.max_ms:
+            self.failures.append(f'{label}: {elapsed_ms:.0f} ms, limit is {self.max_ms:.0f} ms')
+        return result
@@ -0,0 +1,125 @@
+import datetime
+import logging
+import os
+import tempfile
+import threading
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.benchmarks import isolated_database
+from api.models import Bike, Showroom, TestRide
+from api.seed import seed_bikes, seed_showrooms, seed_user
+
+
+class Command(BaseCommand):
+    help = 'Book one test ride slot from many threads at once and check it is never overbooked'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=20)
+        parser.add_argument('--capacity', type=int, default=3)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        threads, capacity = options['threads'], options['capacity']
+        failures = []
+        # Threads need their own connections to one database, which rules out SQLite's in-memory test database.
+        with tempfile.TemporaryDirectory() as tmp, isolated_database(os.path.join(tmp, 'booking.sqlite3')):
+            seed_bikes(threads)
+            seed_showrooms(1)
+            showroom = Showroom.objects.get()
+            showroom.test_ride_capacity = capacity
+            showroom.save()
+            bikes = list(Bike.objects.values_list('pk', flat=True))
+            users = [seed_user(f'rider-{i}@example.com') for i in range(threads)]
+            date = datetime.date.today() + datetime.timedelta(days=1)
+
+            for round_number in range(options['rounds']):
+                time = datetime.time(10 + round_number)
+                # Every thread on its own bike: only the slot capacity can turn them away.
+                statuses = self.hammer(users, [bikes[i] for i in range(threads)], showroom, date, time)
+                failures += self.report(f'slot {time:%H:%M}, {threads} bikes', statuses, capacity, showroom, date, time)
+            time = datetime.time(10 + options['rounds'])
+            statuses = self.hammer(users, [bikes[0]] * threads, showroom, date, time)
+            failures += self.report(f'slot {time:%H:%M}, one bike', statuses, 1, showroom, date, time)
+            failures += self.check_past_ride(users[0], bikes[0], showroom)
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} booking check(s) failed')
+        self.stdout.write(self.style.SUCCESS('No slot was overbooked'))
+
+    def hammer(self, users, bikes, showroom, date, time):
+        """POST one booking per user from its own thread, all released together. Returns the status codes."""
+        barrier = threading.Barrier(len(users))
+        statuses = [None] * len(users)
+
+        def book(index):
+            client = APIClient()
+            client.force_authenticate(users[index])
+            try:
+                barrier.wait()
+                response = client.post(reverse('test-ride-list'), {
+                    'bike': bikes[index], 'showroom': showroom.pk,
+                    'preferred_date': date.isoformat(), 'preferred_time': time.isoformat(),
+                }, format='json')
+                statuses[index] = response.status_code
+            except Exception as exc:
+                statuses[index] = type(exc).__name__
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=book, args=(index,)) for index in range(len(users))]
+        # Every 409 would log a warning.
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            request_logger.setLevel(level)
+        return statuses
+
+    def check_past_ride(self, user, bike, showroom):
+        """Staff can still complete a ride whose slot has passed, but no ride can be moved into the past."""
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        ride = TestRide.objects.create(
+            user=user, bike_id=bike, showroom=showroom,
+            preferred_date=yesterday, preferred_time=datetime.time(10), status='confirmed',
+        )
+        client = APIClient()
+        client.force_authenticate(seed_user('staff@example.com', is_staff=True))
+        url = reverse('test-ride-detail', args=[ride.pk])
+        failures = []
+        for label, method, data, expected in [
+            ('past ride, PUT completed', client.put, {
+                'bike': bike, 'showroom': showroom.pk, 'preferred_date': yesterday.isoformat(),
+                'preferred_time': '10:00:00', 'status': 'completed', 'notes': '',
+            }, 200),
+            ('past ride, moved earlier', client.patch, {
+                'preferred_date': (yesterday - datetime.timedelta(days=1)).isoformat(),
+            }, 400),
+        ]:
+            status = method(url, data, format='json').status_code
+            self.stdout.write(f'{label:<24} status={status}')
+            if status != expected:
+                failures.append(f'{label}: expected HTTP {expected}, got {status}')
+        return failures
+
+    def report(self, label, statuses, expected, showroom, date, time):
+        counts = Counter(statuses)
+        stored = TestRide.objects.filter(showroom=showroom, preferred_date=date, preferred_time=time).count()
+        self.stdout.write(
+            f'{label:<24} booked={counts[201]:<3} conflict={counts[409]:<3} '
+            f'other={sum(counts.values()) - counts[201] - counts[409]:<3} stored={stored}'
+        )
+        if counts[201] != expected or stored != expected or counts[409] != len(statuses) - expected:
+            return [f'{label}: expected {expected} bookings and {len(statuses) - expected} conflicts, got {dict(counts)}']
+        return []
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import threading
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import counters
+from api.benchmarks import isolated_database
+from api.models import Notification
+from api.seed import seed_user
+
+
+class Command(BaseCommand):
+    help = 'Mark one notification read and unread from many threads at once and check the unread counter keeps up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=10)
+        parser.add_argument('--rounds', type=int, default=10)
+
+    def handle(self, *args, **options):
+        failures = []
+        # Threads need their own connections to one database, which rules out SQLite's in-memory test database.
+        with tempfile.TemporaryDirectory() as tmp, isolated_database(os.path.join(tmp, 'unread.sqlite3')):
+            user = seed_user('reader@example.com')
+            notifications = [
+                Notification.objects.create(user=user, type='price_drop', title=f'Notice {i}', message='Price dropped')
+                for i in range(options['rounds'])
+            ]
+            for notification in notifications:
+                self.hammer(user, notification, {'is_read': True}, options['threads'])
+                failures += self.report(user, f'notification {notification.pk} read')
+            for notification in notifications[::2]:
+                self.hammer(user, notification, {'is_read': False}, options['threads'])
+                failures += self.report(user, f'notification {notification.pk} unread again')
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} unread counter check(s) failed')
+        self.stdout.write(self.style.SUCCESS('The unread counter matched the notifications after every round'))
+
+    def hammer(self, user, notification, data, threads):
+        """PATCH ``notification`` with ``data`` from ``threads`` threads, all released together."""
+        barrier = threading.Barrier(threads)
+
+        def patch():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                client.patch(reverse('notification-detail', args=[notification.pk]), data, format='json')
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=patch) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def report(self, user, label):
+        cache.clear()
+        counted = counters.get_unread_count(user.pk)
+        unread = counters.unread_notifications(user.pk).count()
+        self.stdout.write(f'{label:<32} counter={counted:<4} unread={unread}')
+        if counted != unread:
+            return [f'{label}: the counter says {counted}, {unread} are unread']
+        return []
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.similarity import compute_similar_bikes
+
+
+class Command(BaseCommand):
+    help = 'Precompute the most similar bikes of every bike for the similar bikes endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=6, help='Neighbours stored per bike')
+        parser.add_argument('--batch-size', type=int, default=256, help='Bikes scored per matrix product')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = compute_similar_bikes(k=options['k'], batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {written} similar bike rows in {time.perf_counter() - started:.1f}s')
+        )
@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.images import IMAGE_FIELDS, delete_variants, read_source, render_variants, save_variants, store_variants
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail/card/WebP variants for existing bike, brand, showroom and used-bike images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted(IMAGE_FIELDS), help='Only these models (repeatable)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--all', action='store_true', help='Regenerate images that already have variants')
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for label in options['model'] or sorted(IMAGE_FIELDS):
+                model = apps.get_model(label)
+                for image_field, variants_field in IMAGE_FIELDS[label]:
+                    rows = model.objects.exclude(
+                        Q(**{image_field: ''}) | Q(**{f'{image_field}__isnull': True})
+                        | Q(**{f'{image_field}__startswith': 'http://'}) | Q(**{f'{image_field}__startswith': 'https://'})
+                    )
+                    if not options['all']:
+                        rows = rows.filter(**{variants_field: {}})
+                    ok, errors = self.process(
+                        pool, options['workers'] * 4, model, image_field, variants_field,
+                        rows.values_list('pk', image_field).iterator(chunk_size=500),
+                    )
+                    generated += ok
+                    failed += errors
+                    self.stdout.write(f'{label}.{image_field}: {ok} generated, {errors} failed')
+
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {generated} images ({failed} failed)'))
+
+    def process(self, pool, max_pending, model, image_field, variants_field, rows):
+        """Keep at most ``max_pending`` images in flight so memory stays flat on large catalogs."""
+        pending = {}
+        ok = errors = 0
+
+        def collect(done):
+            nonlocal ok, errors
+            for future in done:
+                pk, name = pending.pop(future)
+                try:
+                    names = store_variants(name, future.result())
+                    if save_variants(model, pk, image_field, variants_field, name, names):
+                        ok += 1
+                    else:
+                        # The image was replaced while rendering; its new variants come from the signal.
+                        delete_variants(names.values())
+                except Exception as exc:
+                    errors += 1
+                    self.stderr.write(f'{name}: {exc}')
+
+        for pk, name in rows:
+            try:
+                data = read_source(name)
+            except OSError as exc:
+                errors += 1
+                self.stderr.write(f'{name}: {exc}')
+                continue
+            pending[pool.submit(render_variants, data)] = (pk, name)
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending).done)
+        return ok, errors
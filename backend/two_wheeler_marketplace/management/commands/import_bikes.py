@@ -0,0 +1,67 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalog_import import CatalogImporter, ErrorWriter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Create or update bikes from a dealer catalog file (CSV or JSON Lines), matched on brand, model and year'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: from the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows validated and written together')
+        parser.add_argument('--errors', help='Write rejected rows here, in the input format, for fixing and re-importing')
+        parser.add_argument('--create-brands', action='store_true', help='Create brands that do not exist yet')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and count, without writing')
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['path']):
+            raise CommandError(f"No such file: {options['path']}")
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        error_file = open(options['errors'], 'w', newline='', encoding='utf-8') if options['errors'] else None
+        try:
+            if error_file is not None:
+                on_error = ErrorWriter(error_file, fmt).write
+            else:
+                def on_error(row, errors):
+                    self.stderr.write(f'line {row.line}: {errors}')
+
+            importer = CatalogImporter(
+                chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+                create_brands=options['create_brands'], on_error=on_error,
+            )
+            # Redraw one progress line on a terminal, one line per chunk otherwise.
+            ending = '\r' if self.stdout.isatty() else '\n'
+            started = time.perf_counter()
+            # utf-8-sig: spreadsheet exports often start with a byte order mark.
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                for stats in importer.run(read_rows(f, fmt)):
+                    self.stdout.write(self.format_stats(stats, time.perf_counter() - started), ending=ending)
+                    self.stdout.flush()
+        finally:
+            if error_file is not None:
+                error_file.close()
+
+        if ending == '\r':
+            self.stdout.write('')
+        stats = importer.stats
+        summary = self.format_stats(stats, time.perf_counter() - started)
+        if importer.new_brands:
+            summary += f', {importer.new_brands} new brands'
+        if options['dry_run']:
+            summary = f'Dry run, nothing written: {summary}'
+        self.stdout.write(self.style.WARNING(summary) if stats['failed'] else self.style.SUCCESS(summary))
+
+    @staticmethod
+    def format_stats(stats, elapsed):
+        return (
+            f"{stats['processed']} rows: {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, "
+            f"{stats['superseded']} superseded, {stats['failed']} failed ({stats['processed'] / max(elapsed, 1e-9):.0f} rows/s)"
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored rating summary (count, sum, average, histogram) of every bike'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        updated = rebuild_rating_summaries(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt rating summaries for {updated} bikes')
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the bike full-text search index (SQLite FTS5 / PostgreSQL tsvector)'
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {indexed} bikes')
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.specs import rebuild_spec_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the bike specification index from Bike.specifications and Bike.features'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        written = rebuild_spec_index(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {written} specification rows')
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the maintained counters (bikes, active showrooms, reviews, unread notifications) from the database'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rebuilt} counters')
+        )